@@ -0,0 +1,136 @@
+"""
+Assembly benchmark: the original whole-timeline MoviePy render
+("moviepy-timeline") vs. the MoviePy and ffmpeg segment encoders, for one
+or more render pool sizes. Segments are joined by stream-copy concat; the
+timeline path runs in one process, so its pool size does not matter.
+
+Builds a synthetic lecture (PNG slides + sine-tone voiceovers) in a temp
+directory, then renders it once per (assembler, workers) pair, each in a
+fresh subprocess so peak RSS is measured in isolation. Peak RSS is reported
+for the parent Python process and for the largest child it spawned (render
+workers and the ffmpeg processes they run).
+
+Usage (from /backend):
+    python -m benchmarks.bench_assembly --slides 20 --seconds 30 --workers 1,16
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_fixture(directory: str, slides: int, seconds: float) -> list:
+    from PIL import Image, ImageDraw
+    from src.services.assembly import FFMPEG_BINARY
+
+    media = []
+    for idx in range(1, slides + 1):
+        img_path = os.path.join(directory, f"slide_{idx:02d}.png")
+        image = Image.new("RGB", (1920, 1080), "white")
+        draw = ImageDraw.Draw(image)
+        draw.text((120, 120), f"Slide {idx}", fill="black")
+        for row in range(8):
+            draw.text((160, 240 + row * 80), f"- bullet point {row} of slide {idx}", fill="black")
+        image.save(img_path)
+
+        audio_path = os.path.join(directory, f"slide_{idx:02d}.mp3")
+        subprocess.run(
+            [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+             "-f", "lavfi", "-i", f"sine=frequency={200 + 10 * idx}:duration={seconds}",
+             "-q:a", "5", audio_path],
+            check=True,
+        )
+        media.append((idx, img_path, audio_path))
+    return media
+
+
+def run_worker(assembler: str, fixture_path: str, output_path: str) -> None:
+    """Render once and print a JSON line with wall time and peak RSS."""
+    from src.config import RENDER_WORKERS
+    from src.services.assembly import assemble_video, get_render_pool
+
+    with open(fixture_path, "r", encoding="utf-8") as f:
+        media = [tuple(item) for item in json.load(f)]
+
+    start = time.perf_counter()
+    included = assemble_video(media, output_path, assembler=assembler)
+    elapsed = time.perf_counter() - start
+
+    # Reap the pool workers so their peak RSS is included below
+    get_render_pool().shutdown(wait=True)
+
+    # ru_maxrss is in KiB on Linux
+    print(json.dumps({
+        "assembler": assembler,
+        "slides": included,
+        "seconds": elapsed,
+        "workers": RENDER_WORKERS,
+        "python_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "child_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        "output_mb": os.path.getsize(output_path) / 1e6,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=20.0, help="voiceover length per slide")
+    parser.add_argument("--assemblers", default="moviepy-timeline,moviepy,ffmpeg")
+    parser.add_argument("--workers", default=str(os.cpu_count() or 1), help="comma-separated render pool sizes")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--fixture", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+
+    if args.worker:
+        run_worker(args.worker, args.fixture, args.output)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="bench_assembly_")
+    try:
+        print(f"Building fixture: {args.slides} slides x {args.seconds:.0f}s in {work_dir}")
+        media = build_fixture(work_dir, args.slides, args.seconds)
+        fixture_path = os.path.join(work_dir, "fixture.json")
+        with open(fixture_path, "w", encoding="utf-8") as f:
+            json.dump(media, f)
+
+        results = []
+        for assembler in args.assemblers.split(","):
+            pool_sizes = args.workers.split(",")
+            if assembler == "moviepy-timeline":
+                pool_sizes = pool_sizes[:1]
+            for workers in pool_sizes:
+                output_path = os.path.join(work_dir, f"lecture_{assembler}_{workers}.mp4")
+                proc = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_assembly",
+                     "--worker", assembler, "--fixture", fixture_path, "--output", output_path],
+                    cwd=BACKEND_DIR, capture_output=True, text=True,
+                    env={**os.environ, "RENDER_WORKERS": workers},
+                )
+                if proc.returncode != 0:
+                    print(f"{assembler} x{workers} failed:\n{proc.stderr}")
+                    continue
+                results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+        print(f"\n{'assembler':<16} {'workers':>7} {'slides':>6} {'wall (s)':>9} {'python RSS':>11} {'child RSS':>10} {'output':>9}")
+        for r in results:
+            print(
+                f"{r['assembler']:<16} {r['workers']:>7} {r['slides']:>6} {r['seconds']:>9.2f} "
+                f"{r['python_rss_mb']:>8.0f} MB {r['child_rss_mb']:>7.0f} MB {r['output_mb']:>6.1f} MB"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
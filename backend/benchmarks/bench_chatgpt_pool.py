@@ -0,0 +1,100 @@
+"""
+Latency benchmark: bare requests.post per call vs. the shared pooled ChatGPTClient.
+
+Runs a local OpenAI-compatible stub server, so no API key or network is needed.
+`--handshake-ms` adds a delay whenever the stub accepts a NEW connection, to
+emulate the TCP+TLS setup cost paid against the real API.
+
+Usage (from /backend):
+    python -m benchmarks.bench_chatgpt_pool --calls 200 --handshake-ms 30
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_REPLY = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+
+
+def start_stub_server(handshake_ms: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            if handshake_ms:
+                time.sleep(handshake_ms / 1000.0)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(STUB_REPLY)))
+            self.end_headers()
+            self.wfile.write(STUB_REPLY)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(fn, calls: int):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name: str, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<28} mean={statistics.mean(samples):7.2f} ms  p50={statistics.median(samples):7.2f} ms  p95={p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.handshake_ms)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Point the client at the stub before src.config is imported
+    os.environ["OPENAI_API_BASE"] = base
+    os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    import requests
+    from src.LLM.ChatGPT import get_shared_client
+
+    url = f"{base}/chat/completions"
+    payload = {"model": "bench", "messages": [{"role": "user", "content": "hi"}]}
+
+    print(f"Stub server: {base} | calls={args.calls} | simulated handshake={args.handshake_ms} ms\n")
+
+    bare = timed(lambda: requests.post(url, json=payload, timeout=(20, 1000)).json(), args.calls)
+    client = get_shared_client("bench")
+    pooled = timed(lambda: client.chat("system", "hi"), args.calls)
+
+    report("bare requests.post", bare)
+    report("shared pooled client", pooled)
+    print(f"\nSpeed-up (mean): {statistics.mean(bare) / statistics.mean(pooled):.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Login throughput benchmark: bcrypt inline in the async handler vs. offloaded
+to the bounded hashing pool (src/services/auth.py).
+
+Simulates `--concurrency` clients each issuing logins on one event loop,
+alongside a ticker coroutine that should wake every 10 ms. Reports logins/s
+and the worst event-loop stall seen by the ticker: with inline bcrypt every
+login blocks the loop (and so every other request) for the full hash time.
+
+Usage (from /backend):
+    python -m benchmarks.bench_login --logins 64 --concurrency 16 --rounds 12 --workers 4
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+TICK_SECONDS = 0.01
+
+
+async def ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append((time.perf_counter() - start - TICK_SECONDS) * 1000)
+
+
+async def run(verify, logins: int, concurrency: int, password: str, hashed: str):
+    remaining = iter(range(logins))
+    latencies = []
+
+    async def client():
+        for _ in remaining:
+            start = time.perf_counter()
+            assert await verify(password, hashed)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    stop = asyncio.Event()
+    lags: list = []
+    tick = asyncio.ensure_future(ticker(stop, lags))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return elapsed, latencies, lags
+
+
+def report(name: str, logins: int, elapsed: float, latencies: list, lags: list):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{name:<22} {logins / elapsed:7.1f} logins/s  "
+        f"p50={statistics.median(latencies):7.1f} ms  p95={p95:7.1f} ms  "
+        f"max loop stall={max(lags or [0]):7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    # Configure the hashing policy before src.config is imported
+    os.environ["PASSWORD_HASH_ROUNDS"] = str(args.rounds)
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from src.services.auth import pwd_context, verify_password
+
+    password = "correct horse battery staple"
+    hashed = pwd_context.hash(password)
+
+    async def inline_verify(plain: str, stored: str) -> bool:
+        return pwd_context.verify(plain, stored)
+
+    print(f"logins={args.logins} | concurrency={args.concurrency} | rounds={args.rounds} | "
+          f"workers={args.workers} | cpus={os.cpu_count()}\n")
+
+    report("inline (event loop)", args.logins, *asyncio.run(run(inline_verify, args.logins, args.concurrency, password, hashed)))
+    report("hashing pool", args.logins, *asyncio.run(run(verify_password, args.logins, args.concurrency, password, hashed)))
+
+
+if __name__ == "__main__":
+    main()
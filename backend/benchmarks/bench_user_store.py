@@ -0,0 +1,94 @@
+"""
+Signup data-access benchmark: the old flow (three sequential blocking
+queries: username lookup, email lookup, insert) vs. the async repository
+(one combined existence check + insert, awaited).
+
+Runs against a local stand-in (src/services/users.py), so no Supabase
+project is needed. `--rtt-ms` adds a simulated network round trip to every
+query; the old flow pays it with a blocking sleep, as the sync Supabase
+client does inside an async handler.
+
+Usage (from /backend):
+    python -m benchmarks.bench_user_store --signups 200 --concurrency 20 --rtt-ms 30 --backend memory
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+
+def make_repository(backend: str):
+    from src.services.users import MemoryUserRepository, SQLiteUserRepository
+
+    if backend == "sqlite":
+        return SQLiteUserRepository(os.path.join(tempfile.mkdtemp(), "users.sqlite3"))
+    return MemoryUserRepository()
+
+
+def blocking_signup(repo, rtt: float):
+    async def signup(username: str, email: str) -> None:
+        for lookup in (repo.get_by_username(username), repo.get_by_email(email)):
+            time.sleep(rtt)
+            if await lookup:
+                raise RuntimeError("conflict")
+        time.sleep(rtt)
+        await repo.create({"username": username, "email": email, "password_hash": "x"})
+    return signup
+
+
+def async_signup(repo, rtt: float):
+    async def signup(username: str, email: str) -> None:
+        await asyncio.sleep(rtt)
+        if await repo.find_conflict(username, email):
+            raise RuntimeError("conflict")
+        await asyncio.sleep(rtt)
+        await repo.create({"username": username, "email": email, "password_hash": "x"})
+    return signup
+
+
+async def run(signup, signups: int, concurrency: int):
+    remaining = iter(range(signups))
+    latencies = []
+
+    async def client():
+        for i in remaining:
+            start = time.perf_counter()
+            await signup(f"user{i}", f"user{i}@example.com")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def report(name: str, signups: int, elapsed: float, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{name:<32} {signups / elapsed:8.1f} signups/s  p50={statistics.median(latencies):8.1f} ms  p95={p95:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--signups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=30.0)
+    parser.add_argument("--backend", choices=("memory", "sqlite"), default="memory")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    rtt = args.rtt_ms / 1000.0
+
+    print(f"signups={args.signups} | concurrency={args.concurrency} | rtt={args.rtt_ms} ms | backend={args.backend}\n")
+
+    report("blocking, 3 sequential queries", args.signups,
+           *asyncio.run(run(blocking_signup(make_repository(args.backend), rtt), args.signups, args.concurrency)))
+    report("async, combined check + insert", args.signups,
+           *asyncio.run(run(async_signup(make_repository(args.backend), rtt), args.signups, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,28 +3,30 @@ Ampora AI Backend API
 FastAPI server for video generation, authentication, and chat services
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Header
+from fastapi import FastAPI, HTTPException, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 import os
+import time
 import uvicorn
 from datetime import datetime, timedelta
 import jwt
-from passlib.context import CryptContext
 import stripe
-from src.config import OPENAI_API_KEY, GEMINI_API_KEY
+from src.config import OPENAI_API_KEY, GEMINI_API_KEY, MEDIA_CACHE_CONTROL, JOB_SINGLE_FLIGHT, USER_CONTEXT_TTL_SECONDS
+from src.services.jobs import Job, job_manager
+from src.services.events import format_sse
+from src.LLM.cache import get_completion_cache
+from src.services.media import serve_media_file
+from src.services.hls import HLS_MEDIA_TYPES, MASTER_PLAYLIST, hls_dir_for
+from src.services.live import live_dir_for
+from src.services.workspace import Workspace
+from src.services.artifacts import normalize_topic
+from src.services.auth import hash_password, verify_and_update_password, token_cache, user_context_cache
+from src.services.users import UserExistsError, UserRepository, create_user_repository
 from pathlib import Path
 
-# Optional Supabase import
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
-    Client = None
-
 # Initialize FastAPI app
 app = FastAPI(title="Ampora AI API", version="1.0.0")
 
@@ -41,20 +43,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Shared LLM completion cache (None when LLM_CACHE_BACKEND=none)
+completion_cache = get_completion_cache()
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Optional[Client] = None
-
-if SUPABASE_AVAILABLE and SUPABASE_URL and SUPABASE_KEY:
-    try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    except Exception as e:
-        print(f"Warning: Supabase initialization failed: {e}")
-        supabase = None
+# Initialize the users store (Supabase, or a local stand-in via USER_STORE_BACKEND)
+users_repo: Optional[UserRepository] = None
+try:
+    users_repo = create_user_repository()
+except Exception as e:
+    print(f"Warning: User store initialization failed: {e}")
+    users_repo = None
 
 # Initialize Stripe
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
@@ -97,14 +95,6 @@ class VideoRequest(BaseModel):
 
 # ==================== Helper Functions ====================
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
-
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -117,14 +107,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_token(token: str):
-    """Verify JWT token"""
+    """Verify JWT token (verified claims are cached until the token's exp)"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    token_cache.put(token, payload, expires_at=payload.get("exp"))
+    return payload
 
 def get_current_user(authorization: Optional[str] = Header(None)):
     """Dependency to get current user from token"""
@@ -134,6 +128,31 @@ def get_current_user(authorization: Optional[str] = Header(None)):
     payload = verify_token(token)
     return payload
 
+async def get_user_context(current_user: dict = Depends(get_current_user)) -> dict:
+    """
+    Dependency: the caller's profile and subscription state. Looked up in
+    the users table at most once per USER_CONTEXT_TTL_SECONDS per user.
+    """
+    user_id = current_user["sub"]
+    context = user_context_cache.get(user_id)
+    if context is not None:
+        return context
+
+    username = current_user.get("username")
+    context = {"id": user_id, "username": username, "email": f"{username}@example.com" if username else None, "is_active": True}
+    if users_repo and not (TEST_MODE and TEST_MODE_NO_DB and user_id.startswith("test-")):
+        user = await users_repo.get_by_id(user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        context = {
+            "id": user["id"],
+            "username": user["username"],
+            "email": user["email"],
+            "is_active": bool(user.get("is_active")) or user["username"] in TEST_ACCOUNTS,
+        }
+    user_context_cache.put(user_id, context, expires_at=time.time() + USER_CONTEXT_TTL_SECONDS)
+    return context
+
 
 # ==================== Authentication Endpoints ====================
 
@@ -153,18 +172,21 @@ async def login(user_data: UserLogin):
                 }
             }
 
-        if supabase:
-            # Query Supabase for user
-            response = supabase.table("users").select("*").eq("username", user_data.username).execute()
-            
-            if not response.data:
+        if users_repo:
+            user = await users_repo.get_by_username(user_data.username)
+            if not user:
                 raise HTTPException(status_code=401, detail="Invalid username or password")
             
-            user = response.data[0]
-            
-            # Verify password
-            if not verify_password(user_data.password, user["password_hash"]):
+            # Verify password (bcrypt runs on the hashing pool, not the event loop)
+            valid, upgraded_hash = await verify_and_update_password(user_data.password, user["password_hash"])
+            if not valid:
                 raise HTTPException(status_code=401, detail="Invalid username or password")
+            if upgraded_hash:
+                # Stored hash is below the current PASSWORD_HASH_MIN_ROUNDS policy
+                try:
+                    await users_repo.update(user["id"], {"password_hash": upgraded_hash})
+                except Exception as e:
+                    print(f"⚠️ [Auth] Could not upgrade password hash for {user['username']}: {e}")
             
             # Check subscription status
             if not user.get("is_active") and user["username"] not in TEST_ACCOUNTS:
@@ -191,6 +213,9 @@ async def login(user_data: UserLogin):
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
 
 
+SIGNUP_CONFLICTS = {"username": "Username already exists", "email": "Email already registered"}
+
+
 @app.post("/api/auth/signup")
 async def signup(user_data: UserSignup):
     """User signup endpoint with Stripe payment"""
@@ -210,20 +235,16 @@ async def signup(user_data: UserSignup):
             except stripe.error.StripeError as e:
                 raise HTTPException(status_code=400, detail=f"Payment verification failed: {str(e)}")
         
-        if supabase:
-            # Check if user already exists
-            existing = supabase.table("users").select("*").eq("username", user_data.username).execute()
-            if existing.data:
-                raise HTTPException(status_code=400, detail="Username already exists")
-            
-            existing_email = supabase.table("users").select("*").eq("email", user_data.email).execute()
-            if existing_email.data:
-                raise HTTPException(status_code=400, detail="Email already registered")
+        if users_repo:
+            # Check username and email in one query
+            conflict = await users_repo.find_conflict(user_data.username, user_data.email)
+            if conflict:
+                raise HTTPException(status_code=400, detail=SIGNUP_CONFLICTS[conflict])
             
             # Hash password
-            password_hash = get_password_hash(user_data.password)
+            password_hash = await hash_password(user_data.password)
             
-            # Create user in Supabase
+            # Create user
             new_user = {
                 "username": user_data.username,
                 "email": user_data.email,
@@ -233,22 +254,22 @@ async def signup(user_data: UserSignup):
                 "created_at": datetime.utcnow().isoformat()
             }
             
-            result = supabase.table("users").insert(new_user).execute()
+            try:
+                user = await users_repo.create(new_user)
+            except UserExistsError as e:
+                # Lost a race with a concurrent signup for the same name / email
+                raise HTTPException(status_code=400, detail=SIGNUP_CONFLICTS[e.field])
             
-            if result.data:
-                user = result.data[0]
-                token = create_access_token({"sub": user["id"], "username": user["username"]})
-                
-                return {
-                    "token": token,
-                    "user": {
-                        "id": user["id"],
-                        "username": user["username"],
-                        "email": user["email"]
-                    }
+            token = create_access_token({"sub": user["id"], "username": user["username"]})
+            
+            return {
+                "token": token,
+                "user": {
+                    "id": user["id"],
+                    "username": user["username"],
+                    "email": user["email"]
                 }
-            else:
-                raise HTTPException(status_code=500, detail="Failed to create user")
+            }
         else:
             # In test mode without DB, create fake user for test accounts only
             if TEST_MODE and TEST_MODE_NO_DB and user_data.username.lower() in TEST_ACCOUNTS:
@@ -269,11 +290,17 @@ async def signup(user_data: UserSignup):
         raise HTTPException(status_code=500, detail=f"Signup failed: {str(e)}")
 
 
+@app.get("/api/auth/me")
+async def me(user: dict = Depends(get_user_context)):
+    """Current user's profile and subscription state"""
+    return {"user": user}
+
+
 # ==================== Chat Endpoints ====================
 
 @app.post("/api/chat")
 async def chat(message: ChatMessage, current_user: dict = Depends(get_current_user)):
-    """Chat endpoint - processes user messages and generates video"""
+    """Chat endpoint - queues a video generation job and returns its id immediately"""
     try:
         # In pure test mode without AI keys, return a stubbed response so UI works
         if TEST_MODE and (not OPENAI_API_KEY or not GEMINI_API_KEY):
@@ -283,10 +310,7 @@ async def chat(message: ChatMessage, current_user: dict = Depends(get_current_us
                 "topic": message.message
             }
         
-        # Import video generation service
-        from src.services.video import generate_lecture_video
-        
-        # Generate video (this is the expensive $4 operation)
+        # Generate video on the worker pool (this is the expensive $4 operation)
         output_filename = f"generated_video_{current_user['sub']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
         output_dir = "output/videos"
         output_path = os.path.join(output_dir, output_filename)
@@ -294,15 +318,22 @@ async def chat(message: ChatMessage, current_user: dict = Depends(get_current_us
         # Ensure output directory exists
         os.makedirs(output_dir, exist_ok=True)
         
-        # Generate video
-        video_path = generate_lecture_video(message.message, output_path)
-        
-        # Return response with video URL
-        video_url = f"/api/videos/{output_filename}"
-        
+        job = job_manager.submit(
+            owner=current_user["sub"],
+            topic=message.message,
+            fn=lambda job: run_video_job(job, message.message, output_path, output_filename),
+            # Topics already being generated attach to that job instead of paying again; keyed like
+            # the artifact store, so only case/spacing/wrapping punctuation fold ("C#" != "C++")
+            dedup_key=normalize_topic(message.message) if JOB_SINGLE_FLIGHT else None
+        )
         return {
-            "response": f"I've generated a video lecture about '{message.message}'. The video is ready for download!",
-            "video_url": video_url,
+            "response": f"I'm generating a video lecture about '{message.message}'. I'll let you know when it's ready!",
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/api/jobs/{job.id}",
+            "video_url": None,
+            "live_url": job.live_url,
+            "shared": job.leader_id is not None,
             "topic": message.message
         }
         
@@ -312,32 +343,148 @@ async def chat(message: ChatMessage, current_user: dict = Depends(get_current_us
         raise HTTPException(status_code=500, detail=f"Video generation failed: {str(e)}")
 
 
+def run_video_job(job: Job, topic: str, output_path: str, output_filename: str) -> str:
+    """Worker-side body of a generation job. Returns the video URL."""
+    # Import video generation service
+    from src.services.video import generate_lecture_video
+    
+    def on_event(event_type: str, **data) -> None:
+        if event_type == "live_started":
+            # Grows slide by slide while the job runs (see src/services/live.py); artifact
+            # cache hits and the timeline assembler never start one
+            job.publish_live(f"/api/videos/{output_filename}/live/{data['playlist']}")
+        else:
+            job.emit(event_type, **data)
+    
+    video_path = generate_lecture_video(
+        topic,
+        output_path,
+        progress_callback=job.report_progress,
+        event_callback=on_event,
+        workspace=Workspace(job.id),
+        # Every job writes a new timestamped file, so its segments could never be reused
+        incremental=False
+    )
+    if not video_path or not os.path.exists(output_path):
+        raise RuntimeError("Video generation produced no output")
+    
+    if os.path.exists(os.path.join(hls_dir_for(output_path), MASTER_PLAYLIST)):
+        job.hls_url = f"/api/videos/{output_filename}/hls/{MASTER_PLAYLIST}"
+    return f"/api/videos/{output_filename}"
+
+
+# ==================== Job Endpoints ====================
+
+@app.get("/api/jobs")
+async def list_jobs(current_user: dict = Depends(get_current_user)):
+    """List the current user's generation jobs, newest first"""
+    return {"jobs": [job.to_dict() for job in job_manager.list_for_owner(current_user["sub"])]}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Report status, progress and (once finished) the video URL of a job"""
+    job = job_manager.get(job_id)
+    if not job or job.owner != current_user["sub"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Server-Sent Events stream of a job's progress (objectives, plan, per-slide
+    image/audio/segment, encode percent, completion). Replays past events, or
+    those after Last-Event-ID on reconnect, and closes once the job finishes.
+    """
+    job = job_manager.get(job_id)
+    if not job or job.owner != current_user["sub"]:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    
+    async def frames():
+        async for event in job_manager.bus.subscribe(job.id, after=after):
+            yield format_sse(event)
+    
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # ==================== Video Endpoints ====================
 
-@app.get("/api/videos/{filename}")
-async def get_video(filename: str):
-    """Serve generated video files"""
+@app.api_route("/api/videos/{filename}", methods=["GET", "HEAD"])
+async def get_video(filename: str, request: Request):
+    """Serve generated video files (Range, ETag and conditional GET aware)"""
     video_path = os.path.join("output/videos", filename)
     
-    if not os.path.exists(video_path):
+    if not os.path.isfile(video_path):
         raise HTTPException(status_code=404, detail="Video not found")
     
-    return FileResponse(
+    return serve_media_file(
+        request,
         video_path,
         media_type="video/mp4",
-        filename=filename
+        filename=filename,
+        offload_uri=f"videos/{filename}"
+    )
+
+
+def _serve_video_asset(request: Request, asset_root: str, asset_path: str, cache_control: str = MEDIA_CACHE_CONTROL):
+    """Serve an .m3u8 / .ts file from under `asset_root`, refusing anything outside it"""
+    asset_root = os.path.realpath(asset_root)
+    path = os.path.realpath(os.path.join(asset_root, asset_path))
+    media_type = HLS_MEDIA_TYPES.get(os.path.splitext(path)[1])
+    
+    # Stay inside this video's asset directory
+    if not media_type or not path.startswith(asset_root + os.sep) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="HLS asset not found")
+    
+    return serve_media_file(
+        request,
+        path,
+        media_type=media_type,
+        cache_control=cache_control,
+        offload_uri=f"videos/{os.path.relpath(path, os.path.realpath('output/videos'))}"
     )
 
 
-@app.get("/artifacts/{filename}")
-async def get_artifact(filename: str):
+@app.api_route("/api/videos/{filename}/hls/{asset_path:path}", methods=["GET", "HEAD"])
+async def get_video_hls(filename: str, asset_path: str, request: Request):
+    """Serve the HLS ladder of a generated video (master.m3u8, renditions, .ts segments)"""
+    return _serve_video_asset(request, hls_dir_for(os.path.join("output/videos", filename)), asset_path)
+
+
+@app.api_route("/api/videos/{filename}/live/{asset_path:path}", methods=["GET", "HEAD"])
+async def get_video_live(filename: str, asset_path: str, request: Request):
+    """Serve the growing playlist of a video that is still rendering (index.m3u8, .ts chunks)"""
+    # The playlist changes as slides finish; chunks never do once listed
+    cache_control = "no-cache" if asset_path.endswith(".m3u8") else MEDIA_CACHE_CONTROL
+    return _serve_video_asset(request, live_dir_for(os.path.join("output/videos", filename)), asset_path, cache_control)
+
+
+@app.api_route("/artifacts/{filename}", methods=["GET", "HEAD"])
+async def get_artifact(filename: str, request: Request):
     """Serve static artifacts like demo videos and logos"""
     artifact_path = ARTIFACTS_DIR / filename
-    if not artifact_path.exists():
+    if not artifact_path.is_file():
         raise HTTPException(status_code=404, detail="Artifact not found")
     # Infer media type
     media_type = "video/mp4" if filename.lower().endswith(".mp4") else "image/png"
-    return FileResponse(artifact_path, media_type=media_type, filename=filename)
+    return serve_media_file(
+        request,
+        str(artifact_path),
+        media_type=media_type,
+        filename=filename,
+        offload_uri=f"artifacts/{filename}"
+    )
 
 
 # ==================== Stripe Endpoints ====================
@@ -392,10 +539,11 @@ async def health():
     """Detailed health check"""
     return {
         "status": "healthy",
-        "database": "connected" if supabase else ("test-mode-no-db" if TEST_MODE and TEST_MODE_NO_DB else "not configured"),
+        "database": "connected" if users_repo else ("test-mode-no-db" if TEST_MODE and TEST_MODE_NO_DB else "not configured"),
         "stripe": "configured" if STRIPE_SECRET_KEY else ("mock" if TEST_MODE else "not configured"),
         "test_mode": TEST_MODE,
-        "test_mode_no_db": TEST_MODE_NO_DB
+        "test_mode_no_db": TEST_MODE_NO_DB,
+        "llm_cache": completion_cache.stats() if completion_cache else "disabled"
     }
 
 
@@ -1,33 +1,123 @@
 import os
+import json
+import threading
+import contextlib
+import asyncio
+import weakref
+import httpx
 import requests
-from src.config import OPENAI_API_KEY, OPENAI_API_BASE, MODEL_NAME
+from requests.adapters import HTTPAdapter
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+from src.config import (
+    OPENAI_API_KEY,
+    OPENAI_API_BASE,
+    MODEL_NAME,
+    OPENAI_POOL_SIZE,
+    OPENAI_HTTP2,
+    OPENAI_ASYNC_MAX_CONNECTIONS,
+    LLM_READ_TIMEOUT,
+    LLM_HEDGE_ENABLED,
+)
+from src.LLM.cache import CompletionCache, get_completion_cache
+from src.LLM.budget import get_budget
+from src.LLM.retry import (
+    DEFAULT_POLICY,
+    ProviderHTTPError,
+    RetryPolicy,
+    call_with_retry,
+    acall_with_retry,
+    iter_with_retry,
+    aiter_with_retry,
+    hedged_call,
+    ahedged_call,
+    track_latency,
+    atrack_latency,
+    latency_tracker,
+)
 
+CONNECT_TIMEOUT = 20
+READ_TIMEOUT = LLM_READ_TIMEOUT
 
-class ChatGPTClient:
+
+# ============================================================
+# SHARED CONNECTION POOL
+# ============================================================
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (required by httpx for http2=True)
+        return True
+    except ImportError:
+        return False
+
+
+def _build_session(pool_size: int = OPENAI_POOL_SIZE, http2: bool = OPENAI_HTTP2):
     """
-    Wrapper for OpenAI-style Chat API requests.
+    Build a keep-alive session with a connection pool.
+    Uses httpx with HTTP/2 when requested and the `h2` extra is installed,
+    otherwise a pooled requests.Session (HTTP/1.1 keep-alive).
     """
+    if http2:
+        if _h2_available():
+            print(f"[ChatGPT] Using httpx HTTP/2 pool (size={pool_size})")
+            return httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            )
+        print("⚠️ OPENAI_HTTP2 requested but httpx[http2] is not installed. Falling back to HTTP/1.1.")
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_shared_session():
+    """Process-wide pooled session reused by every ChatGPTClient."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
 
-    def __init__(self, model: str | None = None):
+# ============================================================
+# CLIENT
+# ============================================================
+
+class _ChatGPTBase:
+    """
+    Configuration and request building shared by the sync and async clients.
+    """
+
+    def __init__(self, model: str | None = None, cache: Optional[CompletionCache] = None):
         self.api_key = OPENAI_API_KEY or os.getenv("OPENAI_API_KEY")
         self.api_base = OPENAI_API_BASE or "https://api.openai.com/v1"
         self.model = model or MODEL_NAME or "gpt-5"
+        self.temperature: Optional[float] = None  # provider default; part of the cache key
+        self.cache = cache or get_completion_cache()
+        # Concurrent OpenAI calls (chat + TTS) are capped process-wide
+        self.budget = get_budget("openai")
 
         if not self.api_key:
             raise RuntimeError("Missing OPENAI_API_KEY — please set it in .env")
-        
+
         print(f"[DEBUG] Using model={self.model} | base={self.api_base}")
 
-    def chat(self, system_prompt: str, user_prompt: str) -> str:
-        """
-        Send a prompt to the model and return text output.
-        """
-        url = f"{self.api_base}/chat/completions"
-        headers = {
+    def _headers(self) -> dict:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
-        payload = {
+
+    def _payload(self, system_prompt: str, user_prompt: str) -> dict:
+        return {
             "model": self.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
@@ -35,15 +125,344 @@ class ChatGPTClient:
             ],
         }
 
-        response = requests.post(url, headers=headers, json=payload, timeout=(20, 1000))
+    def _cache_key(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return CompletionCache.make_key(self.model, system_prompt, user_prompt, self.temperature)
+
+    def _cache_get(self, key: Optional[str]) -> Optional[str]:
+        return self.cache.get(key) if key else None
 
+    def _cache_set(self, key: Optional[str], value: str) -> None:
+        if key and value:
+            self.cache.set(key, value)
+
+    def _hedge_delay(self, hedge_key: Optional[str]) -> Optional[float]:
+        """p95-based hedge delay for this model + stage, None when hedging is off or not warmed up."""
+        if not (hedge_key and LLM_HEDGE_ENABLED):
+            return None
+        return latency_tracker.hedge_delay(f"{self.model}/{hedge_key}")
+
+    @staticmethod
+    def _read_timeout(timeout: Optional[float]) -> float:
+        """Per-attempt read timeout, capped by what is left of the call's deadline."""
+        return READ_TIMEOUT if timeout is None else min(READ_TIMEOUT, timeout)
+
+    @staticmethod
+    def _raise_for_status(response) -> None:
         if response.status_code != 200:
-            raise RuntimeError(
-                f"OpenAI API error {response.status_code}: {response.text}"
+            retry_after = response.headers.get("retry-after")
+            raise ProviderHTTPError(
+                f"OpenAI API error {response.status_code}: {response.text}",
+                status_code=response.status_code,
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
             )
 
+    @classmethod
+    def _extract_content(cls, response) -> str:
+        cls._raise_for_status(response)
+
         data = response.json()
         try:
             return data["choices"][0]["message"]["content"].strip()
         except Exception as e:
-            raise RuntimeError(f"Unexpected API response: {data}") from e
\ No newline at end of file
+            raise RuntimeError(f"Unexpected API response: {data}") from e
+
+    @staticmethod
+    def _stream_deltas(line: str) -> Optional[List[str]]:
+        """
+        Parse one server-sent-events line of a streamed completion.
+        Returns the text deltas it carries, or None once the stream is done.
+        """
+        # One "data: {...}" line per chunk, "data: [DONE]" at the end
+        if not line or not line.startswith("data:"):
+            return []
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return None
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError as e:
+            raise RuntimeError(f"Unexpected stream chunk: {data}") from e
+        deltas = []
+        for choice in chunk.get("choices", []):
+            delta = (choice.get("delta") or {}).get("content")
+            if delta:
+                deltas.append(delta)
+        return deltas
+
+
+class ChatGPTClient(_ChatGPTBase):
+    """
+    Wrapper for OpenAI-style Chat API requests.
+    """
+
+    def __init__(self, model: str | None = None, session=None, cache: Optional[CompletionCache] = None):
+        super().__init__(model, cache)
+        self.session = session or get_shared_session()
+
+    def chat(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        policy: RetryPolicy = DEFAULT_POLICY,
+        hedge_key: Optional[str] = None
+    ) -> str:
+        """
+        Send a prompt to the model and return text output.
+
+        Retryable failures (transport errors, 429/5xx) are retried under
+        `policy` within its deadline. With `hedge_key` (a stage name) and
+        LLM_HEDGE_ENABLED, a duplicate request is sent once the call outlives
+        that stage's p95 latency, and answers if the first attempt fails
+        (see hedged_call).
+        """
+        key = self._cache_key(system_prompt, user_prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        url = f"{self.api_base}/chat/completions"
+        headers = self._headers()
+        payload = self._payload(system_prompt, user_prompt)
+
+        def send(timeout: Optional[float]) -> str:
+            with self.budget.slot():
+                if isinstance(self.session, requests.Session):
+                    response = self.session.post(
+                        url, headers=headers, json=payload,
+                        timeout=(CONNECT_TIMEOUT, self._read_timeout(timeout))
+                    )
+                else:
+                    response = self.session.post(
+                        url, headers=headers, json=payload,
+                        timeout=httpx.Timeout(self._read_timeout(timeout), connect=CONNECT_TIMEOUT)
+                    )
+            return self._extract_content(response)
+
+        def attempt(timeout: Optional[float]) -> str:
+            if not hedge_key:
+                return send(timeout)
+            return hedged_call(
+                lambda: track_latency(f"{self.model}/{hedge_key}", lambda: send(timeout)),
+                self._hedge_delay(hedge_key),
+                label=f"{self.model} {hedge_key}"
+            )
+
+        content = call_with_retry(attempt, policy, label=f"OpenAI {self.model}")
+        self._cache_set(key, content)
+        return content
+
+    def chat_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        policy: RetryPolicy = DEFAULT_POLICY,
+        complete: Optional[Callable[[str], bool]] = None
+    ) -> Iterator[str]:
+        """
+        Stream the completion, yielding text deltas as the model writes them.
+        Opening the stream is retried under `policy` until the first delta arrives.
+        The full text is cached only if the stream is read to the end and
+        `complete(text)` (when given) accepts it, so a cut-off reply is never replayed.
+        """
+        key = self._cache_key(system_prompt, user_prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        url = f"{self.api_base}/chat/completions"
+        payload = self._payload(system_prompt, user_prompt)
+        payload["stream"] = True
+
+        def deltas(timeout: Optional[float]) -> Iterator[str]:
+            with self.budget.slot(), self._open_stream(url, payload, timeout) as lines:
+                for line in lines:
+                    chunk = self._stream_deltas(line)
+                    if chunk is None:
+                        break
+                    yield from chunk
+
+        parts = []
+        for delta in iter_with_retry(deltas, policy, label=f"OpenAI {self.model} stream"):
+            parts.append(delta)
+            yield delta
+
+        text = "".join(parts).strip()
+        if complete is None or complete(text):
+            self._cache_set(key, text)
+        else:
+            print(f"⚠️ [ChatGPT] {self.model} stream ended incomplete; not caching it.")
+
+    @contextlib.contextmanager
+    def _open_stream(self, url: str, payload: dict, timeout: Optional[float] = None):
+        """Open a streaming POST on either session type and yield its text lines."""
+        if isinstance(self.session, requests.Session):
+            with self.session.post(
+                url, headers=self._headers(), json=payload, stream=True,
+                timeout=(CONNECT_TIMEOUT, self._read_timeout(timeout))
+            ) as response:
+                self._raise_for_status(response)
+                yield (line.decode("utf-8") for line in response.iter_lines())
+        else:
+            with self.session.stream(
+                "POST", url, headers=self._headers(), json=payload,
+                timeout=httpx.Timeout(self._read_timeout(timeout), connect=CONNECT_TIMEOUT)
+            ) as response:
+                if response.status_code != 200:
+                    response.read()
+                self._raise_for_status(response)
+                yield response.iter_lines()
+
+
+class AsyncChatGPTClient(_ChatGPTBase):
+    """
+    asyncio counterpart of ChatGPTClient (same `chat` / `chat_stream` surface).
+    One event loop can keep hundreds of requests in flight on a single
+    pooled httpx.AsyncClient without a thread per call.
+    """
+
+    def __init__(
+        self,
+        model: str | None = None,
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[CompletionCache] = None
+    ):
+        super().__init__(model, cache)
+        self.client = client or httpx.AsyncClient(
+            http2=OPENAI_HTTP2 and _h2_available(),
+            limits=httpx.Limits(
+                max_connections=OPENAI_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_POOL_SIZE,
+            ),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+
+    async def chat(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        policy: RetryPolicy = DEFAULT_POLICY,
+        hedge_key: Optional[str] = None
+    ) -> str:
+        """
+        Send a prompt to the model and return text output (retries and
+        hedging as in ChatGPTClient.chat; the losing hedge is cancelled).
+        """
+        key = self._cache_key(system_prompt, user_prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        url = f"{self.api_base}/chat/completions"
+        headers = self._headers()
+        payload = self._payload(system_prompt, user_prompt)
+
+        async def send(timeout: Optional[float]) -> str:
+            async with self.budget.aslot():
+                response = await self.client.post(
+                    url, headers=headers, json=payload,
+                    timeout=httpx.Timeout(self._read_timeout(timeout), connect=CONNECT_TIMEOUT)
+                )
+            return self._extract_content(response)
+
+        async def attempt(timeout: Optional[float]) -> str:
+            if not hedge_key:
+                return await send(timeout)
+            return await ahedged_call(
+                lambda: atrack_latency(f"{self.model}/{hedge_key}", lambda: send(timeout)),
+                self._hedge_delay(hedge_key),
+                label=f"{self.model} {hedge_key}"
+            )
+
+        content = await acall_with_retry(attempt, policy, label=f"OpenAI {self.model}")
+        self._cache_set(key, content)
+        return content
+
+    async def chat_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        policy: RetryPolicy = DEFAULT_POLICY,
+        complete: Optional[Callable[[str], bool]] = None
+    ) -> AsyncIterator[str]:
+        """Async counterpart of ChatGPTClient.chat_stream."""
+        key = self._cache_key(system_prompt, user_prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        url = f"{self.api_base}/chat/completions"
+        payload = self._payload(system_prompt, user_prompt)
+        payload["stream"] = True
+
+        async def deltas(timeout: Optional[float]) -> AsyncIterator[str]:
+            async with self.budget.aslot(), self.client.stream(
+                "POST", url, headers=self._headers(), json=payload,
+                timeout=httpx.Timeout(self._read_timeout(timeout), connect=CONNECT_TIMEOUT)
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                self._raise_for_status(response)
+                async for line in response.aiter_lines():
+                    chunk = self._stream_deltas(line)
+                    if chunk is None:
+                        break
+                    for delta in chunk:
+                        yield delta
+
+        parts = []
+        async for delta in aiter_with_retry(deltas, policy, label=f"OpenAI {self.model} stream"):
+            parts.append(delta)
+            yield delta
+
+        text = "".join(parts).strip()
+        if complete is None or complete(text):
+            self._cache_set(key, text)
+        else:
+            print(f"⚠️ [ChatGPT] {self.model} stream ended incomplete; not caching it.")
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# ============================================================
+# SHARED CLIENTS
+# ============================================================
+
+_clients: Dict[str, ChatGPTClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_shared_client(model: Optional[str] = None) -> ChatGPTClient:
+    """
+    Process-wide ChatGPTClient (one per model) on the shared pooled session,
+    so lecture stages reuse warm keep-alive connections.
+    """
+    key = model or MODEL_NAME or "gpt-5"
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ChatGPTClient(model=key)
+            _clients[key] = client
+        return client
+
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncChatGPTClient]]" = weakref.WeakKeyDictionary()
+
+
+def get_shared_async_client(model: Optional[str] = None) -> AsyncChatGPTClient:
+    """
+    AsyncChatGPTClient shared by everything on the running event loop
+    (httpx async pools are bound to the loop that created them).
+    """
+    key = model or MODEL_NAME or "gpt-5"
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(key)
+    if client is None:
+        client = AsyncChatGPTClient(model=key)
+        clients[key] = client
+    return client
@@ -1,58 +1,130 @@
 import os
 from google import genai
 from google.genai import types
+from typing import Optional
 from src.config import GEMINI_API_KEY, GEMINI_MODEL_NAME
+from src.LLM.cache import CompletionCache, get_completion_cache
+from src.LLM.ratelimit import get_limiter
+from src.LLM.budget import get_budget
 
-class GeminiClient:
+class _GeminiBase:
     """
-    Wrapper for Google Gemini API requests.
-    Designed to be a drop-in replacement for the ChatGPTClient.
+    Configuration and request/response handling shared by the sync and async clients.
     """
 
-    def __init__(self, model: str | None = None):
+    def __init__(self, model: str | None = None, cache: Optional[CompletionCache] = None):
         self.api_key = GEMINI_API_KEY or os.getenv("GEMINI_API_KEY")
         # Default to a text model, but can be overridden for image gen
-        self.model = model or "gemini-3-pro-image-preview" 
+        self.model = model or "gemini-3-pro-image-preview"
+        self.temperature = 0.7
+        self.cache = cache or get_completion_cache()
 
         if not self.api_key:
             raise RuntimeError("Missing GEMINI_API_KEY — please set it in .env")
 
         self.client = genai.Client(api_key=self.api_key)
+        # Image calls share one limiter per model across every job in the process
+        self.image_limiter = get_limiter("gemini", self.model)
+        # Every Gemini call (text and image) holds a slot of the process-wide budget
+        self.budget = get_budget("gemini")
         print(f"[DEBUG] Using Gemini model={self.model}")
 
+    # -----------------------------------------------------------
+    # REQUEST / RESPONSE HELPERS
+    # -----------------------------------------------------------
+
+    def _cache_key(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return CompletionCache.make_key(self.model, system_prompt, user_prompt, self.temperature)
+
+    def _is_imagen(self) -> bool:
+        return "imagen" in self.model.lower()
+
+    def _chat_request(self, system_prompt: str, user_prompt: str) -> dict:
+        return {
+            "contents": [{
+                "role": "user",
+                "parts": [{"text": user_prompt}]
+            }],
+            "config": types.GenerateContentConfig(
+                system_instruction=system_prompt,
+                temperature=self.temperature,
+            )
+        }
+
+    @staticmethod
+    def _imagen_config():
+        return types.GenerateImagesConfig(
+            number_of_images=1,
+            aspect_ratio="16:9",  # Best for slides
+            include_rai_reasoning=True
+        )
+
+    @staticmethod
+    def _extract_text(response) -> str:
+        # Prefer the SDK's helper
+        if response.text:
+            return response.text.strip()
+
+        # Fallback extraction
+        if response.candidates:
+            parts = response.candidates[0].content.parts
+            for p in parts:
+                if hasattr(p, "text"):
+                    return p.text.strip()
+
+        return ""
+
+    @staticmethod
+    def _extract_imagen_bytes(response) -> bytes:
+        if response.generated_images:
+            return response.generated_images[0].image.image_bytes
+        else:
+            raise RuntimeError("Imagen returned no images.")
+
+    @staticmethod
+    def _extract_inline_image(response) -> bytes:
+        # Extract inline image data from the response parts
+        if response.candidates and response.candidates[0].content.parts:
+            for part in response.candidates[0].content.parts:
+                if part.inline_data:
+                    return part.inline_data.data  # This is the raw bytes
+
+        raise RuntimeError("Gemini response contained no inline image data.")
+
+
+class GeminiClient(_GeminiBase):
+    """
+    Wrapper for Google Gemini API requests.
+    Designed to be a drop-in replacement for the ChatGPTClient.
+    """
+
     def chat(self, system_prompt: str, user_prompt: str) -> str:
         """
         Send a prompt to the model and return text output.
         """
+        key = self._cache_key(system_prompt, user_prompt)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
         try:
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[{
-                    "role": "user",
-                    "parts": [{"text": user_prompt}]
-                }],
-                config=types.GenerateContentConfig(
-                    system_instruction=system_prompt,
-                    temperature=0.7,
+            with self.budget.slot():
+                response = self.client.models.generate_content(
+                    model=self.model,
+                    **self._chat_request(system_prompt, user_prompt)
                 )
-            )
-
-            # Prefer the SDK's helper
-            if response.text:
-                return response.text.strip()
-
-            # Fallback extraction
-            if response.candidates:
-                parts = response.candidates[0].content.parts
-                for p in parts:
-                    if hasattr(p, "text"):
-                        return p.text.strip()
-
-            return ""
+            text = self._extract_text(response)
 
         except Exception as e:
             raise RuntimeError(f"Gemini API error: {e}")
 
+        if key and text:
+            self.cache.set(key, text)
+        return text
+
     def generate_image(self, prompt: str) -> bytes:
         """
         Generate an image using the Google Gen AI SDK.
@@ -61,45 +133,99 @@ class GeminiClient:
         print(f"[DEBUG] Generating image with model: {self.model}...")
 
         try:
-            # -------------------------------------------------------
-            # CASE 1: IMAGEN MODELS (e.g., 'imagen-3.0-generate-001')
-            # -------------------------------------------------------
-            if "imagen" in self.model.lower():
-                response = self.client.models.generate_images(
-                    model=self.model,
-                    prompt=prompt,
-                    config=types.GenerateImagesConfig(
-                        number_of_images=1,
-                        aspect_ratio="16:9",  # Best for slides
-                        include_rai_reasoning=True
-                    )
-                )
-                if response.generated_images:
-                    return response.generated_images[0].image.image_bytes
-                else:
-                    raise RuntimeError("Imagen returned no images.")
-
-            # -------------------------------------------------------
-            # CASE 2: GEMINI MODELS (e.g., 'gemini-3-pro-image-preview')
-            # -------------------------------------------------------
-            else:
-                # Gemini models generate images via generate_content with specific prompting
-                response = self.client.models.generate_content(
+            return self._generate_image(prompt)
+        except Exception as e:
+            raise RuntimeError(f"Gemini Image Generation failed: {e}")
+
+    def _generate_image(self, prompt: str) -> bytes:
+        # The budget slot is taken per attempt, after rate-limit admission (see AdaptiveLimiter.call)
+        # -------------------------------------------------------
+        # CASE 1: IMAGEN MODELS (e.g., 'imagen-3.0-generate-001')
+        # -------------------------------------------------------
+        if self._is_imagen():
+            response = self.image_limiter.call(
+                self.client.models.generate_images,
+                slot=self.budget.slot,
+                model=self.model,
+                prompt=prompt,
+                config=self._imagen_config()
+            )
+            return self._extract_imagen_bytes(response)
+
+        # -------------------------------------------------------
+        # CASE 2: GEMINI MODELS (e.g., 'gemini-3-pro-image-preview')
+        # -------------------------------------------------------
+        else:
+            # Gemini models generate images via generate_content with specific prompting
+            response = self.image_limiter.call(
+                self.client.models.generate_content,
+                slot=self.budget.slot,
+                model=self.model,
+                contents=prompt
+            )
+            return self._extract_inline_image(response)
+
+
+class AsyncGeminiClient(_GeminiBase):
+    """
+    asyncio counterpart of GeminiClient (same `chat` / `generate_image` surface),
+    backed by the SDK's native async API (`client.aio`).
+    """
+
+    async def chat(self, system_prompt: str, user_prompt: str) -> str:
+        """
+        Send a prompt to the model and return text output.
+        """
+        key = self._cache_key(system_prompt, user_prompt)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        try:
+            async with self.budget.aslot():
+                response = await self.client.aio.models.generate_content(
                     model=self.model,
-                    contents=prompt
+                    **self._chat_request(system_prompt, user_prompt)
                 )
-                
-                # Extract inline image data from the response parts
-                if response.candidates and response.candidates[0].content.parts:
-                    for part in response.candidates[0].content.parts:
-                        if part.inline_data:
-                            return part.inline_data.data  # This is the raw bytes
-                
-                raise RuntimeError("Gemini response contained no inline image data.")
+            text = self._extract_text(response)
+
+        except Exception as e:
+            raise RuntimeError(f"Gemini API error: {e}")
+
+        if key and text:
+            self.cache.set(key, text)
+        return text
+
+    async def generate_image(self, prompt: str) -> bytes:
+        """
+        Generate an image without blocking the event loop.
+        """
+        print(f"[DEBUG] Generating image with model: {self.model}...")
 
+        try:
+            return await self._generate_image(prompt)
         except Exception as e:
             raise RuntimeError(f"Gemini Image Generation failed: {e}")
 
+    async def _generate_image(self, prompt: str) -> bytes:
+        if self._is_imagen():
+            response = await self.image_limiter.acall(
+                self.client.aio.models.generate_images,
+                slot=self.budget.aslot,
+                model=self.model,
+                prompt=prompt,
+                config=self._imagen_config()
+            )
+            return self._extract_imagen_bytes(response)
+        else:
+            response = await self.image_limiter.acall(
+                self.client.aio.models.generate_content,
+                slot=self.budget.aslot,
+                model=self.model,
+                contents=prompt
+            )
+            return self._extract_inline_image(response)
 
 if __name__ == "__main__":
     try:
@@ -111,4 +237,4 @@ if __name__ == "__main__":
         )
         print("Response:", reply)
     except Exception as err:
-        print("Error:", err)
\ No newline at end of file
+        print("Error:", err)
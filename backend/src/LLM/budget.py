@@ -0,0 +1,225 @@
+import os
+import time
+import asyncio
+import itertools
+import threading
+import contextlib
+import contextvars
+from typing import Dict, Iterator, AsyncIterator, List, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: cross-process slots are unavailable
+    FCNTL_AVAILABLE = False
+
+from src.config import PROVIDER_BUDGETS, PROVIDER_BUDGET_DEFAULT, PROVIDER_BUDGET_LOCK_DIR
+
+# How often waiters re-check for a cross-process slot or (async) their turn
+POLL_SECONDS = 0.05
+
+DEFAULT_JOB = "-"
+
+# Job on whose behalf the current thread / task is calling providers
+_current_job: contextvars.ContextVar[str] = contextvars.ContextVar("provider_budget_job", default=DEFAULT_JOB)
+
+
+def current_job() -> str:
+    return _current_job.get()
+
+
+def bind_job(job_id: Optional[str]) -> None:
+    """
+    Attribute this thread's (or task's) provider calls to `job_id`. Used as
+    a ThreadPoolExecutor initializer so a job's worker pools share its budget.
+    """
+    _current_job.set(job_id or DEFAULT_JOB)
+
+
+# ============================================================
+# CROSS-PROCESS SLOTS (flock on N lock files)
+# ============================================================
+
+class _FileSlots:
+    """
+    A counting semaphore shared by every process on the host: `limit` lock
+    files, each held with a non-blocking exclusive flock. The kernel drops
+    the lock if the holder dies, so crashed workers never leak slots.
+    """
+
+    def __init__(self, lock_dir: str, name: str, limit: int):
+        os.makedirs(lock_dir, exist_ok=True)
+        self.paths = [os.path.join(lock_dir, f"{name}.{i}.lock") for i in range(limit)]
+
+    def try_acquire(self) -> Optional[int]:
+        for path in self.paths:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    @staticmethod
+    def release(fd: int) -> None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+# ============================================================
+# PROVIDER BUDGET (FAIR SHARE BETWEEN JOBS)
+# ============================================================
+
+class ProviderBudget:
+    """
+    Caps concurrent calls to one provider across every job in the process
+    (and, with a lock directory, across processes on the host).
+
+    When the budget is full, the next free slot goes to the waiting job
+    with the fewest calls in flight (oldest waiter on ties), so a job that
+    fans out 20 slides cannot starve one that just started: under load
+    each active job converges on an equal share.
+    """
+
+    def __init__(self, name: str, limit: int, lock_dir: Optional[str] = PROVIDER_BUDGET_LOCK_DIR):
+        self.name = name
+        self.limit = max(1, limit)
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+        self._waiting: Dict[str, List[int]] = {}  # job -> FIFO of waiting tickets
+        self._in_flight: Dict[str, int] = {}
+        self._total = 0
+
+        self._file_slots = None
+        if lock_dir:
+            if FCNTL_AVAILABLE:
+                self._file_slots = _FileSlots(lock_dir, name, self.limit)
+            else:
+                print(f"⚠️ [Budget] {name}: cross-process slots need fcntl; using a process-local budget.")
+
+    # --------------------------------------------------------
+    # FAIR-SHARE ADMISSION (process-local)
+    # --------------------------------------------------------
+
+    def _my_turn(self, job: str, ticket: int) -> bool:
+        """Called with the lock held."""
+        if self._total >= self.limit or self._waiting[job][0] != ticket:
+            return False
+        best = min(
+            self._waiting,
+            key=lambda j: (self._in_flight.get(j, 0), self._waiting[j][0])
+        )
+        return best == job
+
+    def _enqueue(self, job: str) -> int:
+        ticket = next(self._tickets)
+        self._waiting.setdefault(job, []).append(ticket)
+        return ticket
+
+    def _admit(self, job: str, ticket: int) -> None:
+        self._dequeue(job, ticket)
+        self._in_flight[job] = self._in_flight.get(job, 0) + 1
+        self._total += 1
+
+    def _dequeue(self, job: str, ticket: int) -> None:
+        queue = self._waiting[job]
+        queue.remove(ticket)
+        if not queue:
+            del self._waiting[job]
+        self._cond.notify_all()
+
+    def _leave(self, job: str) -> None:
+        with self._cond:
+            self._in_flight[job] -= 1
+            if not self._in_flight[job]:
+                del self._in_flight[job]
+            self._total -= 1
+            self._cond.notify_all()
+
+    # --------------------------------------------------------
+    # SLOTS
+    # --------------------------------------------------------
+
+    @contextlib.contextmanager
+    def slot(self, job: Optional[str] = None) -> Iterator[None]:
+        """Hold one of the provider's call slots for the duration of the block."""
+        job = job or current_job()
+        with self._cond:
+            ticket = self._enqueue(job)
+            try:
+                while not self._my_turn(job, ticket):
+                    self._cond.wait()
+            except BaseException:
+                self._dequeue(job, ticket)
+                raise
+            self._admit(job, ticket)
+
+        fd = None
+        try:
+            if self._file_slots:
+                while (fd := self._file_slots.try_acquire()) is None:
+                    time.sleep(POLL_SECONDS)
+            yield
+        finally:
+            if fd is not None:
+                self._file_slots.release(fd)
+            self._leave(job)
+
+    @contextlib.asynccontextmanager
+    async def aslot(self, job: Optional[str] = None) -> AsyncIterator[None]:
+        """asyncio counterpart of `slot` (polls instead of blocking the loop)."""
+        job = job or current_job()
+        with self._cond:
+            ticket = self._enqueue(job)
+        try:
+            while True:
+                with self._cond:
+                    if self._my_turn(job, ticket):
+                        self._admit(job, ticket)
+                        break
+                await asyncio.sleep(POLL_SECONDS)
+        except BaseException:
+            with self._cond:
+                self._dequeue(job, ticket)
+            raise
+
+        fd = None
+        try:
+            if self._file_slots:
+                while (fd := self._file_slots.try_acquire()) is None:
+                    await asyncio.sleep(POLL_SECONDS)
+            yield
+        finally:
+            if fd is not None:
+                self._file_slots.release(fd)
+            self._leave(job)
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                "name": self.name,
+                "limit": self.limit,
+                "in_flight": dict(self._in_flight),
+                "waiting": {job: len(tickets) for job, tickets in self._waiting.items()},
+            }
+
+
+# ============================================================
+# PROCESS-WIDE REGISTRY
+# ============================================================
+
+_budgets: Dict[str, ProviderBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_budget(provider: str) -> ProviderBudget:
+    """The shared budget for `provider` ("gemini", "openai", ...), sized from PROVIDER_BUDGETS."""
+    with _budgets_lock:
+        budget = _budgets.get(provider)
+        if budget is None:
+            limit = PROVIDER_BUDGETS.get(provider, PROVIDER_BUDGET_DEFAULT)
+            budget = _budgets[provider] = ProviderBudget(provider, limit)
+        return budget
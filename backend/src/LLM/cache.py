@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import contextlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from src.config import (
+    LLM_CACHE_BACKEND,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL_SECONDS,
+)
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+class MemoryCacheBackend:
+    """
+    In-process LRU with optional TTL. Evicts the least recently used entry
+    once `max_entries` is exceeded.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl_seconds: float = LLM_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self.ttl_seconds and time.time() - created > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk cache shared by every process on the host. Entries expire after
+    `ttl_seconds`; past `max_entries` the least recently accessed are dropped.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed)")
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call keeps this thread- and process-safe:
+        # the block runs as one transaction and the connection is closed afterwards
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl_seconds and now - created > self.ttl_seconds:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE completions SET accessed = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            if self.ttl_seconds:
+                conn.execute("DELETE FROM completions WHERE created < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM completions WHERE key IN ("
+                " SELECT key FROM completions ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM completions")
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+
+# ============================================================
+# CACHE FRONT-END
+# ============================================================
+
+class CompletionCache:
+    """
+    Content-addressed cache for LLM completions.
+    Keys are a hash of (model, system prompt, user prompt, temperature).
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str, temperature: Optional[float]) -> str:
+        raw = json.dumps([model, system_prompt, user_prompt, temperature], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"⚠️ Completion cache read failed: {e}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            print(f"⚠️ Completion cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+_cache: Optional[CompletionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """
+    Process-wide completion cache selected by LLM_CACHE_BACKEND
+    ("memory", "sqlite" or "none"). Returns None when caching is disabled.
+    """
+    global _cache
+    if LLM_CACHE_BACKEND == "none":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            if LLM_CACHE_BACKEND == "sqlite":
+                backend = SQLiteCacheBackend()
+            elif LLM_CACHE_BACKEND == "memory":
+                backend = MemoryCacheBackend()
+            else:
+                raise RuntimeError(f"Unknown LLM_CACHE_BACKEND: {LLM_CACHE_BACKEND}")
+            _cache = CompletionCache(backend)
+            print(f"[Cache] Completion cache enabled ({LLM_CACHE_BACKEND})")
+        return _cache
@@ -0,0 +1,287 @@
+import time
+import random
+import asyncio
+import contextlib
+import threading
+from typing import Any, AsyncContextManager, Awaitable, Callable, ContextManager, Dict, Optional, Tuple
+
+from src.config import (
+    IMAGE_RATE_LIMIT_RPM,
+    IMAGE_CONCURRENCY_INITIAL,
+    IMAGE_CONCURRENCY_MIN,
+    IMAGE_CONCURRENCY_MAX,
+    IMAGE_RETRY_ATTEMPTS,
+    IMAGE_RETRY_BASE_DELAY,
+    IMAGE_RETRY_MAX_DELAY,
+)
+
+# Provider responses that mean "slow down" (quota / overload) rather than "bad request"
+THROTTLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+THROTTLE_MARKERS = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "rate limit", "overloaded")
+
+# How often async waiters re-check a limiter they could not enter
+ASYNC_POLL_SECONDS = 0.05
+
+
+# ============================================================
+# ERROR CLASSIFICATION
+# ============================================================
+
+def _error_chain(exc: BaseException):
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def status_code_of(exc: BaseException) -> Optional[int]:
+    """HTTP status of a provider error (google-genai `code`, httpx/openai `status_code`), if any."""
+    for err in _error_chain(exc):
+        for attr in ("code", "status_code"):
+            value = getattr(err, attr, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+        response = getattr(err, "response", None)
+        value = getattr(response, "status_code", None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """True for 429 / 5xx style errors worth backing off and retrying."""
+    status = status_code_of(exc)
+    if status is not None:
+        return status in THROTTLE_STATUS_CODES
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    message = str(exc)
+    return any(marker.lower() in message.lower() for marker in THROTTLE_MARKERS)
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header on the error's response, if present."""
+    for err in _error_chain(exc):
+        headers = getattr(getattr(err, "response", None), "headers", None)
+        if not headers:
+            continue
+        try:
+            return max(0.0, float(headers.get("retry-after")))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """'Full jitter' exponential backoff: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# ============================================================
+# ADAPTIVE LIMITER (TOKEN BUCKET + AIMD CONCURRENCY)
+# ============================================================
+
+class AdaptiveLimiter:
+    """
+    Request-rate and concurrency controller for one provider/model.
+
+    - Token bucket: at most `rate_per_minute` call starts per minute (0 = no
+      rate cap), with bursts up to the current concurrency limit.
+    - AIMD concurrency: every success adds 1/limit (about +1 per window of
+      `limit` calls); a throttle (429/5xx) halves the limit, at most once per
+      window so a burst of failures from the same window counts once, and
+      pauses new starts for a short jittered cooldown.
+
+    Calls that hit a throttle are retried with full-jitter exponential
+    backoff (Retry-After wins when the provider sends one). One instance is
+    shared by every job in the process (see `get_limiter`).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate_per_minute: float = IMAGE_RATE_LIMIT_RPM,
+        initial_concurrency: int = IMAGE_CONCURRENCY_INITIAL,
+        min_concurrency: int = IMAGE_CONCURRENCY_MIN,
+        max_concurrency: int = IMAGE_CONCURRENCY_MAX,
+        retry_attempts: int = IMAGE_RETRY_ATTEMPTS,
+        retry_base_delay: float = IMAGE_RETRY_BASE_DELAY,
+        retry_max_delay: float = IMAGE_RETRY_MAX_DELAY
+    ):
+        self.name = name
+        self.rate = max(0.0, rate_per_minute) / 60.0
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.retry_attempts = max(0, retry_attempts)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        self._limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self._in_flight = 0
+        self._tokens = float(self.concurrency)
+        self._refilled_at = time.monotonic()
+        self._cooldown_until = 0.0
+        self._window = 0  # bumped on every decrease
+        self._cond = threading.Condition()
+
+        self.successes = 0
+        self.throttles = 0
+
+    @property
+    def concurrency(self) -> int:
+        return int(self._limit)
+
+    # --------------------------------------------------------
+    # ADMISSION
+    # --------------------------------------------------------
+
+    def _try_enter(self) -> Tuple[Optional[int], Optional[float]]:
+        """
+        Called with the lock held. Returns (window, None) when admitted, or
+        (None, seconds to wait); a wait of None means "until a release".
+        """
+        now = time.monotonic()
+        if now < self._cooldown_until:
+            return None, self._cooldown_until - now
+        if self._in_flight >= self.concurrency:
+            return None, None
+
+        if self.rate:
+            burst = float(self.concurrency)
+            self._tokens = min(burst, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._tokens < 1.0:
+                return None, (1.0 - self._tokens) / self.rate
+            self._tokens -= 1.0
+
+        self._in_flight += 1
+        return self._window, None
+
+    def _acquire(self) -> int:
+        with self._cond:
+            while True:
+                window, wait = self._try_enter()
+                if window is not None:
+                    return window
+                self._cond.wait(timeout=wait)
+
+    async def _acquire_async(self) -> int:
+        # Waiting on the threading.Condition would block the event loop
+        while True:
+            with self._cond:
+                window, wait = self._try_enter()
+            if window is not None:
+                return window
+            await asyncio.sleep(min(wait or ASYNC_POLL_SECONDS, 1.0))
+
+    def _release(self, window: int, throttled: bool, retry_after: Optional[float] = None) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.throttles += 1
+                if window == self._window:
+                    previous = self.concurrency
+                    self._limit = max(float(self.min_concurrency), self._limit / 2)
+                    self._window += 1
+                    cooldown = retry_after if retry_after is not None else backoff_delay(0, self.retry_base_delay, self.retry_max_delay)
+                    self._cooldown_until = max(self._cooldown_until, time.monotonic() + cooldown)
+                    print(f"[RateLimit] {self.name}: throttled, concurrency {previous} -> {self.concurrency}")
+            else:
+                self.successes += 1
+                self._limit = min(float(self.max_concurrency), self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+    # --------------------------------------------------------
+    # CALLS
+    # --------------------------------------------------------
+
+    def call(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        slot: Optional[Callable[[], ContextManager[Any]]] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Run `fn(*args, **kwargs)` under the limiter, retrying throttles.
+
+        `slot` (e.g. a provider budget's `slot`) is entered per attempt, only
+        once the limiter has admitted it, and left before any backoff sleep,
+        so waiting here never holds a budget slot another job could use.
+        """
+        for attempt in range(self.retry_attempts + 1):
+            window = self._acquire()
+            try:
+                with slot() if slot else contextlib.nullcontext():
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                retry_after = retry_after_of(e)
+                self._release(window, throttled, retry_after)
+                if not throttled or attempt == self.retry_attempts:
+                    raise
+                time.sleep(self._retry_delay(attempt, retry_after, e))
+                continue
+            self._release(window, throttled=False)
+            return result
+
+    async def acall(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+        slot: Optional[Callable[[], AsyncContextManager[Any]]] = None,
+        **kwargs: Any
+    ) -> Any:
+        """asyncio counterpart of `call`; `fn` returns an awaitable and `slot` an async context manager."""
+        for attempt in range(self.retry_attempts + 1):
+            window = await self._acquire_async()
+            try:
+                async with slot() if slot else contextlib.nullcontext():
+                    result = await fn(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttle_error(e)
+                retry_after = retry_after_of(e)
+                self._release(window, throttled, retry_after)
+                if not throttled or attempt == self.retry_attempts:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt, retry_after, e))
+                continue
+            self._release(window, throttled=False)
+            return result
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float], error: Exception) -> float:
+        delay = retry_after if retry_after is not None else backoff_delay(attempt + 1, self.retry_base_delay, self.retry_max_delay)
+        print(f"[RateLimit] {self.name}: retry {attempt + 1}/{self.retry_attempts} in {delay:.1f}s ({error})")
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "name": self.name,
+                "concurrency": self.concurrency,
+                "in_flight": self._in_flight,
+                "successes": self.successes,
+                "throttles": self.throttles,
+            }
+
+
+# ============================================================
+# PROCESS-WIDE REGISTRY
+# ============================================================
+
+_limiters: Dict[Tuple[str, str], AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str, model: str, **settings: Any) -> AdaptiveLimiter:
+    """
+    The shared limiter for (provider, model), created on first use.
+    `settings` only apply to that first creation.
+    """
+    key = (provider, model)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = AdaptiveLimiter(f"{provider}/{model}", **settings)
+        return limiter
@@ -0,0 +1,339 @@
+import time
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, FrozenSet, Iterable, Iterator, Optional
+
+import httpx
+import requests
+
+from src.config import (
+    LLM_RETRY_ATTEMPTS,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_DELAY,
+    LLM_RETRY_STATUS_CODES,
+    LLM_CALL_DEADLINE_SECONDS,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_HEDGE_WORKERS,
+)
+from src.LLM.ratelimit import backoff_delay, retry_after_of, status_code_of
+
+# Transport failures that are worth another attempt
+RETRYABLE_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    httpx.TransportError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call's overall deadline ran out (across all attempts)."""
+
+
+class ProviderHTTPError(RuntimeError):
+    """Non-2xx provider response; keeps the status so retry policies can classify it."""
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+# ============================================================
+# RETRY POLICY
+# ============================================================
+
+class RetryPolicy:
+    """
+    How a provider call is retried: `attempts` retries after the first try,
+    full-jitter exponential backoff between them (Retry-After wins), only for
+    transport errors and `retry_statuses`, all within `deadline` seconds.
+    """
+
+    def __init__(
+        self,
+        attempts: int = LLM_RETRY_ATTEMPTS,
+        base_delay: float = LLM_RETRY_BASE_DELAY,
+        max_delay: float = LLM_RETRY_MAX_DELAY,
+        retry_statuses: Iterable[int] = LLM_RETRY_STATUS_CODES,
+        deadline: Optional[float] = LLM_CALL_DEADLINE_SECONDS
+    ):
+        self.attempts = max(0, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses: FrozenSet[int] = frozenset(retry_statuses)
+        self.deadline = deadline
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        if isinstance(exc, DeadlineExceeded):
+            return False
+        status = status_code_of(exc)
+        if status is not None:
+            return status in self.retry_statuses
+        return isinstance(exc, RETRYABLE_EXCEPTIONS)
+
+    def delay(self, attempt: int, exc: BaseException) -> float:
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is None:
+            retry_after = retry_after_of(exc)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return backoff_delay(attempt, self.base_delay, self.max_delay)
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+def _remaining(deadline_at: Optional[float]) -> Optional[float]:
+    if deadline_at is None:
+        return None
+    remaining = deadline_at - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("LLM call deadline exceeded")
+    return remaining
+
+
+def call_with_retry(
+    fn: Callable[[Optional[float]], Any],
+    policy: RetryPolicy = DEFAULT_POLICY,
+    label: str = "LLM"
+) -> Any:
+    """
+    Run `fn(timeout)` under `policy`. `timeout` is the time left before the
+    deadline (None = no deadline) and should bound the attempt's own I/O.
+    """
+    deadline_at = time.monotonic() + policy.deadline if policy.deadline else None
+    for attempt in range(policy.attempts + 1):
+        try:
+            return fn(_remaining(deadline_at))
+        except Exception as e:
+            if attempt == policy.attempts or not policy.is_retryable(e):
+                raise
+            delay = policy.delay(attempt, e)
+            remaining = _remaining(deadline_at)
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded(f"{label}: no time left to retry after: {e}") from e
+            print(f"[Retry] {label}: attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def acall_with_retry(
+    fn: Callable[[Optional[float]], Awaitable[Any]],
+    policy: RetryPolicy = DEFAULT_POLICY,
+    label: str = "LLM"
+) -> Any:
+    """asyncio counterpart of `call_with_retry`."""
+    deadline_at = time.monotonic() + policy.deadline if policy.deadline else None
+    for attempt in range(policy.attempts + 1):
+        try:
+            remaining = _remaining(deadline_at)
+            if remaining is None:
+                return await fn(None)
+            return await asyncio.wait_for(fn(remaining), timeout=remaining)
+        except Exception as e:
+            if attempt == policy.attempts or not policy.is_retryable(e):
+                raise
+            delay = policy.delay(attempt, e)
+            remaining = _remaining(deadline_at)
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded(f"{label}: no time left to retry after: {e}") from e
+            print(f"[Retry] {label}: attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def iter_with_retry(
+    open_stream: Callable[[Optional[float]], Iterator[Any]],
+    policy: RetryPolicy = DEFAULT_POLICY,
+    label: str = "LLM"
+) -> Iterator[Any]:
+    """
+    Streaming counterpart of `call_with_retry`: re-opens the stream on a
+    retryable error, but only until the first item has been yielded (a
+    half-consumed stream cannot be replayed).
+    """
+    deadline_at = time.monotonic() + policy.deadline if policy.deadline else None
+    for attempt in range(policy.attempts + 1):
+        started = False
+        try:
+            for item in open_stream(_remaining(deadline_at)):
+                started = True
+                yield item
+            return
+        except Exception as e:
+            if started or attempt == policy.attempts or not policy.is_retryable(e):
+                raise
+            delay = policy.delay(attempt, e)
+            remaining = _remaining(deadline_at)
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded(f"{label}: no time left to retry after: {e}") from e
+            print(f"[Retry] {label}: stream attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+async def aiter_with_retry(
+    open_stream: Callable[[Optional[float]], AsyncIterator[Any]],
+    policy: RetryPolicy = DEFAULT_POLICY,
+    label: str = "LLM"
+) -> AsyncIterator[Any]:
+    """asyncio counterpart of `iter_with_retry`."""
+    deadline_at = time.monotonic() + policy.deadline if policy.deadline else None
+    for attempt in range(policy.attempts + 1):
+        started = False
+        try:
+            async for item in open_stream(_remaining(deadline_at)):
+                started = True
+                yield item
+            return
+        except Exception as e:
+            if started or attempt == policy.attempts or not policy.is_retryable(e):
+                raise
+            delay = policy.delay(attempt, e)
+            remaining = _remaining(deadline_at)
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded(f"{label}: no time left to retry after: {e}") from e
+            print(f"[Retry] {label}: stream attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+# ============================================================
+# HEDGED REQUESTS
+# ============================================================
+
+class LatencyTracker:
+    """
+    Rolling latency samples per key (e.g. model + stage). `hedge_delay`
+    is the configured percentile once enough samples exist, else None
+    (no hedging until the tracker has a baseline).
+    """
+
+    def __init__(
+        self,
+        window: int = 200,
+        percentile: float = LLM_HEDGE_PERCENTILE,
+        min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        min_delay: float = LLM_HEDGE_MIN_DELAY
+    ):
+        self.window = window
+        self.percentile = percentile
+        self.min_samples = max(1, min_samples)
+        self.min_delay = min_delay
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        value = samples[min(len(samples) - 1, int(self.percentile * len(samples)))]
+        return max(self.min_delay, value)
+
+
+latency_tracker = LatencyTracker()
+
+# Duplicates only: the first attempt always runs on the caller's thread
+_hedge_pool = concurrent.futures.ThreadPoolExecutor(max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+# One per pool worker, so a duplicate never waits in the pool's queue
+_hedge_slots = threading.BoundedSemaphore(LLM_HEDGE_WORKERS)
+
+
+def hedged_call(fn: Callable[[], Any], hedge_after: Optional[float], label: str = "LLM") -> Any:
+    """
+    Run `fn()` on the caller's thread; if it is still running `hedge_after`
+    seconds after it started, send a duplicate on the hedge pool (skipped
+    when every hedge worker is busy). The caller's attempt cannot be
+    abandoned, so its result is returned when it finishes; if it fails,
+    the duplicate's result is used instead of the error.
+    """
+    if hedge_after is None:
+        return fn()
+
+    # The duplicate runs in the caller's context so provider budgets see the same job
+    context = contextvars.copy_context()
+    lock = threading.Lock()
+    state = {"primary_done": False, "backup": None}
+
+    def start_backup() -> None:
+        with lock:
+            if state["primary_done"]:
+                return
+            if not _hedge_slots.acquire(blocking=False):
+                print(f"[Retry] {label}: no response after {hedge_after:.1f}s, hedge pool busy; not hedging")
+                return
+            print(f"[Retry] {label}: no response after {hedge_after:.1f}s, sending a hedged request")
+            backup = _hedge_pool.submit(context.run, fn)
+            backup.add_done_callback(lambda _: _hedge_slots.release())
+            state["backup"] = backup
+
+    timer = threading.Timer(hedge_after, start_backup)
+    timer.daemon = True
+    timer.start()
+    try:
+        return fn()
+    except Exception:
+        with lock:
+            state["primary_done"] = True
+            backup = state["backup"]
+        if backup is None:
+            raise
+        try:
+            return backup.result()
+        except Exception:
+            pass
+        raise
+    finally:
+        with lock:
+            state["primary_done"] = True
+        timer.cancel()
+
+
+async def ahedged_call(fn: Callable[[], Awaitable[Any]], hedge_after: Optional[float], label: str = "LLM") -> Any:
+    """asyncio counterpart of `hedged_call`; the losing request is cancelled."""
+    if hedge_after is None:
+        return await fn()
+
+    primary = asyncio.ensure_future(fn())
+    done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+    if done:
+        return primary.result()
+
+    print(f"[Retry] {label}: no response after {hedge_after:.1f}s, sending a hedged request")
+    pending = {primary, asyncio.ensure_future(fn())}
+    errors = []
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                errors.append(task.exception())
+        raise errors[0]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def track_latency(key: str, fn: Callable[[], Any]) -> Any:
+    """Run `fn()` and record its latency under `key` when it succeeds."""
+    start = time.monotonic()
+    result = fn()
+    latency_tracker.record(key, time.monotonic() - start)
+    return result
+
+
+async def atrack_latency(key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """asyncio counterpart of `track_latency`."""
+    start = time.monotonic()
+    result = await fn()
+    latency_tracker.record(key, time.monotonic() - start)
+    return result
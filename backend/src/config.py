@@ -9,4 +9,135 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
 MODEL_NAME = os.getenv("MODEL_NAME", "gpt-5")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash-exp")
\ No newline at end of file
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.0-flash-exp")
+
+# Background video-generation jobs
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "2"))
+JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", "200"))
+# Concurrent requests for the same (normalized) topic share one in-flight job
+JOB_SINGLE_FLIGHT = os.getenv("JOB_SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes")
+
+# Progress events kept per job (replayed to late / reconnecting SSE clients)
+JOB_EVENT_HISTORY = int(os.getenv("JOB_EVENT_HISTORY", "500"))
+JOB_EVENT_HEARTBEAT_SECONDS = float(os.getenv("JOB_EVENT_HEARTBEAT_SECONDS", "15"))
+
+# Slide content generation: "single" (one request), "objective" or "fixed" chunks
+SLIDE_CONTENT_CHUNK_MODE = os.getenv("SLIDE_CONTENT_CHUNK_MODE", "single")
+SLIDE_CONTENT_CHUNK_SIZE = int(os.getenv("SLIDE_CONTENT_CHUNK_SIZE", "4"))
+SLIDE_CONTENT_MAX_WORKERS = int(os.getenv("SLIDE_CONTENT_MAX_WORKERS", "4"))
+# Stream slide content into the per-slide pipeline (single-request mode only)
+SLIDE_CONTENT_STREAMING = os.getenv("SLIDE_CONTENT_STREAMING", "true").lower() == "true" and SLIDE_CONTENT_CHUNK_MODE == "single"
+
+# Shared OpenAI connection pool (keep-alive; HTTP/2 needs httpx[http2])
+OPENAI_POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", "20"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "false").lower() == "true"
+OPENAI_ASYNC_MAX_CONNECTIONS = int(os.getenv("OPENAI_ASYNC_MAX_CONNECTIONS", "200"))
+
+# LLM calls: retries (exponential backoff + jitter), per-call deadline, hedged requests
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "1000"))
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+LLM_RETRY_STATUS_CODES = [int(c) for c in os.getenv("LLM_RETRY_STATUS_CODES", "408,409,429,500,502,503,504").split(",") if c.strip()]
+LLM_CALL_DEADLINE_SECONDS = float(os.getenv("LLM_CALL_DEADLINE_SECONDS", "1200"))
+# Objectives + plan gate everything else, so they get a tighter deadline (and, opt-in, hedging:
+# a duplicate request once a call outlives the p95 latency; every hedge is a second paid call)
+LLM_FAST_STAGE_DEADLINE_SECONDS = float(os.getenv("LLM_FAST_STAGE_DEADLINE_SECONDS", "240"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2.0"))
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "16"))
+
+# Process-wide cap on concurrent calls per provider, shared fairly between jobs
+# ("provider=limit,..."); a lock dir extends the caps across processes on the host
+PROVIDER_BUDGETS = {
+    name.strip(): int(limit)
+    for name, limit in (
+        item.split("=", 1) for item in os.getenv("PROVIDER_BUDGETS", "gemini=8,openai=16").split(",") if "=" in item
+    )
+}
+PROVIDER_BUDGET_DEFAULT = int(os.getenv("PROVIDER_BUDGET_DEFAULT", "16"))
+PROVIDER_BUDGET_LOCK_DIR = os.getenv("PROVIDER_BUDGET_LOCK_DIR", "")
+
+# Gemini image generation: shared per-model limiter (token bucket + AIMD concurrency)
+IMAGE_RATE_LIMIT_RPM = float(os.getenv("IMAGE_RATE_LIMIT_RPM", "60"))
+IMAGE_CONCURRENCY_INITIAL = int(os.getenv("IMAGE_CONCURRENCY_INITIAL", "4"))
+IMAGE_CONCURRENCY_MIN = int(os.getenv("IMAGE_CONCURRENCY_MIN", "1"))
+IMAGE_CONCURRENCY_MAX = int(os.getenv("IMAGE_CONCURRENCY_MAX", "16"))
+IMAGE_RETRY_ATTEMPTS = int(os.getenv("IMAGE_RETRY_ATTEMPTS", "4"))
+IMAGE_RETRY_BASE_DELAY = float(os.getenv("IMAGE_RETRY_BASE_DELAY", "2.0"))
+IMAGE_RETRY_MAX_DELAY = float(os.getenv("IMAGE_RETRY_MAX_DELAY", "60.0"))
+
+# LLM completion cache: "memory" (in-process LRU), "sqlite" (on disk) or "none"
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "output/cache/llm_completions.sqlite3")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Topic-level artifact store (objectives/plan/slides/images/audio/video per normalized topic)
+ARTIFACT_CACHE_ENABLED = os.getenv("ARTIFACT_CACHE_ENABLED", "true").lower() == "true"
+ARTIFACT_STORE_DIR = os.getenv("ARTIFACT_STORE_DIR", "output/artifact_store")
+# Topics unused for longer than the max age are dropped; past the size limit, least recently used first
+ARTIFACT_STORE_MAX_BYTES = int(os.getenv("ARTIFACT_STORE_MAX_BYTES", str(20 * 1024**3)))
+ARTIFACT_STORE_MAX_AGE_SECONDS = float(os.getenv("ARTIFACT_STORE_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+
+# Slide image cache keyed by hash(model, prompt)
+IMAGE_CACHE_ENABLED = os.getenv("IMAGE_CACHE_ENABLED", "true").lower() == "true"
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "output/cache/images")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(2 * 1024**3)))
+
+# Synthesized voiceover cache keyed by hash(engine, voice, model, script)
+AUDIO_CACHE_ENABLED = os.getenv("AUDIO_CACHE_ENABLED", "true").lower() == "true"
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "output/cache/audio")
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(1024**3)))
+
+# Per-job working directories (<root>/<job_id>/visuals|audio) so concurrent jobs never collide
+WORKSPACE_ROOT = os.getenv("WORKSPACE_ROOT", "output/workspaces")
+# "always", "on_success" (keep failed runs for debugging) or "never"
+WORKSPACE_CLEANUP = os.getenv("WORKSPACE_CLEANUP", "on_success").lower()
+WORKSPACE_RETENTION_SECONDS = float(os.getenv("WORKSPACE_RETENTION_SECONDS", str(24 * 3600)))
+
+# Final render: per-slide segments encoded by "moviepy" or "ffmpeg" and joined by stream copy,
+# or "moviepy-timeline" (the original single composited timeline, encoded once at the end)
+VIDEO_ASSEMBLER = os.getenv("VIDEO_ASSEMBLER", "moviepy").lower()
+
+# Processes encoding slide segments in parallel (default: one per core)
+RENDER_WORKERS = max(1, int(os.getenv("RENDER_WORKERS") or os.cpu_count() or 1))
+
+# Opt-in: keep per-slide segments + manifest next to each output so re-rendering to the SAME
+# path only re-encodes changed slides (about doubles the disk per video; off for unique outputs)
+INCREMENTAL_RENDER = os.getenv("INCREMENTAL_RENDER", "false").lower() == "true"
+
+# Media serving (/api/videos, /artifacts)
+MEDIA_CACHE_CONTROL = os.getenv("MEDIA_CACHE_CONTROL", "public, max-age=86400")
+# Let a fronting proxy stream files with sendfile(2): "X-Accel-Redirect" (nginx) or "X-Sendfile" (Apache)
+SENDFILE_OFFLOAD_HEADER = os.getenv("SENDFILE_OFFLOAD_HEADER", "")
+SENDFILE_OFFLOAD_PREFIX = os.getenv("SENDFILE_OFFLOAD_PREFIX", "/protected")
+
+# Output format: "mp4" (faststart MP4) or "hls" (faststart MP4 + multi-resolution HLS ladder)
+VIDEO_OUTPUT_FORMAT = os.getenv("VIDEO_OUTPUT_FORMAT", "mp4").lower()
+HLS_RENDITIONS = [int(h) for h in os.getenv("HLS_RENDITIONS", "1080,720,480").split(",") if h.strip()]
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "6"))
+
+# Publish finished slides to a growing HLS EVENT playlist (<output>.live/index.m3u8)
+LIVE_PLAYBACK = os.getenv("LIVE_PLAYBACK", "true").lower() == "true"
+# Finished live playlists are removed once untouched this long (the MP4 / HLS output replaces them)
+LIVE_RETENTION_SECONDS = float(os.getenv("LIVE_RETENTION_SECONDS", "3600"))
+
+# Password hashing (bcrypt). Cost is 2^rounds; stored hashes below the minimum are upgraded on login
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+PASSWORD_HASH_MIN_ROUNDS = int(os.getenv("PASSWORD_HASH_MIN_ROUNDS", os.getenv("PASSWORD_HASH_ROUNDS", "12")))
+# Threads running bcrypt off the event loop (bcrypt releases the GIL)
+PASSWORD_HASH_WORKERS = max(1, int(os.getenv("PASSWORD_HASH_WORKERS") or min(4, os.cpu_count() or 1)))
+
+# Verified JWTs cached until they expire (LRU-bounded), and per-user context rows cached briefly
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+USER_CONTEXT_CACHE_SIZE = int(os.getenv("USER_CONTEXT_CACHE_SIZE", "4096"))
+USER_CONTEXT_TTL_SECONDS = float(os.getenv("USER_CONTEXT_TTL_SECONDS", "60"))
+
+# User accounts store: "supabase", "sqlite" / "memory" (local stand-ins) or "auto" (Supabase when configured)
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "auto").lower()
+USER_STORE_PATH = os.getenv("USER_STORE_PATH", "output/users.sqlite3")
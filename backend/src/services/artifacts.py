@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from src.config import ARTIFACT_STORE_DIR, ARTIFACT_STORE_MAX_BYTES, ARTIFACT_STORE_MAX_AGE_SECONDS
+
+
+# ============================================================
+# TOPIC KEYS
+# ============================================================
+
+# Wrapping quotes / brackets, and sentence punctuation at the end, are not
+# part of a topic. Everything else is kept: "C++", "C#", "F#" and "C" differ.
+_LEADING_TRIM = "\"'`“”‘’«»([{¿¡"
+_TRAILING_TRIM = "\"'`“”‘’«»)]}.,;:!?…。，、！？"
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Fold case and whitespace, and strip wrapping quotes and trailing
+    sentence punctuation, so "Bubble sort!" and "  bubble   SORT " map to
+    the same lecture. Inner symbols are significant.
+    """
+    text = " ".join(unicodedata.normalize("NFKC", topic).casefold().split())
+    text = text.lstrip(_LEADING_TRIM + " ")
+    return text.rstrip(_TRAILING_TRIM + " ")
+
+
+def topic_key(topic: str) -> str:
+    return hashlib.sha256(normalize_topic(topic).encode("utf-8")).hexdigest()[:32]
+
+
+def copy_artifact(src: str, dst: str) -> None:
+    """
+    Copy via a temp file + rename. Not a hard link: the assemblers (ffmpeg
+    concat, MoviePy write_videofile) write the output MP4 in place, so
+    re-rendering to the same path would silently change a stored lecture
+    linked to it. ARTIFACT_STORE_DIR, WORKSPACE_ROOT and the output dir may
+    also sit on different filesystems.
+    """
+    tmp_path = f"{dst}.{threading.get_ident()}.tmp"
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+# ============================================================
+# PERSISTENT ARTIFACT STORE
+# ============================================================
+
+class TopicArtifacts:
+    """
+    Everything already produced for one normalized topic.
+    Stage values are None when that stage has not been stored yet.
+    """
+
+    def __init__(self, directory: str, manifest: Dict[str, Any]):
+        self.directory = directory
+        self.manifest = manifest
+
+    @property
+    def objectives(self) -> Optional[List[str]]:
+        return self.manifest.get("objectives")
+
+    @property
+    def plan(self) -> Optional[List[Dict[str, Any]]]:
+        return self.manifest.get("plan")
+
+    @property
+    def slides(self) -> Optional[List[Dict[str, Any]]]:
+        return self.manifest.get("slides")
+
+    @property
+    def video(self) -> Optional[str]:
+        return self._existing(self.manifest.get("video"))
+
+    def image(self, idx: int) -> Optional[str]:
+        return self._existing(self.manifest.get("images", {}).get(str(idx)))
+
+    def audio(self, idx: int) -> Optional[str]:
+        return self._existing(self.manifest.get("audio", {}).get(str(idx)))
+
+    def _existing(self, filename: Optional[str]) -> Optional[str]:
+        if not filename:
+            return None
+        path = os.path.join(self.directory, filename)
+        return path if os.path.exists(path) else None
+
+
+class ArtifactStore:
+    """
+    On-disk store of lecture artifacts keyed by normalized topic:
+
+        <root>/<topic_key>/manifest.json
+        <root>/<topic_key>/slide_NN.png | slide_NN.mp3 | lecture.mp4
+
+    A full hit returns the rendered MP4 without calling any provider;
+    partial hits let the pipeline resume from the last stored stage.
+
+    Reads touch the manifest, and `prune` (run after each stored video)
+    drops topics unused for `max_age_seconds`, then the least recently used
+    ones until the store fits in `max_bytes`.
+    """
+
+    STAGES = ("objectives", "plan", "slides")
+
+    def __init__(
+        self,
+        root: str = ARTIFACT_STORE_DIR,
+        max_bytes: int = ARTIFACT_STORE_MAX_BYTES,
+        max_age_seconds: float = ARTIFACT_STORE_MAX_AGE_SECONDS
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _dir(self, topic: str) -> str:
+        return os.path.join(self.root, topic_key(topic))
+
+    def _read_manifest(self, directory: str, topic: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        # Entries written under an older (or colliding) normalization belong to another topic
+        if topic is not None and manifest.get("normalized_topic") != normalize_topic(topic):
+            return {}
+        return manifest
+
+    def _write_manifest(self, directory: str, manifest: Dict[str, Any]) -> None:
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f"manifest.json.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(directory, "manifest.json"))
+
+    def _update(self, topic: str, mutate) -> None:
+        directory = self._dir(topic)
+        with self._lock(topic_key(topic)):
+            manifest = self._read_manifest(directory, topic)
+            if not manifest:
+                manifest = {"topic": topic}
+            manifest.setdefault("normalized_topic", normalize_topic(topic))
+            os.makedirs(directory, exist_ok=True)
+            mutate(directory, manifest)
+            self._write_manifest(directory, manifest)
+
+    # --------------------------------------------------------
+    # READ
+    # --------------------------------------------------------
+
+    def load(self, topic: str) -> TopicArtifacts:
+        directory = self._dir(topic)
+        manifest = self._read_manifest(directory, topic)
+        if manifest:
+            try:
+                os.utime(os.path.join(directory, "manifest.json"))  # LRU bookkeeping
+            except FileNotFoundError:
+                pass
+        return TopicArtifacts(directory, manifest)
+
+    # --------------------------------------------------------
+    # WRITE
+    # --------------------------------------------------------
+
+    def save_stage(self, topic: str, stage: str, value: Any) -> None:
+        """
+        Store one content stage. Everything downstream of it is invalidated,
+        since later stages were derived from the old value.
+        """
+        if stage not in self.STAGES:
+            raise ValueError(f"Unknown artifact stage: {stage}")
+
+        def mutate(directory, manifest):
+            manifest[stage] = value
+            for later in self.STAGES[self.STAGES.index(stage) + 1:]:
+                manifest.pop(later, None)
+            manifest.pop("images", None)
+            manifest.pop("audio", None)
+            manifest.pop("video", None)
+
+        self._update(topic, mutate)
+
+    def save_slide_file(self, topic: str, kind: str, idx: int, src_path: str) -> None:
+        """Store a slide image ("images") or voiceover ("audio") file."""
+        if kind not in ("images", "audio"):
+            raise ValueError(f"Unknown slide file kind: {kind}")
+
+        def mutate(directory, manifest):
+            filename = f"slide_{idx:02d}{os.path.splitext(src_path)[1]}"
+            copy_artifact(src_path, os.path.join(directory, filename))
+            manifest.setdefault(kind, {})[str(idx)] = filename
+
+        self._update(topic, mutate)
+
+    def save_video(self, topic: str, src_path: str) -> None:
+        def mutate(directory, manifest):
+            copy_artifact(src_path, os.path.join(directory, "lecture.mp4"))
+            manifest["video"] = "lecture.mp4"
+
+        self._update(topic, mutate)
+        self.prune()
+
+    # --------------------------------------------------------
+    # RETENTION
+    # --------------------------------------------------------
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                used = os.stat(os.path.join(entry.path, "manifest.json")).st_mtime
+            except FileNotFoundError:
+                used = entry.stat().st_mtime
+            size = 0
+            for child in os.scandir(entry.path):
+                try:
+                    size += child.stat().st_size
+                except FileNotFoundError:
+                    pass
+            entries.append((used, size, entry.name, entry.path))
+        return sorted(entries)
+
+    def prune(self) -> int:
+        """Apply the age and size limits. Returns how many topics were removed."""
+        if not os.path.isdir(self.root):
+            return 0
+
+        entries = self._entries()
+        total = sum(size for _, size, _, _ in entries)
+        cutoff = time.time() - self.max_age_seconds
+        removed = 0
+        for used, size, key, path in entries:  # least recently used first
+            if used >= cutoff and total <= self.max_bytes:
+                break
+            lock = self._lock(key)
+            if not lock.acquire(blocking=False):
+                continue  # being written right now
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+            finally:
+                lock.release()
+            total -= size
+            removed += 1
+
+        if removed:
+            print(f"[Artifacts] Pruned {removed} topic(s); store is now {total / 1e6:.1f} MB")
+        return removed
+
+
+# Process-wide store used by the pipeline
+artifact_store = ArtifactStore()
@@ -0,0 +1,577 @@
+import os
+import json
+import shutil
+import hashlib
+import functools
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+import concurrent.futures
+import concurrent.futures.process
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config import RENDER_WORKERS
+
+try:
+    # In MoviePy v2, everything is exposed at the top level
+    from moviepy import *
+
+    # However, sometimes explicit imports help if the star import misses something
+    if "ImageClip" not in globals():
+        from moviepy.video.VideoClip import ImageClip
+    if "AudioFileClip" not in globals():
+        from moviepy.audio.io.AudioFileClip import AudioFileClip
+    if "concatenate_videoclips" not in globals():
+        from moviepy.video.compositing.concatenate import concatenate_videoclips
+    from moviepy.config import FFMPEG_BINARY
+
+    MOVIEPY_AVAILABLE = True
+    print(f"[Video] MoviePy v2.2.1 loaded successfully.")
+
+except ImportError as e:
+    print(f"⚠️ MoviePy Import Error: {e}")
+    MOVIEPY_AVAILABLE = False
+    FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+
+# (slide index, image path, audio path)
+SlideMedia = Tuple[int, Optional[str], Optional[str]]
+
+# "moviepy" / "ffmpeg" encode per-slide segments joined by stream copy;
+# "moviepy-timeline" is the original path: one composited timeline, one encode
+TIMELINE_ASSEMBLER = "moviepy-timeline"
+SEGMENT_ASSEMBLERS = ("moviepy", "ffmpeg")
+ASSEMBLERS = SEGMENT_ASSEMBLERS + (TIMELINE_ASSEMBLER,)
+
+# Small pause after each slide's voiceover
+SLIDE_PADDING_SECONDS = 0.25
+
+# Every segment shares these settings so they can be joined by stream copy
+SEGMENT_SETTINGS = {
+    "width": 1920,
+    "height": 1080,
+    "fps": 24,
+    "video_codec": "libx264",
+    "preset": "veryfast",
+    "tune": "stillimage",
+    "crf": 23,
+    "gop_seconds": 4,  # keyframe spacing; bounds the chunks of the live playlist
+    "pix_fmt": "yuv420p",
+    "audio_codec": "aac",
+    "audio_bitrate": "128k",
+    "sample_rate": 44100,
+    "channels": 2,
+}
+
+
+def usable_slides(slides: Sequence[SlideMedia]) -> List[SlideMedia]:
+    """Drop slides whose image or voiceover is missing, keeping slide order."""
+    usable = []
+    for idx, img_path, audio_path in sorted(slides, key=lambda s: s[0]):
+        if not img_path or not audio_path or not os.path.exists(img_path) or not os.path.exists(audio_path):
+            print(f"   Skipping Slide {idx}: File missing.")
+            continue
+        usable.append((idx, img_path, audio_path))
+    return usable
+
+
+# ============================================================
+# SEGMENT ENCODERS (run inside render worker processes)
+# ============================================================
+
+def run_ffmpeg(args: List[str]) -> None:
+    result = subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+
+def encode_segment_ffmpeg(
+    img_path: str,
+    audio_path: str,
+    segment_path: str,
+    settings: dict = SEGMENT_SETTINGS,
+    threads: int = 0
+) -> str:
+    """
+    Encode one still image + voiceover into an MP4 segment with ffmpeg.
+    The image is read at 1 fps (so it is scaled once per second, not once
+    per frame), duplicated up to `fps` and encoded with x264's stillimage
+    tuning; the audio is padded by SLIDE_PADDING_SECONDS.
+    """
+    width, height = settings["width"], settings["height"]
+    video_filter = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=white,"
+        f"format={settings['pix_fmt']},"
+        f"fps={settings['fps']}"
+    )
+    run_ffmpeg([
+        "-loop", "1", "-framerate", "1", "-i", img_path,
+        "-i", audio_path,
+        "-vf", video_filter,
+        "-af", f"apad=pad_dur={SLIDE_PADDING_SECONDS}",
+        "-c:v", settings["video_codec"],
+        "-preset", settings["preset"],
+        "-tune", settings["tune"],
+        "-crf", str(settings["crf"]),
+        "-g", str(settings["fps"] * settings["gop_seconds"]),
+        "-threads", str(threads),
+        "-c:a", settings["audio_codec"],
+        "-b:a", settings["audio_bitrate"],
+        "-ar", str(settings["sample_rate"]),
+        "-ac", str(settings["channels"]),
+        "-shortest",
+        segment_path,
+    ])
+    return segment_path
+
+
+def encode_segment_moviepy(
+    img_path: str,
+    audio_path: str,
+    segment_path: str,
+    settings: dict = SEGMENT_SETTINGS,
+    threads: int = 0
+) -> str:
+    """
+    Encode one still image + voiceover into an MP4 segment with MoviePy.
+    The slide is fitted onto a fixed white canvas so every segment has the
+    same resolution and can be joined by stream copy.
+    """
+    if not MOVIEPY_AVAILABLE:
+        raise RuntimeError("MoviePy not installed or import failed.")
+
+    width, height = settings["width"], settings["height"]
+
+    # 1. Create Audio Clip
+    audio_clip = AudioFileClip(audio_path)
+    slide_duration = audio_clip.duration + SLIDE_PADDING_SECONDS # Add small pause
+
+    # 2. Create Image Clip (MoviePy 2.2.1 Syntax)
+    image_clip = ImageClip(img_path)
+    scale = min(width / image_clip.w, height / image_clip.h)
+    clip = (
+        image_clip
+        .resized(scale)
+        .with_background_color(size=(width, height), color=(255, 255, 255), pos="center")
+        .with_duration(slide_duration)
+        .with_audio(audio_clip)
+    )
+
+    try:
+        clip.write_videofile(
+            segment_path,
+            fps=settings["fps"],
+            codec=settings["video_codec"],
+            preset=settings["preset"],
+            audio_codec=settings["audio_codec"],
+            audio_bitrate=settings["audio_bitrate"],
+            audio_fps=settings["sample_rate"],
+            threads=threads or None,
+            pixel_format=settings["pix_fmt"],
+            ffmpeg_params=[
+                "-tune", settings["tune"],
+                "-crf", str(settings["crf"]),
+                "-g", str(settings["fps"] * settings["gop_seconds"]),
+                "-ac", str(settings["channels"]),
+            ],
+            logger=None
+        )
+    finally:
+        clip.close()
+        audio_clip.close()
+    return segment_path
+
+
+SEGMENT_ENCODERS = {
+    "moviepy": encode_segment_moviepy,
+    "ffmpeg": encode_segment_ffmpeg,
+}
+
+
+def encode_slide_segment(
+    assembler: str,
+    img_path: str,
+    audio_path: str,
+    segment_path: str,
+    settings: dict = SEGMENT_SETTINGS,
+    threads: int = 0
+) -> str:
+    """
+    Pool entry point: encode into a temp file and rename, so a crashed or
+    cancelled worker never leaves a truncated segment behind.
+    """
+    tmp_path = f"{segment_path}.{os.getpid()}.tmp.mp4"
+    try:
+        SEGMENT_ENCODERS[assembler](img_path, audio_path, tmp_path, settings, threads)
+        os.replace(tmp_path, segment_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return segment_path
+
+
+def concat_segments(segment_paths: Sequence[str], output_filename: str) -> str:
+    """
+    Join segments with the concat demuxer. Streams are copied, not
+    re-encoded, so this costs about as much as copying the file.
+    """
+    list_fd, list_path = tempfile.mkstemp(suffix=".txt", prefix="concat_")
+    try:
+        with os.fdopen(list_fd, "w", encoding="utf-8") as f:
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_filename,
+        ])
+    finally:
+        os.remove(list_path)
+    return output_filename
+
+
+# ============================================================
+# MOVIEPY TIMELINE ASSEMBLER (whole timeline, single process)
+# ============================================================
+
+def build_slide_clip(idx: int, img_path: str, audio_path: str):
+    """
+    Turn one slide's image + voiceover into a MoviePy clip.
+    Returns None if either input is unreadable.
+    """
+    try:
+        audio_clip = AudioFileClip(audio_path)
+        slide_duration = audio_clip.duration + SLIDE_PADDING_SECONDS  # Add small pause
+
+        image_clip = (
+            ImageClip(img_path)
+            .with_duration(slide_duration)
+            .with_audio(audio_clip)
+        )
+
+        print(f"   + Added Slide {idx} (Duration: {slide_duration:.2f}s)")
+        return image_clip
+
+    except Exception as e:
+        print(f"   ❌ Error assembling Slide {idx}: {e}")
+        return None
+
+
+def assemble_with_moviepy_timeline(slides: Sequence[SlideMedia], output_filename: str) -> int:
+    """
+    Composite every slide into one timeline and encode it in-process.
+    Returns the number of slides included.
+    """
+    if not MOVIEPY_AVAILABLE:
+        raise RuntimeError("MoviePy not installed or import failed.")
+
+    clips = []
+    for idx, img_path, audio_path in usable_slides(slides):
+        clip = build_slide_clip(idx, img_path, audio_path)
+        if clip is not None:
+            clips.append(clip)
+    if not clips:
+        return 0
+
+    final_video = concatenate_videoclips(clips, method="compose")
+    try:
+        # Note: MoviePy 2.x still requires 'fps' for Image-based videos
+        final_video.write_videofile(
+            output_filename,
+            fps=24,
+            codec="libx264",
+            audio_codec="aac",
+            ffmpeg_params=["-movflags", "+faststart"]
+        )
+    finally:
+        final_video.close()
+        for clip in clips:
+            clip.close()
+    return len(clips)
+
+
+# ============================================================
+# RENDER POOL
+# ============================================================
+
+_render_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """
+    Process-wide pool of RENDER_WORKERS encoder processes shared by all jobs.
+    Workers are spawned (not forked) since the API process is multi-threaded.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            print(f"[Render] Started segment render pool ({RENDER_WORKERS} workers)")
+        return _render_pool
+
+
+def _discard_render_pool(pool: concurrent.futures.ProcessPoolExecutor) -> None:
+    # A worker died (OOM, segfault); the next job gets a fresh pool
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ============================================================
+# INCREMENTAL RENDER MANIFEST
+# ============================================================
+
+def segment_dir_for(output_filename: str) -> str:
+    """Segments and their manifest live next to the output: lecture.mp4 -> lecture.segments/"""
+    return f"{os.path.splitext(output_filename)[0]}.segments"
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _encode_settings_hash(assembler: str, settings: dict) -> str:
+    raw = json.dumps(
+        {"assembler": assembler, "settings": settings, "padding": SLIDE_PADDING_SECONDS},
+        sort_keys=True
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SegmentRenderer:
+    """
+    Encodes slide segments in the render pool as slides become ready, then
+    stitches them in slide order. `submit` is safe to call from the slide
+    pipeline's worker threads.
+
+    With a persistent `segment_dir`, a manifest.json records the hashes of
+    each segment's image bytes, audio bytes and encode settings; a slide
+    whose inputs are unchanged reuses its segment instead of re-encoding.
+
+    `on_segment(idx, path)` fires as each slide's segment is ready, with
+    path None if it failed; it runs on the render pool's callback thread.
+    `segments()` / `render()` and `close()` return only after every
+    callback has run, so consumers (e.g. a LivePlaylist) see every slide.
+    """
+
+    MANIFEST_VERSION = 1
+
+    def __init__(
+        self,
+        assembler: str = "moviepy",
+        segment_dir: Optional[str] = None,
+        on_segment: Optional[Callable[[int, Optional[str]], None]] = None
+    ):
+        if assembler not in SEGMENT_ASSEMBLERS:
+            raise ValueError(f"Not a segment assembler: {assembler} (expected one of {SEGMENT_ASSEMBLERS})")
+        self.assembler = assembler
+        self._owns_dir = segment_dir is None
+        self.segment_dir = segment_dir or tempfile.mkdtemp(prefix="segments_")
+        os.makedirs(self.segment_dir, exist_ok=True)
+        self.pool = get_render_pool()
+        # Split the cores between concurrently running encoders
+        self.threads = max(1, (os.cpu_count() or 1) // RENDER_WORKERS)
+        self.settings_hash = _encode_settings_hash(assembler, SEGMENT_SETTINGS)
+        self.reused: set = set()
+        self.on_segment = on_segment
+        self._futures: Dict[int, concurrent.futures.Future] = {}
+        self._inputs: Dict[int, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        # Future.result() wakes waiters before done-callbacks run; count the callbacks still owed
+        self._pending_callbacks = 0
+        self._callbacks_idle = threading.Condition(self._lock)
+        self._manifest = {} if self._owns_dir else self._read_manifest()
+
+    def segment_path(self, idx: int) -> str:
+        return os.path.join(self.segment_dir, f"segment_{idx:03d}.mp4")
+
+    # --------------------------------------------------------
+    # MANIFEST
+    # --------------------------------------------------------
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.segment_dir, "manifest.json")
+
+    def _read_manifest(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if data.get("version") != self.MANIFEST_VERSION:
+            return {}
+        return data.get("slides", {})
+
+    def _write_manifest(self) -> None:
+        # Called with self._lock held
+        if self._owns_dir:
+            return
+        tmp_path = f"{self._manifest_path()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.MANIFEST_VERSION, "slides": self._manifest}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+
+    def _reusable(self, idx: int, inputs: Dict[str, str]) -> bool:
+        entry = self._manifest.get(str(idx))
+        return entry == inputs and os.path.exists(self.segment_path(idx))
+
+    # --------------------------------------------------------
+    # ENCODE / STITCH
+    # --------------------------------------------------------
+
+    def submit(self, idx: int, img_path: Optional[str], audio_path: Optional[str]) -> bool:
+        """Queue one slide for encoding. Returns False if its media is missing."""
+        if not usable_slides([(idx, img_path, audio_path)]):
+            return False
+
+        inputs = {
+            "image": _file_sha256(img_path),
+            "audio": _file_sha256(audio_path),
+            "encode": self.settings_hash,
+        }
+        with self._lock:
+            self._inputs[idx] = inputs
+            reuse = self._reusable(idx, inputs)
+            if not reuse and self._manifest.pop(str(idx), None) is not None:
+                # The old segment is about to be replaced; never let the
+                # manifest vouch for a file that no longer matches it
+                self._write_manifest()
+
+        if reuse:
+            future = concurrent.futures.Future()
+            future.set_result(self.segment_path(idx))
+            self.reused.add(idx)
+            print(f"   ♻️  Slide {idx} unchanged, reusing its segment.")
+        else:
+            try:
+                future = self.pool.submit(
+                    encode_slide_segment, self.assembler, img_path, audio_path,
+                    self.segment_path(idx), SEGMENT_SETTINGS, self.threads
+                )
+            except concurrent.futures.process.BrokenProcessPool as e:
+                print(f"   ❌ Render pool unavailable for Slide {idx}: {e}")
+                _discard_render_pool(self.pool)
+                return False
+
+        with self._lock:
+            self._futures[idx] = future
+            self._pending_callbacks += 1
+        future.add_done_callback(functools.partial(self._notify, idx))
+        return True
+
+    def _notify(self, idx: int, future: concurrent.futures.Future) -> None:
+        """Tell `on_segment` that slide `idx` finished (path) or failed (None)."""
+        try:
+            if self.on_segment is not None:
+                ok = not future.cancelled() and future.exception() is None
+                self.on_segment(idx, future.result() if ok else None)
+        except Exception as e:
+            print(f"⚠️ Segment callback failed for Slide {idx}: {e}")
+        finally:
+            with self._callbacks_idle:
+                self._pending_callbacks -= 1
+                self._callbacks_idle.notify_all()
+
+    def _wait_for_callbacks(self) -> None:
+        with self._callbacks_idle:
+            self._callbacks_idle.wait_for(lambda: self._pending_callbacks == 0)
+
+    def segments(self) -> List[str]:
+        """Wait for every submitted slide; returns the encoded segments in slide order."""
+        with self._lock:
+            futures = dict(self._futures)
+
+        segment_paths = []
+        for idx in sorted(futures):
+            try:
+                segment_paths.append(futures[idx].result())
+                with self._lock:
+                    self._manifest[str(idx)] = self._inputs[idx]
+                if idx not in self.reused:
+                    print(f"   + Encoded Slide {idx}")
+            except concurrent.futures.process.BrokenProcessPool as e:
+                print(f"   ❌ Error encoding Slide {idx}: render worker died ({e})")
+                _discard_render_pool(self.pool)
+            except Exception as e:
+                print(f"   ❌ Error encoding Slide {idx}: {e}")
+        self._wait_for_callbacks()
+        return segment_paths
+
+    def render(self, output_filename: str) -> int:
+        """Stitch all finished segments into `output_filename`. Returns the slide count."""
+        segment_paths = self.segments()
+        self._prune(segment_paths)
+        if segment_paths:
+            concat_segments(segment_paths, output_filename)
+        if self.reused:
+            print(f"   ♻️  Reused {len(self.reused)}/{len(segment_paths)} segments from the previous render.")
+        return len(segment_paths)
+
+    def _prune(self, segment_paths: List[str]) -> None:
+        """Forget slides that were not part of this render (e.g. the lecture got shorter)."""
+        keep = {os.path.basename(path) for path in segment_paths}
+        with self._lock:
+            self._manifest = {
+                idx: entry for idx, entry in self._manifest.items()
+                if os.path.basename(self.segment_path(int(idx))) in keep
+            }
+            self._write_manifest()
+        if self._owns_dir:
+            return
+        for filename in os.listdir(self.segment_dir):
+            if filename.startswith("segment_") and ".tmp" not in filename and filename not in keep:
+                os.remove(os.path.join(self.segment_dir, filename))
+
+    def close(self) -> None:
+        with self._lock:
+            futures = list(self._futures.values())
+        for future in futures:
+            future.cancel()
+        # Let running encoders finish (and report) before the caller moves on
+        # or their directory is removed
+        concurrent.futures.wait(futures)
+        self._wait_for_callbacks()
+        if self._owns_dir:
+            shutil.rmtree(self.segment_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def assemble_video(
+    slides: Sequence[SlideMedia],
+    output_filename: str,
+    assembler: str = "moviepy"
+) -> int:
+    """
+    Render a finished set of slides in one call (no incremental submission)
+    with any of ASSEMBLERS. Returns the number of slides included.
+    """
+    if assembler == TIMELINE_ASSEMBLER:
+        return assemble_with_moviepy_timeline(slides, output_filename)
+    with SegmentRenderer(assembler) as renderer:
+        for idx, img_path, audio_path in slides:
+            renderer.submit(idx, img_path, audio_path)
+        return renderer.render(output_filename)
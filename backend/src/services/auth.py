@@ -0,0 +1,118 @@
+import time
+import asyncio
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from src.config import (
+    PASSWORD_HASH_ROUNDS,
+    PASSWORD_HASH_MIN_ROUNDS,
+    PASSWORD_HASH_WORKERS,
+    TOKEN_CACHE_SIZE,
+    USER_CONTEXT_CACHE_SIZE,
+)
+
+
+# ============================================================
+# HASH POLICY
+# ============================================================
+
+# New hashes use PASSWORD_HASH_ROUNDS; hashes below the minimum count as
+# deprecated, so `verify_and_update_password` returns an upgraded hash.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=PASSWORD_HASH_ROUNDS,
+    bcrypt__min_rounds=min(PASSWORD_HASH_MIN_ROUNDS, PASSWORD_HASH_ROUNDS),
+)
+
+
+# ============================================================
+# HASHING OFF THE EVENT LOOP
+# ============================================================
+
+# A bcrypt call takes ~100-300 ms of CPU. Running it inline in an async
+# handler stalls every other request; this bounded pool caps how many run
+# at once and leaves the event loop free.
+_hash_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+
+async def _run(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+
+
+async def hash_password(password: str) -> str:
+    """Hash a new password with the configured bcrypt cost."""
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Check a password against its stored hash."""
+    return await _run(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password and, if its hash is below the current cost policy,
+    return a re-hashed replacement to store: (valid, new_hash or None).
+    """
+    return await _run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+# ============================================================
+# VERIFIED TOKEN / USER CONTEXT CACHES
+# ============================================================
+
+class ExpiringLRU:
+    """
+    Thread-safe LRU map whose entries also carry an absolute expiry time
+    (epoch seconds; None = only evicted by size). Expired entries are
+    dropped on lookup, so a cached JWT is never honoured past its `exp`.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Bearer token -> decoded claims, until the token's own `exp`
+token_cache = ExpiringLRU(TOKEN_CACHE_SIZE)
+
+# User id -> user context (profile + subscription flags), for USER_CONTEXT_TTL_SECONDS
+user_context_cache = ExpiringLRU(USER_CONTEXT_CACHE_SIZE)
@@ -0,0 +1,165 @@
+import os
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+# ============================================================
+# CONTENT-ADDRESSED FILE CACHE
+# ============================================================
+
+class BlobCache:
+    """
+    Content-addressed on-disk file cache with size-bounded LRU eviction.
+
+    Entries live at <root>/<key[:2]>/<key><ext>. The cache keeps an
+    in-memory LRU index of entry sizes, built by one scan of the tree on
+    first use; once it grows past `max_bytes` the least recently used files
+    are deleted until it fits again. Hits also bump the file's mtime so the
+    order survives a restart.
+    """
+
+    def __init__(self, root: str, max_bytes: int, name: str = "cache"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[str, int]"] = None  # path -> size, least recent first
+        self._total_bytes = 0
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            encoded = str(part).encode("utf-8")
+            # Length-prefix each part so ("ab", "c") != ("a", "bc")
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}{ext}")
+
+    # --------------------------------------------------------
+    # LOOKUP / STORE
+    # --------------------------------------------------------
+
+    def get(self, key: str, ext: str = "") -> Optional[str]:
+        """Return the cached file path, or None on a miss."""
+        path = self._path(key, ext)
+        try:
+            os.utime(path)
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self._touch(path, size)
+        return path
+
+    def put_bytes(self, key: str, data: bytes, ext: str = "") -> str:
+        path = self._path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, data)
+        self._added(path, len(data))
+        return path
+
+    def put_file(self, key: str, src_path: str, ext: str = "") -> str:
+        path = self._path(key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, path)
+        self._added(path, os.path.getsize(path))
+        return path
+
+    def materialize(self, cached_path: str, dest_path: str) -> str:
+        """
+        Place a cached file at `dest_path`: hard link when possible, copy otherwise.
+        Writers must replace (not rewrite) files in place, or they would
+        corrupt the linked cache entry; see write_atomic.
+        """
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(cached_path, dest_path)
+        except OSError:
+            shutil.copyfile(cached_path, dest_path)
+        return dest_path
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load_index()
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    # --------------------------------------------------------
+    # LRU INDEX / EVICTION (all called with self._lock held)
+    # --------------------------------------------------------
+
+    def _load_index(self) -> None:
+        if self._index is not None:
+            return
+        entries = []
+        os.makedirs(self.root, exist_ok=True)
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, path, st.st_size))
+        self._index = OrderedDict((path, size) for _, path, size in sorted(entries))
+        self._total_bytes = sum(self._index.values())
+
+    def _touch(self, path: str, size: int) -> None:
+        self._load_index()
+        previous = self._index.pop(path, None)
+        if previous is not None:
+            self._total_bytes -= previous
+        self._index[path] = size
+        self._total_bytes += size
+
+    def _added(self, path: str, size: int) -> None:
+        with self._lock:
+            self._touch(path, size)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        evicted = 0
+        while self._index and self._total_bytes > self.max_bytes:
+            path, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            evicted += 1
+        print(f"[{self.name}] Evicted {evicted} file(s) to {self._total_bytes / 1e6:.1f} MB (limit {self.max_bytes / 1e6:.1f} MB)")
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Write via a temp file + rename so `path` gets a fresh inode. Rewriting a
+    hard-linked file in place would also change the cache entry behind it.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
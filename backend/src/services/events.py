@@ -0,0 +1,127 @@
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from src.config import JOB_EVENT_HISTORY, JOB_EVENT_HEARTBEAT_SECONDS
+
+# Event types that end a job's stream
+TERMINAL_EVENTS = ("completed", "failed")
+
+
+# ============================================================
+# PROGRESS EVENT BUS
+# ============================================================
+
+class ProgressBus:
+    """
+    In-process pub/sub for job progress events.
+
+    Events are published from worker threads (pipeline phases, render pool
+    callbacks) and fanned out to asyncio subscribers (SSE connections). Each
+    job keeps a bounded history so a client that connects late, or
+    reconnects with Last-Event-ID, replays what it missed.
+
+    An event is a dict: {"id", "job_id", "type", "data", "ts"}; ids increase
+    per job.
+    """
+
+    def __init__(self, history_limit: int = JOB_EVENT_HISTORY):
+        self.history_limit = max(1, history_limit)
+        self._lock = threading.Lock()
+        self._history: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._seq: Dict[str, int] = {}
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def publish(self, job_id: str, event_type: str, **data: Any) -> Dict[str, Any]:
+        """Record an event for `job_id` and wake its subscribers. Thread-safe."""
+        with self._lock:
+            seq = self._seq.get(job_id, 0) + 1
+            self._seq[job_id] = seq
+            event = {"id": seq, "job_id": job_id, "type": event_type, "data": data, "ts": time.time()}
+            history = self._history.setdefault(job_id, deque(maxlen=self.history_limit))
+            history.append(event)
+            subscribers = list(self._subscribers.get(job_id, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                pass  # subscriber's loop is gone
+        return event
+
+    def history(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [event for event in self._history.get(job_id, ()) if event["id"] > after]
+
+    def discard(self, job_id: str) -> None:
+        """Forget a job's history (called when the job itself is pruned)."""
+        with self._lock:
+            self._history.pop(job_id, None)
+            self._seq.pop(job_id, None)
+
+    async def subscribe(
+        self,
+        job_id: str,
+        after: int = 0,
+        heartbeat: float = JOB_EVENT_HEARTBEAT_SECONDS
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the job's events after id `after`, then live events until a
+        terminal one. Yields None every `heartbeat` seconds of silence so the
+        caller can keep the connection alive.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (loop, queue)
+
+        # Register before reading history so nothing falls between the two
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(subscriber)
+            history = self._history.get(job_id, ())
+            backlog = [event for event in history if event["id"] > after]
+            ended = bool(history) and history[-1]["type"] in TERMINAL_EVENTS
+
+        try:
+            last_id = after
+            for event in backlog:
+                last_id = event["id"]
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+            if ended:
+                return  # reconnected after the job already finished
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event["id"] <= last_id:
+                    continue  # already sent from the backlog
+                last_id = event["id"]
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(job_id, [])
+                if subscriber in subscribers:
+                    subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+
+def format_sse(event: Optional[Dict[str, Any]]) -> str:
+    """Encode an event as a Server-Sent Events frame (None -> heartbeat comment)."""
+    if event is None:
+        return ": keep-alive\n\n"
+    payload = json.dumps({"type": event["type"], "ts": event["ts"], **event["data"]})
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+# Process-wide bus used by the job manager and the API
+progress_bus = ProgressBus()
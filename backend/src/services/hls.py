@@ -0,0 +1,145 @@
+import os
+import shutil
+from typing import Dict, List, Optional, Sequence
+
+from src.config import HLS_RENDITIONS, HLS_SEGMENT_SECONDS
+from src.services.assembly import SEGMENT_SETTINGS, run_ffmpeg, get_render_pool
+
+OUTPUT_FORMATS = ("mp4", "hls")
+
+MASTER_PLAYLIST = "master.m3u8"
+MEDIA_PLAYLIST = "index.m3u8"
+
+# Bitrate caps per rendition height (slides are mostly static, so real
+# bitrates sit far below these; the caps only bound busy diagrams)
+MAX_BITRATES = {1080: "5000k", 720: "2800k", 480: "1400k", 360: "800k", 240: "400k"}
+
+HLS_MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
+
+def hls_dir_for(output_filename: str) -> str:
+    """HLS output lives next to the MP4: lecture.mp4 -> lecture.hls/"""
+    return f"{os.path.splitext(output_filename)[0]}.hls"
+
+
+def rendition_heights(heights: Sequence[int] = HLS_RENDITIONS) -> List[int]:
+    """Requested heights no taller than the source, highest first."""
+    source_height = SEGMENT_SETTINGS["height"]
+    return sorted({h for h in heights if 0 < h <= source_height}, reverse=True)
+
+
+def _rendition_width(height: int) -> int:
+    width = height * SEGMENT_SETTINGS["width"] / SEGMENT_SETTINGS["height"]
+    return int(round(width / 2)) * 2  # x264 needs even dimensions
+
+
+# ============================================================
+# RENDITION ENCODING (runs inside render worker processes)
+# ============================================================
+
+def encode_rendition(mp4_path: str, rendition_dir: str, height: int, segment_seconds: int = HLS_SEGMENT_SECONDS) -> str:
+    """
+    Encode one HLS rendition of the lecture MP4. Keyframes are forced every
+    `segment_seconds` so segment boundaries line up across renditions and
+    players can switch between them cleanly.
+    """
+    os.makedirs(rendition_dir, exist_ok=True)
+    max_bitrate = MAX_BITRATES.get(height, "2000k")
+    run_ffmpeg([
+        "-i", mp4_path,
+        "-vf", f"scale={_rendition_width(height)}:{height}",
+        "-c:v", SEGMENT_SETTINGS["video_codec"],
+        "-preset", SEGMENT_SETTINGS["preset"],
+        "-tune", SEGMENT_SETTINGS["tune"],
+        "-crf", str(SEGMENT_SETTINGS["crf"]),
+        "-maxrate", max_bitrate,
+        "-bufsize", f"{2 * int(max_bitrate[:-1])}k",
+        "-pix_fmt", SEGMENT_SETTINGS["pix_fmt"],
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})",
+        "-c:a", "copy",
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(rendition_dir, "seg_%05d.ts"),
+        os.path.join(rendition_dir, MEDIA_PLAYLIST),
+    ])
+    return rendition_dir
+
+
+def _measure_bandwidth(rendition_dir: str) -> Dict[str, int]:
+    """Peak and average bits/s, from segment sizes and their #EXTINF durations."""
+    peak = 0.0
+    total_bits = 0
+    total_seconds = 0.0
+    duration = None
+    with open(os.path.join(rendition_dir, MEDIA_PLAYLIST), "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#EXTINF:"):
+                duration = float(line[len("#EXTINF:"):].split(",")[0])
+            elif line and not line.startswith("#") and duration:
+                bits = os.path.getsize(os.path.join(rendition_dir, line)) * 8
+                peak = max(peak, bits / duration)
+                total_bits += bits
+                total_seconds += duration
+                duration = None
+    average = total_bits / total_seconds if total_seconds else 0
+    return {"peak": int(peak) or 1, "average": int(average) or 1}
+
+
+def _write_master_playlist(hls_dir: str, heights: Sequence[int]) -> None:
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for height in heights:
+        bandwidth = _measure_bandwidth(os.path.join(hls_dir, str(height)))
+        lines.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth['peak']},"
+            f"AVERAGE-BANDWIDTH={bandwidth['average']},"
+            f"RESOLUTION={_rendition_width(height)}x{height}"
+        )
+        lines.append(f"{height}/{MEDIA_PLAYLIST}")
+    with open(os.path.join(hls_dir, MASTER_PLAYLIST), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+# ============================================================
+# PACKAGING
+# ============================================================
+
+def package_hls(mp4_path: str, hls_dir: Optional[str] = None, heights: Sequence[int] = HLS_RENDITIONS) -> str:
+    """
+    Package a (faststart) lecture MP4 as multi-resolution HLS:
+
+        <hls_dir>/master.m3u8
+        <hls_dir>/<height>/index.m3u8 + seg_NNNNN.ts
+
+    Renditions are encoded in parallel on the render pool. The directory is
+    built under a temp name and swapped in, so players never see a partial
+    ladder. Returns the path of the master playlist.
+    """
+    hls_dir = hls_dir or hls_dir_for(mp4_path)
+    heights = rendition_heights(heights)
+    if not heights:
+        raise ValueError(f"No HLS renditions at or below {SEGMENT_SETTINGS['height']}p")
+
+    build_dir = f"{hls_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    try:
+        pool = get_render_pool()
+        futures = [
+            pool.submit(encode_rendition, mp4_path, os.path.join(build_dir, str(height)), height)
+            for height in heights
+        ]
+        for future in futures:
+            future.result()
+        _write_master_playlist(build_dir, heights)
+
+        shutil.rmtree(hls_dir, ignore_errors=True)
+        os.replace(build_dir, hls_dir)
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    print(f"   + HLS ladder ready: {', '.join(f'{h}p' for h in heights)}")
+    return os.path.join(hls_dir, MASTER_PLAYLIST)
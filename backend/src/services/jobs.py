@@ -0,0 +1,217 @@
+import uuid
+import threading
+import concurrent.futures
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import JOB_MAX_WORKERS, JOB_HISTORY_LIMIT
+from src.services.events import ProgressBus, progress_bus
+from src.LLM.budget import bind_job
+
+
+# ============================================================
+# JOB STATE
+# ============================================================
+
+class Job:
+    """
+    State of a single background video-generation job.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, owner: str, topic: str, bus: Optional[ProgressBus] = None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.topic = topic
+        self.status = Job.QUEUED
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result: Any = None
+        self.hls_url: Optional[str] = None
+        self.live_url: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.bus = bus
+        # Single-flight: identical requests attach to one leader job and mirror it
+        self.dedup_key: Optional[str] = None
+        self.leader_id: Optional[str] = None
+        self.followers: List["Job"] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in (Job.COMPLETED, Job.FAILED)
+
+    def report_progress(self, stage: str, progress: float) -> None:
+        """Progress callback handed to the pipeline (stage name, 0.0–1.0)."""
+        self.stage = stage
+        self.progress = max(self.progress, min(float(progress), 1.0))
+        for follower in list(self.followers):
+            follower.stage = self.stage
+            follower.progress = self.progress
+        self.emit("progress", stage=stage, progress=round(self.progress, 3))
+
+    def emit(self, event_type: str, **data: Any) -> None:
+        """Event callback handed to the pipeline; publishes on the job's bus (and its followers')."""
+        if self.bus is not None:
+            self.bus.publish(self.id, event_type, **data)
+        for follower in list(self.followers):
+            follower.emit(event_type, **data)
+
+    def publish_live(self, live_url: str) -> None:
+        """Expose the live playlist once the pipeline has created it (on this job and its followers)."""
+        self.live_url = live_url
+        for follower in list(self.followers):
+            follower.live_url = live_url
+        self.emit("live", live_url=live_url)
+
+    def mirror(self, leader: "Job") -> None:
+        """Copy a leader's state onto this follower."""
+        for field in ("status", "stage", "progress", "result", "hls_url", "live_url", "error", "started_at", "finished_at"):
+            setattr(self, field, getattr(leader, field))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "topic": self.topic,
+            "leader_job_id": self.leader_id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "video_url": self.result if self.status == Job.COMPLETED else None,
+            "hls_url": self.hls_url if self.status == Job.COMPLETED else None,
+            "live_url": self.live_url,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+# ============================================================
+# JOB MANAGER (BOUNDED WORKER POOL)
+# ============================================================
+
+class JobManager:
+    """
+    Runs blocking generation work on a bounded thread pool so request
+    handlers can return a job id immediately.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = JOB_MAX_WORKERS,
+        history_limit: int = JOB_HISTORY_LIMIT,
+        bus: ProgressBus = progress_bus
+    ):
+        self.max_workers = max(1, max_workers)
+        self.history_limit = history_limit
+        self.bus = bus
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="video-job",
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._in_flight: Dict[str, Job] = {}  # dedup key -> leader job
+        self._lock = threading.Lock()
+
+    def submit(self, owner: str, topic: str, fn: Callable[[Job], Any], dedup_key: Optional[str] = None) -> Job:
+        """
+        Queue `fn(job)` on the worker pool. Its return value becomes `job.result`.
+
+        With `dedup_key`, a request matching a job that is still queued or
+        running does not run `fn`: it gets its own job id that follows the
+        in-flight one (same progress events, same result).
+        """
+        job = Job(owner, topic, bus=self.bus)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            leader = self._in_flight.get(dedup_key) if dedup_key else None
+            if leader is not None:
+                job.mirror(leader)
+                job.leader_id = leader.id
+                leader.followers.append(job)
+            elif dedup_key:
+                job.dedup_key = dedup_key
+                self._in_flight[dedup_key] = job
+
+        if leader is not None:
+            job.emit("queued", topic=topic, leader_job_id=leader.id)
+            print(f"[Jobs] Job {job.id} attached to in-flight job {leader.id} for topic '{topic}'")
+            return job
+
+        job.emit("queued", topic=topic)
+        self._executor.submit(self._run, job, fn)
+        print(f"[Jobs] Queued job {job.id} for topic '{topic}'")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_for_owner(self, owner: str) -> List[Job]:
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.owner == owner]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        job.status = Job.RUNNING
+        job.stage = "starting"
+        job.started_at = datetime.utcnow()
+        for follower in list(job.followers):
+            follower.mirror(job)
+        job.emit("running")
+        # Provider calls made for this job share its fair-share budget slot
+        bind_job(job.id)
+        try:
+            job.result = fn(job)
+            job.status = Job.COMPLETED
+            job.stage = "done"
+            job.progress = 1.0
+            print(f"[Jobs] Job {job.id} completed.")
+        except Exception as e:
+            job.error = str(e)
+            job.status = Job.FAILED
+            print(f"[Jobs] Job {job.id} failed: {e}")
+        finally:
+            job.finished_at = datetime.utcnow()
+            bind_job(None)
+
+        # Stop accepting followers before copying the outcome to them
+        with self._lock:
+            if job.dedup_key and self._in_flight.get(job.dedup_key) is job:
+                del self._in_flight[job.dedup_key]
+            followers = list(job.followers)
+        for follower in followers:
+            follower.mirror(job)
+        if followers:
+            print(f"[Jobs] Job {job.id} result shared with {len(followers)} attached job(s).")
+
+        # Terminal event last, so subscribers see the final job state
+        state = job.to_dict()
+        job.emit(job.status, video_url=state["video_url"], hls_url=state["hls_url"], error=job.error)
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs once the history limit is exceeded."""
+        if len(self._jobs) <= self.history_limit:
+            return
+        finished = sorted(
+            (job for job in self._jobs.values() if job.done),
+            key=lambda job: job.finished_at or job.created_at,
+        )
+        for job in finished[: len(self._jobs) - self.history_limit]:
+            del self._jobs[job.id]
+            self.bus.discard(job.id)
+
+
+# Process-wide manager used by the API
+job_manager = JobManager()
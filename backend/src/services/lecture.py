@@ -1,8 +1,21 @@
 import os
 import json
-from typing import List, Union, Dict, Any, Tuple
+import asyncio
+import concurrent.futures
+from typing import List, Union, Dict, Any, Tuple, Iterable, Iterator, AsyncIterable, AsyncIterator
 from PyPDF2 import PdfReader
-from src.LLM.ChatGPT import ChatGPTClient
+from src.LLM.ChatGPT import ChatGPTClient, get_shared_client, get_shared_async_client
+from src.LLM.retry import RetryPolicy
+from src.LLM.budget import bind_job, current_job
+from src.config import (
+    SLIDE_CONTENT_CHUNK_MODE,
+    SLIDE_CONTENT_CHUNK_SIZE,
+    SLIDE_CONTENT_MAX_WORKERS,
+    LLM_FAST_STAGE_DEADLINE_SECONDS,
+)
+
+# Objectives and plan gate every later stage: tighter deadline, hedged when LLM_HEDGE_ENABLED
+FAST_STAGE_POLICY = RetryPolicy(deadline=LLM_FAST_STAGE_DEADLINE_SECONDS)
 
 
 # -----------------------------------------------------------
@@ -45,6 +58,120 @@ def normalize_json_array(raw: str) -> List[Dict[str, Any]]:
     return json.loads(cleaned)
 
 
+def _parse_slides(raw: str) -> List[Dict[str, Any]]:
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return normalize_json_array(raw)
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser for a JSON array of objects arriving in text chunks.
+
+    `feed()` returns every top-level object completed by the new chunk.
+    Text before the opening "[" (e.g. a ```json fence) is ignored, and
+    everything after the array's closing "]" is dropped.
+    """
+
+    def __init__(self):
+        self.in_array = False
+        self.finished = False
+        self.depth = 0            # brace/bracket depth inside the top-level array
+        self.in_string = False
+        self.escaped = False
+        self.buffer: List[str] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        completed = []
+        for ch in chunk:
+            if self.finished:
+                break
+            if not self.in_array:
+                if ch == "[":
+                    self.in_array = True
+                continue
+
+            if self.depth > 0:
+                self.buffer.append(ch)
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+
+            if ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                if self.depth == 0:
+                    self.buffer = [ch]
+                self.depth += 1
+            elif ch in "}]":
+                if self.depth == 0:
+                    # End of the top-level array
+                    self.finished = True
+                    break
+                self.depth -= 1
+                if self.depth == 0:
+                    completed.append(json.loads("".join(self.buffer)))
+                    self.buffer = []
+        return completed
+
+    def close(self) -> None:
+        """Raise unless the array's closing "]" was seen (truncated or missing array)."""
+        if self.finished:
+            return
+        if not self.in_array:
+            raise ValueError("Streamed reply contains no JSON array.")
+        if self.depth > 0:
+            raise ValueError("Streamed JSON array was truncated mid-object.")
+        raise ValueError("Streamed JSON array was truncated (no closing bracket).")
+
+
+def is_complete_json_array(text: str) -> bool:
+    """True if `text` holds a whole JSON array (used to decide whether a streamed reply may be cached)."""
+    parser = JsonArrayStreamParser()
+    try:
+        parser.feed(text)
+    except json.JSONDecodeError:
+        return False
+    return parser.finished
+
+
+def iter_json_array_objects(chunks: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally parse a JSON array of objects from streamed text chunks,
+    yielding each top-level object as soon as its closing brace arrives.
+    Raises ValueError if the stream ends before the array is closed.
+    """
+    parser = JsonArrayStreamParser()
+    for chunk in chunks:
+        if not parser.finished:
+            yield from parser.feed(chunk)
+        # else: keep reading the trailing text so the stream ends (and can be cached)
+    parser.close()
+
+
+async def aiter_json_array_objects(chunks: AsyncIterable[str]) -> AsyncIterator[Dict[str, Any]]:
+    """Async counterpart of iter_json_array_objects."""
+    parser = JsonArrayStreamParser()
+    async for chunk in chunks:
+        if not parser.finished:
+            for obj in parser.feed(chunk):
+                yield obj
+    parser.close()
+
+
+def _check_slide_count(slide_plan: List[Dict[str, Any]], count: int) -> None:
+    # A short streamed lecture must fail here, before video.py stores it as the topic's slides
+    if count != len(slide_plan):
+        raise ValueError(f"Planned {len(slide_plan)} slides but the stream produced {count}.")
+
+
 # -----------------------------------------------------------
 # GENERATE LEARNING OBJECTIVES
 # -----------------------------------------------------------
@@ -59,8 +186,13 @@ def generate_learning_objectives(input_data: Union[str, os.PathLike]) -> List[st
     - List[str] of 8–12 very clear, concrete learning objectives
     """
 
-    client = ChatGPTClient()
+    client = get_shared_client()
+    system_prompt, user_prompt = _objectives_prompts(input_data)
+    raw_output = client.chat(system_prompt, user_prompt, policy=FAST_STAGE_POLICY, hedge_key="objectives")
+    return _parse_objectives(raw_output)
+
 
+def _objectives_prompts(input_data: Union[str, os.PathLike]) -> Tuple[str, str]:
     system_prompt = (
         "You are an expert curriculum designer. Break topics into extremely specific, "
         "step-by-step learning objectives. Assume the audience has no prior background. "
@@ -85,8 +217,10 @@ def generate_learning_objectives(input_data: Union[str, os.PathLike]) -> List[st
             "'Derive the SGD update rule', 'Compute SGD steps on a simple function'."
         )
 
-    raw_output = client.chat(system_prompt, user_prompt)
+    return system_prompt, user_prompt
 
+
+def _parse_objectives(raw_output: str) -> List[str]:
     objectives = []
     for line in raw_output.splitlines():
         if line.strip():
@@ -101,15 +235,8 @@ def generate_learning_objectives(input_data: Union[str, os.PathLike]) -> List[st
 # STAGE 1: GENERATE SLIDE PLAN (TITLES ONLY)
 # -----------------------------------------------------------
 
-def generate_slide_plan(objectives: List[str]) -> List[Dict[str, Any]]:
-    """
-    Produce a globally consistent plan of slides BEFORE generating full scripts.
+SLIDE_PLAN_SYSTEM_PROMPT = (
     """
-    client = ChatGPTClient()
-    joined_objectives = "\n".join([f"{i+1}. {obj}" for i, obj in enumerate(objectives)])
-
-    system_prompt = (
-        """
         You are an enthusiastic and friendly educator who teaches complex academic topics 
         in a clear, structured, and highly engaging way. You combine the clarity of a great 
         YouTube teacher with the rigor of a university lecturer.
@@ -149,38 +276,36 @@ def generate_slide_plan(objectives: List[str]) -> List[Dict[str, Any]]:
                 "title": "Historical Background (1.1)"
             }
         ]
-        """
-    )
+    """
+)
+
+
+def generate_slide_plan(objectives: List[str]) -> List[Dict[str, Any]]:
+    """
+    Produce a globally consistent plan of slides BEFORE generating full scripts.
+    """
+    client = get_shared_client()
+    raw = client.chat(SLIDE_PLAN_SYSTEM_PROMPT, _slide_plan_user_prompt(objectives), policy=FAST_STAGE_POLICY, hedge_key="plan")
+    return _parse_slides(raw)
+
 
-    user_prompt = (
+def _slide_plan_user_prompt(objectives: List[str]) -> str:
+    joined_objectives = "\n".join([f"{i+1}. {obj}" for i, obj in enumerate(objectives)])
+
+    return (
         "Here are the learning objectives for a full lecture:\n\n"
         f"{joined_objectives}\n\n"
         "Create a globally consistent SLIDE PLAN.\n"
         "Return ONLY the JSON array."
     )
 
-    raw = client.chat(system_prompt, user_prompt)
-
-    try:
-        plan = json.loads(raw)
-    except json.JSONDecodeError:
-        plan = normalize_json_array(raw)
-
-    return plan
-
 
 # -----------------------------------------------------------
 # STAGE 2: GENERATE FULL SLIDE CONTENT FROM PLAN
 # -----------------------------------------------------------
 
-def generate_slide_content(slide_plan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-
-    client = ChatGPTClient()
-
-    plan_json = json.dumps(slide_plan, ensure_ascii=False, indent=2)
-
-    system_prompt = (
-        """
+SLIDE_CONTENT_SYSTEM_PROMPT = (
+    """
         You are an enthusiastic and friendly educator who explains topics clearly, 
         rigorously, and in a spoken-narration style appropriate for a video lecture inspired by
         the style of StatQuest.
@@ -210,9 +335,49 @@ def generate_slide_content(slide_plan: List[Dict[str, Any]]) -> List[Dict[str, A
           }
         ]
     """
-    )
+)
+
+
+def chunk_slide_plan(
+    slide_plan: List[Dict[str, Any]],
+    mode: str = "fixed",
+    chunk_size: int = SLIDE_CONTENT_CHUNK_SIZE
+) -> List[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Split a slide plan into ordered chunks.
+
+    mode="objective": one chunk per consecutive run of the same objective_index
+                      (runs longer than chunk_size are split further).
+    mode="fixed":     fixed-size chunks of chunk_size slides.
+
+    Returns (start_offset, slides) pairs in plan order.
+    """
+    chunk_size = max(1, chunk_size)
+    groups: List[Tuple[int, List[Dict[str, Any]]]] = []
+
+    if mode == "objective":
+        for offset, slide in enumerate(slide_plan):
+            key = slide.get("objective_index")
+            if groups and groups[-1][1][-1].get("objective_index") == key:
+                groups[-1][1].append(slide)
+            else:
+                groups.append((offset, [slide]))
+    elif mode == "fixed":
+        groups = [(0, list(slide_plan))]
+    else:
+        raise ValueError(f"Unknown chunk mode: {mode}")
+
+    chunks = []
+    for start, slides in groups:
+        for i in range(0, len(slides), chunk_size):
+            chunks.append((start + i, slides[i:i + chunk_size]))
+    return chunks
+
+
+def _slide_content_user_prompt(slide_plan: List[Dict[str, Any]]) -> str:
+    plan_json = json.dumps(slide_plan, ensure_ascii=False, indent=2)
 
-    user_prompt = (
+    return (
         "Here is the slide plan JSON:\n\n"
         f"{plan_json}\n\n"
         "Fill in the complete content for EVERY slide.\n"
@@ -220,15 +385,168 @@ def generate_slide_content(slide_plan: List[Dict[str, Any]]) -> List[Dict[str, A
     )
 
 
-    raw = client.chat(system_prompt, user_prompt)
+def _slide_chunk_user_prompt(slide_plan: List[Dict[str, Any]], start: int, chunk: List[Dict[str, Any]]) -> str:
+    end = start + len(chunk)
+    outline = "\n".join(
+        f"{i+1}. {slide.get('title', 'Untitled')}" for i, slide in enumerate(slide_plan)
+    )
+    previous_title = slide_plan[start - 1].get("title", "") if start > 0 else None
+    next_title = slide_plan[end].get("title", "") if end < len(slide_plan) else None
+
+    context = [f"You are writing slides {start+1}–{end} of a {len(slide_plan)}-slide lecture."]
+    if previous_title:
+        context.append(f"The slide right BEFORE this section is: \"{previous_title}\". Open with a transition from it.")
+    else:
+        context.append("This section OPENS the lecture.")
+    if next_title:
+        context.append(f"The slide right AFTER this section is: \"{next_title}\". End with a lead-in to it.")
+    else:
+        context.append("This section ENDS the lecture.")
+
+    return (
+        "Here is the full lecture outline for global context:\n\n"
+        f"{outline}\n\n"
+        + "\n".join(context) + "\n\n"
+        "Here is the slide plan JSON for THIS section only:\n\n"
+        f"{json.dumps(chunk, ensure_ascii=False, indent=2)}\n\n"
+        "Fill in the complete content for EVERY slide in this section, and ONLY those slides.\n"
+        "Return ONLY the JSON array."
+    )
+
+
+def _generate_slide_chunk(
+    client: ChatGPTClient,
+    slide_plan: List[Dict[str, Any]],
+    start: int,
+    chunk: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Generate content for one chunk of the plan. The full outline and the
+    neighbouring slide titles are passed along so transitions stay coherent.
+    """
+    user_prompt = _slide_chunk_user_prompt(slide_plan, start, chunk)
+    raw = client.chat(SLIDE_CONTENT_SYSTEM_PROMPT, user_prompt)
+    return _parse_slides(raw)
 
-    try:
-        slides = json.loads(raw)
-    except json.JSONDecodeError:
-        slides = normalize_json_array(raw)
 
+def generate_slide_content(
+    slide_plan: List[Dict[str, Any]],
+    chunk_mode: str = SLIDE_CONTENT_CHUNK_MODE,
+    chunk_size: int = SLIDE_CONTENT_CHUNK_SIZE,
+    max_workers: int = SLIDE_CONTENT_MAX_WORKERS
+) -> List[Dict[str, Any]]:
+    """
+    Fill in script / visualization / bulletpoints for every planned slide.
+
+    chunk_mode="single" sends the whole plan in one request. "objective" and
+    "fixed" split the plan (see chunk_slide_plan), generate the chunks
+    concurrently with up to `max_workers` requests in flight, and merge the
+    results back in plan order.
+    """
+    client = get_shared_client()
+
+    if chunk_mode == "single" or len(slide_plan) <= 1:
+        raw = client.chat(SLIDE_CONTENT_SYSTEM_PROMPT, _slide_content_user_prompt(slide_plan))
+        return _parse_slides(raw)
+
+    chunks = chunk_slide_plan(slide_plan, mode=chunk_mode, chunk_size=chunk_size)
+    print(f"[Lecture] Generating {len(slide_plan)} slides in {len(chunks)} chunks (Workers: {max_workers})...")
+
+    results: List[List[Dict[str, Any]]] = [[] for _ in chunks]
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, max_workers), initializer=bind_job, initargs=(current_job(),)
+    ) as executor:
+        future_to_position = {
+            executor.submit(_generate_slide_chunk, client, slide_plan, start, chunk): position
+            for position, (start, chunk) in enumerate(chunks)
+        }
+        for future in concurrent.futures.as_completed(future_to_position):
+            results[future_to_position[future]] = future.result()
+
+    slides = [slide for chunk_slides in results for slide in chunk_slides]
+    if len(slides) != len(slide_plan):
+        print(f"⚠️ Warning: Planned {len(slide_plan)} slides but generated {len(slides)}.")
+    return slides
+
+def stream_slide_content(slide_plan: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of generate_slide_content (single request).
+    Yields each slide as soon as the model finishes writing it, so image and
+    voiceover work for early slides can start while later ones are generated.
+    Raises ValueError at the end if the array was cut off or the slide count
+    differs from the plan.
+    """
+    client = get_shared_client()
+    user_prompt = _slide_content_user_prompt(slide_plan)
+    count = 0
+    stream = client.chat_stream(SLIDE_CONTENT_SYSTEM_PROMPT, user_prompt, complete=is_complete_json_array)
+    for slide in iter_json_array_objects(stream):
+        count += 1
+        yield slide
+    _check_slide_count(slide_plan, count)
+
+
+# -----------------------------------------------------------
+# ASYNC VARIANTS (single event loop, no thread per call)
+# -----------------------------------------------------------
+
+async def generate_learning_objectives_async(input_data: Union[str, os.PathLike]) -> List[str]:
+    """Async counterpart of generate_learning_objectives."""
+    client = get_shared_async_client()
+    # PDF extraction is blocking file I/O
+    system_prompt, user_prompt = await asyncio.to_thread(_objectives_prompts, input_data)
+    raw_output = await client.chat(system_prompt, user_prompt, policy=FAST_STAGE_POLICY, hedge_key="objectives")
+    return _parse_objectives(raw_output)
+
+
+async def generate_slide_plan_async(objectives: List[str]) -> List[Dict[str, Any]]:
+    """Async counterpart of generate_slide_plan."""
+    client = get_shared_async_client()
+    raw = await client.chat(SLIDE_PLAN_SYSTEM_PROMPT, _slide_plan_user_prompt(objectives), policy=FAST_STAGE_POLICY, hedge_key="plan")
+    return _parse_slides(raw)
+
+
+async def generate_slide_content_async(
+    slide_plan: List[Dict[str, Any]],
+    chunk_mode: str = SLIDE_CONTENT_CHUNK_MODE,
+    chunk_size: int = SLIDE_CONTENT_CHUNK_SIZE,
+    max_concurrency: int = SLIDE_CONTENT_MAX_WORKERS
+) -> List[Dict[str, Any]]:
+    """Async counterpart of generate_slide_content (chunks run as concurrent tasks)."""
+    client = get_shared_async_client()
+
+    if chunk_mode == "single" or len(slide_plan) <= 1:
+        raw = await client.chat(SLIDE_CONTENT_SYSTEM_PROMPT, _slide_content_user_prompt(slide_plan))
+        return _parse_slides(raw)
+
+    chunks = chunk_slide_plan(slide_plan, mode=chunk_mode, chunk_size=chunk_size)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_chunk(start: int, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            raw = await client.chat(SLIDE_CONTENT_SYSTEM_PROMPT, _slide_chunk_user_prompt(slide_plan, start, chunk))
+        return _parse_slides(raw)
+
+    results = await asyncio.gather(*(run_chunk(start, chunk) for start, chunk in chunks))
+
+    slides = [slide for chunk_slides in results for slide in chunk_slides]
+    if len(slides) != len(slide_plan):
+        print(f"⚠️ Warning: Planned {len(slide_plan)} slides but generated {len(slides)}.")
     return slides
 
+
+async def stream_slide_content_async(slide_plan: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Async counterpart of stream_slide_content."""
+    client = get_shared_async_client()
+    user_prompt = _slide_content_user_prompt(slide_plan)
+    count = 0
+    stream = client.chat_stream(SLIDE_CONTENT_SYSTEM_PROMPT, user_prompt, complete=is_complete_json_array)
+    async for slide in aiter_json_array_objects(stream):
+        count += 1
+        yield slide
+    _check_slide_count(slide_plan, count)
+
+
 # -----------------------------------------------------------
 # EXTRACTION UTILITIES
 # -----------------------------------------------------------
@@ -0,0 +1,218 @@
+import os
+import math
+import time
+import shutil
+import threading
+import concurrent.futures
+from typing import Dict, List, Optional, Tuple
+
+from src.config import LIVE_RETENTION_SECONDS
+from src.services.assembly import SEGMENT_SETTINGS, run_ffmpeg
+
+LIVE_PLAYLIST = "index.m3u8"
+
+# Slide segments have a keyframe every gop_seconds, so chunks cut at that
+# interval never exceed it; the target duration must hold for the whole event
+CHUNK_SECONDS = SEGMENT_SETTINGS["gop_seconds"]
+TARGET_DURATION = CHUNK_SECONDS + 1
+
+# Slide 1 starts a little past zero: the muxer shifts a zero-offset segment
+# (B-frame lead-in) differently from later ones, which would make slide 2
+# overlap slide 1 on the timeline
+TIMELINE_START = 1.0
+
+LIVE_SUFFIX = ".live"
+
+# Live dirs of playlists still being written by this process; sweeps skip them
+_open_dirs = set()
+_open_dirs_lock = threading.Lock()
+
+
+def live_dir_for(output_filename: str) -> str:
+    """The growing playlist lives next to the output: lecture.mp4 -> lecture.live/"""
+    return f"{os.path.splitext(output_filename)[0]}{LIVE_SUFFIX}"
+
+
+class LivePlaylist:
+    """
+    HLS EVENT playlist that grows as slide segments finish, so playback of
+    slide 1 can start while later slides are still rendering:
+
+        <live_dir>/index.m3u8
+        <live_dir>/slide_NNN_MMM.ts
+
+    Segments may finish in any order but are published strictly in slide
+    order. Each slide's MP4 segment is remuxed (stream copy) to MPEG-TS
+    chunks whose timestamps continue from the previous slide, so the
+    player sees one continuous timeline. `finish()` ends the event.
+    """
+
+    def __init__(self, live_dir: str):
+        self.live_dir = live_dir
+        with _open_dirs_lock:
+            _open_dirs.add(os.path.abspath(live_dir))
+        sweep_live_dirs(os.path.dirname(live_dir) or ".")
+        # Chunks from an earlier render of the same output would be stale
+        shutil.rmtree(live_dir, ignore_errors=True)
+        os.makedirs(live_dir, exist_ok=True)
+        self._pending: Dict[int, Optional[str]] = {}
+        self._next_idx = 1
+        self._offset = TIMELINE_START
+        self._entries: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._finished = False
+        # One publisher thread keeps remuxing and playlist writes in order
+        self._publisher = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-playlist")
+        self._write_playlist(ended=False)
+
+    @property
+    def published(self) -> int:
+        return self._next_idx - 1
+
+    def add(self, idx: int, segment_path: Optional[str]) -> None:
+        """
+        Hand over slide `idx`'s finished segment, or None if the slide failed
+        (it is skipped so later slides are not held back). Raises
+        RuntimeError once `finish()` has been called.
+        """
+        with self._lock:
+            if self._finished:
+                raise RuntimeError(f"Live playlist already finished; Slide {idx} arrived too late")
+            self._pending[idx] = segment_path
+            self._publisher.submit(self._drain)
+
+    def finish(self) -> None:
+        """Publish whatever is still pending and mark the playlist complete."""
+        with self._lock:
+            self._finished = True
+            self._publisher.submit(self._drain, final=True)
+        self._publisher.shutdown(wait=True)
+        with _open_dirs_lock:
+            _open_dirs.discard(os.path.abspath(self.live_dir))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
+        return False
+
+    # --------------------------------------------------------
+    # PUBLISHER THREAD
+    # --------------------------------------------------------
+
+    def _drain(self, final: bool = False) -> None:
+        while True:
+            with self._lock:
+                if self._next_idx not in self._pending:
+                    if not final or not self._pending:
+                        break
+                    # A slide never reported back; skip past the gap
+                    self._next_idx = min(self._pending)
+                    continue
+                segment_path = self._pending.pop(self._next_idx)
+                idx = self._next_idx
+                self._next_idx += 1
+
+            if segment_path:
+                try:
+                    self._publish(idx, segment_path)
+                except Exception as e:
+                    print(f"⚠️ Live playlist: Slide {idx} not published: {e}")
+            else:
+                print(f"   Live playlist: skipping Slide {idx}.")
+
+        if final:
+            self._write_playlist(ended=True)
+
+    def _publish(self, idx: int, segment_path: str) -> None:
+        chunk_playlist = os.path.join(self.live_dir, f"slide_{idx:03d}.m3u8")
+        run_ffmpeg([
+            "-i", segment_path,
+            "-c", "copy",
+            "-output_ts_offset", f"{self._offset:.6f}",
+            "-f", "hls",
+            "-hls_time", str(CHUNK_SECONDS),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(self.live_dir, f"slide_{idx:03d}_%03d.ts"),
+            chunk_playlist,
+        ])
+        chunks = _read_chunks(chunk_playlist)
+        os.remove(chunk_playlist)
+
+        self._entries.extend(chunks)
+        self._offset += sum(duration for duration, _ in chunks)
+        self._write_playlist(ended=False)
+        print(f"   ▶️  Live playlist: Slide {idx} published ({self._offset - TIMELINE_START:.1f}s playable).")
+
+    def _write_playlist(self, ended: bool) -> None:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{TARGET_DURATION}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for duration, filename in self._entries:
+            lines.append(f"#EXTINF:{duration:.6f},")
+            lines.append(filename)
+        if ended:
+            lines.append("#EXT-X-ENDLIST")
+
+        # Players poll this file; swap it in whole
+        path = os.path.join(self.live_dir, LIVE_PLAYLIST)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+# ============================================================
+# RETENTION
+# ============================================================
+
+def sweep_live_dirs(root: str, retention_seconds: float = LIVE_RETENTION_SECONDS) -> int:
+    """
+    Remove <output>.live/ dirs in `root` untouched for longer than
+    `retention_seconds`, except ones still being written. By then the job
+    has finished and its MP4 is the way to watch. Returns how many were removed.
+    """
+    if not os.path.isdir(root):
+        return 0
+
+    cutoff = time.time() - retention_seconds
+    removed = 0
+    for entry in os.scandir(root):
+        if not entry.name.endswith(LIVE_SUFFIX) or not entry.is_dir(follow_symlinks=False):
+            continue
+        with _open_dirs_lock:
+            if os.path.abspath(entry.path) in _open_dirs:
+                continue
+        try:
+            if entry.stat().st_mtime > cutoff:
+                continue
+        except FileNotFoundError:
+            continue  # removed concurrently
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed += 1
+
+    if removed:
+        print(f"[Live] Swept {removed} expired live playlist(s) from {root}")
+    return removed
+
+
+def _read_chunks(playlist_path: str) -> List[Tuple[float, str]]:
+    """(duration, filename) pairs from a media playlist written by ffmpeg."""
+    chunks = []
+    duration = None
+    with open(playlist_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#EXTINF:"):
+                duration = float(line[len("#EXTINF:"):].split(",")[0])
+            elif line and not line.startswith("#") and duration is not None:
+                if math.ceil(duration) > TARGET_DURATION:
+                    print(f"⚠️ Live chunk {line} is {duration:.2f}s (target {TARGET_DURATION}s)")
+                chunks.append((duration, line))
+                duration = None
+    return chunks
@@ -0,0 +1,162 @@
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from starlette.datastructures import Headers
+from starlette.responses import (
+    FileResponse,
+    MalformedRangeHeader,
+    PlainTextResponse,
+    RangeNotSatisfiable,
+    Response,
+)
+from starlette.types import Receive, Scope, Send
+
+from src.config import MEDIA_CACHE_CONTROL, SENDFILE_OFFLOAD_HEADER, SENDFILE_OFFLOAD_PREFIX
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+# ============================================================
+# VALIDATORS
+# ============================================================
+
+def strong_etag(stat_result: os.stat_result) -> str:
+    """
+    Strong validator from (size, mtime in ns, inode): rewriting or replacing
+    a file changes at least one of them.
+    """
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_ino:x}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison (RFC 9110 §13.1.2)
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def is_not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since when it is absent."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return int(mtime) <= since
+    return False
+
+
+# ============================================================
+# RESPONSES
+# ============================================================
+
+class MediaFileResponse(FileResponse):
+    """
+    FileResponse (Range / 206 / If-Range handled by Starlette) that hands the
+    body to the server's zero-copy sendfile path when the ASGI server
+    advertises the `http.response.zerocopysend` extension.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = Headers(scope=scope)
+        http_range = headers.get("range")
+        http_if_range = headers.get("if-range")
+        file_size = self.stat_result.st_size
+        use_range = http_range is not None and (http_if_range is None or self._should_use_range(http_if_range))
+
+        ranges = None
+        if use_range:
+            try:
+                ranges = self._parse_range_header(http_range, file_size)
+            except RangeNotSatisfiable:
+                # Starlette omits the unit; RFC 9110 §14.4 wants "bytes */<size>"
+                response = PlainTextResponse(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+                return await response(scope, receive, send)
+            except MalformedRangeHeader:
+                return await super().__call__(scope, receive, send)
+
+        if ZEROCOPY_EXTENSION not in scope.get("extensions", {}) or scope["method"].upper() == "HEAD":
+            return await super().__call__(scope, receive, send)
+
+        if ranges is None:
+            await self._zerocopy(send, self.status_code, 0, file_size)
+            return
+
+        if len(ranges) != 1:
+            # multipart/byteranges interleaves headers with file data
+            return await super().__call__(scope, receive, send)
+
+        start, end = ranges[0]
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.headers["content-length"] = str(end - start)
+        await self._zerocopy(send, 206, start, end - start)
+
+    async def _zerocopy(self, send: Send, status: int, offset: int, count: int) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": self.raw_headers})
+        with open(self.path, "rb") as file:
+            await send({
+                "type": ZEROCOPY_EXTENSION,
+                "file": file,
+                "offset": offset,
+                "count": count,
+                "more_body": False,
+            })
+
+
+def serve_media_file(
+    request: Request,
+    path: str,
+    media_type: str,
+    filename: Optional[str] = None,
+    cache_control: str = MEDIA_CACHE_CONTROL,
+    offload_uri: Optional[str] = None
+) -> Response:
+    """
+    Serve a file with strong ETag / Last-Modified validators, conditional
+    GET (304) and byte ranges (206).
+
+    When SENDFILE_OFFLOAD_HEADER is set (e.g. "X-Accel-Redirect" behind
+    nginx), the body is left to the proxy, which streams it with sendfile(2);
+    `offload_uri` is the file's path under SENDFILE_OFFLOAD_PREFIX.
+    """
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    etag = strong_etag(stat_result)
+    validators = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": cache_control,
+    }
+
+    if request.method in ("GET", "HEAD") and is_not_modified(request.headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=validators)
+
+    if SENDFILE_OFFLOAD_HEADER and offload_uri:
+        offload_headers = {
+            **validators,
+            SENDFILE_OFFLOAD_HEADER: f"{SENDFILE_OFFLOAD_PREFIX.rstrip('/')}/{offload_uri.lstrip('/')}",
+        }
+        return Response(media_type=media_type, headers=offload_headers)
+
+    return MediaFileResponse(
+        path,
+        media_type=media_type,
+        filename=filename,
+        headers=validators,
+        stat_result=stat_result,
+    )
@@ -0,0 +1,177 @@
+import os
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import src.services.visualization as visualization
+import src.services.voice as voice
+from src.LLM.Gemini import GeminiClient
+from src.LLM.budget import bind_job, current_job
+from src.config import IMAGE_CONCURRENCY_MAX
+
+
+# ============================================================
+# SLIDE CONTENT -> VISUALIZATION INPUT
+# ============================================================
+
+def to_visualization_slide(slide: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a generated slide (lecture.py format) to the visualization input format."""
+    return {
+        "title": slide.get("title", "Untitled"),
+        "bulletpoints": slide.get("bulletpoints", []),
+        "visual_step_description": slide.get("visualization", "")
+    }
+
+
+def _completed(value: Any) -> concurrent.futures.Future:
+    future = concurrent.futures.Future()
+    future.set_result(value)
+    return future
+
+
+# ============================================================
+# PER-SLIDE PIPELINE
+# ============================================================
+
+class SlidePipeline:
+    """
+    Per-slide DAG scheduler.
+
+    Each slide is an independent chain:  content -> (image || voiceover) -> ready.
+    Image and voiceover for a slide are started as soon as `submit()` receives
+    its content, and `on_slide_ready(idx, image_path, audio_path)` fires as soon
+    as both are done, so assembly work never waits on a global phase barrier.
+    `on_part_done(idx, "image" | "audio", path)` fires for each half (path is
+    None if it failed).
+    """
+
+    def __init__(
+        self,
+        image_dir: str,
+        audio_dir: str,
+        model: str = "gemini-3-pro-image-preview",
+        image_workers: int = IMAGE_CONCURRENCY_MAX,  # the shared image limiter adapts below this
+        audio_workers: int = 5,
+        on_slide_ready: Optional[Callable[[int, Optional[str], Optional[str]], None]] = None,
+        on_part_done: Optional[Callable[[int, str, Optional[str]], None]] = None
+    ):
+        self.image_dir = image_dir
+        self.audio_dir = audio_dir
+        self.on_slide_ready = on_slide_ready
+        self.on_part_done = on_part_done
+
+        os.makedirs(image_dir, exist_ok=True)
+        os.makedirs(audio_dir, exist_ok=True)
+
+        self.image_client = GeminiClient(model=model)
+        self.voice_generator = voice.VoiceGenerator(use_openai=True)
+
+        # Local pyttsx3 is NOT thread-safe
+        if not self.voice_generator.use_openai:
+            print("⚠️ Local TTS detected. Forcing sequential voiceover (not thread-safe).")
+            audio_workers = 1
+
+        # Provider calls from these pools count against the creating job's share
+        job = current_job()
+        self._image_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=image_workers, thread_name_prefix="slide-image",
+            initializer=bind_job, initargs=(job,)
+        )
+        self._audio_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=audio_workers, thread_name_prefix="slide-audio",
+            initializer=bind_job, initargs=(job,)
+        )
+
+        self._lock = threading.Lock()
+        self._results: Dict[int, Dict[str, Optional[str]]] = {}
+        self._ready: Dict[int, concurrent.futures.Future] = {}
+
+    # --------------------------------------------------------
+    # SCHEDULING
+    # --------------------------------------------------------
+
+    def submit(
+        self,
+        idx: int,
+        slide: Dict[str, Any],
+        image_path: Optional[str] = None,
+        audio_path: Optional[str] = None
+    ) -> concurrent.futures.Future:
+        """
+        Start image + voiceover generation for slide `idx` (1-based).
+        Parts whose path is already known (e.g. cached) are not regenerated.
+        Returns a future resolving to (idx, image_path, audio_path).
+        """
+        ready = concurrent.futures.Future()
+        with self._lock:
+            self._results[idx] = {}
+            self._ready[idx] = ready
+
+        if image_path:
+            image_future = _completed(image_path)
+        else:
+            image_future = self._image_pool.submit(
+                visualization._generate_single_slide,
+                idx, to_visualization_slide(slide), self.image_dir, self.image_client
+            )
+        if audio_path:
+            audio_future = _completed((idx, audio_path))
+        else:
+            audio_future = self._audio_pool.submit(
+                voice._process_single_audio_task,
+                self.voice_generator, slide.get("script", ""), idx, self.audio_dir
+            )
+
+        image_future.add_done_callback(lambda f: self._on_part_done(idx, "image", f))
+        audio_future.add_done_callback(lambda f: self._on_part_done(idx, "audio", f))
+        return ready
+
+    def _on_part_done(self, idx: int, part: str, future: concurrent.futures.Future) -> None:
+        try:
+            value = future.result()
+            path = value[1] if part == "audio" else value
+        except Exception as e:
+            print(f"   [CRITICAL] {part} task for slide {idx} raised: {e}")
+            path = None
+
+        if self.on_part_done:
+            try:
+                self.on_part_done(idx, part, path)
+            except Exception as e:
+                print(f"   [ERROR] Slide {idx} {part} handler failed: {e}")
+
+        with self._lock:
+            self._results[idx][part] = path
+            if len(self._results[idx]) < 2:
+                return
+            image_path = self._results[idx]["image"]
+            audio_path = self._results[idx]["audio"]
+            ready = self._ready[idx]
+
+        if self.on_slide_ready:
+            try:
+                self.on_slide_ready(idx, image_path, audio_path)
+            except Exception as e:
+                print(f"   [ERROR] Slide {idx} ready-handler failed: {e}")
+        ready.set_result((idx, image_path, audio_path))
+
+    # --------------------------------------------------------
+    # COLLECTION
+    # --------------------------------------------------------
+
+    def results(self) -> List[Tuple[int, Optional[str], Optional[str]]]:
+        """Wait for every submitted slide and return results in slide order."""
+        with self._lock:
+            futures = [self._ready[idx] for idx in sorted(self._ready)]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        self._image_pool.shutdown(wait=True)
+        self._audio_pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        return False
@@ -0,0 +1,340 @@
+import os
+import abc
+import uuid
+import asyncio
+import contextlib
+import sqlite3
+import threading
+import weakref
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from src.config import SUPABASE_URL, SUPABASE_KEY, USER_STORE_BACKEND, USER_STORE_PATH
+
+# Optional Supabase import
+try:
+    from supabase import acreate_client
+    SUPABASE_AVAILABLE = True
+except ImportError:
+    SUPABASE_AVAILABLE = False
+
+USERS_TABLE = "users"
+USER_FIELDS = ("id", "username", "email", "password_hash", "is_active", "subscription_expires_at", "created_at")
+
+
+class UserExistsError(ValueError):
+    """Username or email is already registered (`field` says which)."""
+
+    def __init__(self, field: str):
+        super().__init__(f"{field} already exists")
+        self.field = field
+
+
+def _conflict_field(row: Dict[str, Any], username: str) -> str:
+    return "username" if row.get("username") == username else "email"
+
+
+# ============================================================
+# REPOSITORY INTERFACE
+# ============================================================
+
+class UserRepository(abc.ABC):
+    """
+    Async access to the users table. Rows are plain dicts with USER_FIELDS,
+    as returned by Supabase.
+    """
+
+    @abc.abstractmethod
+    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    async def get_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    async def find_conflict(self, username: str, email: str) -> Optional[str]:
+        """
+        One query for signup: "username" or "email" if either is already
+        taken (username reported first), else None.
+        """
+
+    @abc.abstractmethod
+    async def create(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a user and return the stored row. Raises UserExistsError on a duplicate."""
+
+    @abc.abstractmethod
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> None:
+        ...
+
+
+# ============================================================
+# SUPABASE (ASYNC CLIENT, ONE PER EVENT LOOP)
+# ============================================================
+
+def _quote(value: str) -> str:
+    """Quote a value for a PostgREST `or` filter (commas, dots and parens are reserved)."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class SupabaseUserRepository(UserRepository):
+    """
+    Users table on Supabase through the async client. The client (and its
+    HTTP connection pool) is created once per event loop and reused by
+    every request, since async pools are bound to the loop that made them.
+    """
+
+    def __init__(self, url: str = SUPABASE_URL, key: str = SUPABASE_KEY):
+        if not SUPABASE_AVAILABLE:
+            raise RuntimeError("supabase package is not installed")
+        self.url = url
+        self.key = key
+        # Only created clients are kept: a failed creation is retried by the next request,
+        # and the entry goes away with its loop (a stored Task would keep the loop alive)
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        # Creations in progress, so concurrent first requests share one client
+        self._pending: Dict[asyncio.AbstractEventLoop, asyncio.Future] = {}
+
+    async def _table(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            pending = self._pending.get(loop)
+            if pending is None:
+                pending = self._pending[loop] = asyncio.ensure_future(acreate_client(self.url, self.key))
+                pending.add_done_callback(lambda future: self._created(loop, future))
+            # Shielded: one cancelled request must not cancel the creation others wait on
+            client = await asyncio.shield(pending)
+        return client.table(USERS_TABLE)
+
+    def _created(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future) -> None:
+        self._pending.pop(loop, None)
+        if not future.cancelled() and future.exception() is None:
+            self._clients[loop] = future.result()
+
+    async def _first(self, column: str, value: str) -> Optional[Dict[str, Any]]:
+        response = await (await self._table()).select("*").eq(column, value).limit(1).execute()
+        return response.data[0] if response.data else None
+
+    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self._first("id", user_id)
+
+    async def get_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return await self._first("username", username)
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self._first("email", email)
+
+    async def find_conflict(self, username: str, email: str) -> Optional[str]:
+        response = await (
+            (await self._table())
+            .select("username, email")
+            .or_(f"username.eq.{_quote(username)},email.eq.{_quote(email)}")
+            .limit(2)
+            .execute()
+        )
+        if not response.data:
+            return None
+        fields = {_conflict_field(row, username) for row in response.data}
+        return "username" if "username" in fields else "email"
+
+    async def create(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = await (await self._table()).insert(user).execute()
+        except Exception as e:
+            if getattr(e, "code", None) == "23505":  # unique_violation
+                raise UserExistsError("email" if "email" in str(e) else "username") from e
+            raise
+        if not response.data:
+            raise RuntimeError("Insert returned no row")
+        return response.data[0]
+
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> None:
+        await (await self._table()).update(fields).eq("id", user_id).execute()
+
+
+# ============================================================
+# LOCAL STAND-INS (TESTS / BENCHMARKS / OFFLINE DEV)
+# ============================================================
+
+def _new_row(user: Dict[str, Any]) -> Dict[str, Any]:
+    row = {field: None for field in USER_FIELDS}
+    row.update({"is_active": True, "created_at": datetime.utcnow().isoformat()})
+    row.update(user)
+    row["id"] = row["id"] or str(uuid.uuid4())
+    return row
+
+
+class MemoryUserRepository(UserRepository):
+    """In-process users table (lost on restart)."""
+
+    def __init__(self):
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _find(self, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for row in self._rows.values():
+                if row[column] == value:
+                    return dict(row)
+        return None
+
+    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._find("id", user_id)
+
+    async def get_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return self._find("username", username)
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return self._find("email", email)
+
+    def _conflict(self, username: str, email: str) -> Optional[str]:
+        fields = {
+            _conflict_field(row, username)
+            for row in self._rows.values()
+            if row["username"] == username or row["email"] == email
+        }
+        if not fields:
+            return None
+        return "username" if "username" in fields else "email"
+
+    async def find_conflict(self, username: str, email: str) -> Optional[str]:
+        with self._lock:
+            return self._conflict(username, email)
+
+    async def create(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        row = _new_row(user)
+        with self._lock:
+            conflict = self._conflict(row["username"], row["email"])
+            if conflict:
+                raise UserExistsError(conflict)
+            self._rows[row["id"]] = row
+            return dict(row)
+
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            if user_id in self._rows:
+                self._rows[user_id].update(fields)
+
+
+class SQLiteUserRepository(UserRepository):
+    """
+    Users table in a local SQLite file with the Supabase schema's unique
+    constraints. Queries run on worker threads so the event loop never blocks.
+    """
+
+    def __init__(self, path: str = USER_STORE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {USERS_TABLE} ("
+                " id TEXT PRIMARY KEY, username TEXT UNIQUE NOT NULL, email TEXT UNIQUE NOT NULL,"
+                " password_hash TEXT NOT NULL, is_active INTEGER DEFAULT 1,"
+                " subscription_expires_at TEXT, created_at TEXT)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Queries run on whichever asyncio.to_thread worker is free, and sqlite3
+        # connections must not cross threads: open one per query, commit (or roll
+        # back) the query as one transaction, then close it
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        user = dict(row)
+        user["is_active"] = bool(user["is_active"])
+        return user
+
+    def _query_one(self, sql: str, params: tuple) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            return self._to_dict(conn.execute(sql, params).fetchone())
+
+    async def _first(self, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        sql = f"SELECT * FROM {USERS_TABLE} WHERE {column} = ? LIMIT 1"
+        return await asyncio.to_thread(self._query_one, sql, (value,))
+
+    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self._first("id", user_id)
+
+    async def get_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        return await self._first("username", username)
+
+    async def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        return await self._first("email", email)
+
+    def _find_conflict(self, username: str, email: str) -> Optional[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT username, email FROM {USERS_TABLE} WHERE username = ? OR email = ? LIMIT 2",
+                (username, email)
+            ).fetchall()
+        fields = {_conflict_field(dict(row), username) for row in rows}
+        if not fields:
+            return None
+        return "username" if "username" in fields else "email"
+
+    async def find_conflict(self, username: str, email: str) -> Optional[str]:
+        return await asyncio.to_thread(self._find_conflict, username, email)
+
+    def _insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        columns = ", ".join(USER_FIELDS)
+        placeholders = ", ".join("?" for _ in USER_FIELDS)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    f"INSERT INTO {USERS_TABLE} ({columns}) VALUES ({placeholders})",
+                    tuple(row[field] for field in USER_FIELDS)
+                )
+        except sqlite3.IntegrityError as e:
+            raise UserExistsError("email" if f"{USERS_TABLE}.email" in str(e) else "username") from e
+        return row
+
+    async def create(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._insert, _new_row(user))
+
+    def _update(self, user_id: str, fields: Dict[str, Any]) -> None:
+        unknown = set(fields) - set(USER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown user fields: {sorted(unknown)}")
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE {USERS_TABLE} SET {assignments} WHERE id = ?", (*fields.values(), user_id))
+
+    async def update(self, user_id: str, fields: Dict[str, Any]) -> None:
+        if fields:
+            await asyncio.to_thread(self._update, user_id, fields)
+
+
+# ============================================================
+# PROCESS-WIDE REPOSITORY
+# ============================================================
+
+def create_user_repository(backend: str = USER_STORE_BACKEND) -> Optional[UserRepository]:
+    """
+    Repository selected by USER_STORE_BACKEND. "auto" uses Supabase when
+    SUPABASE_URL/KEY are set and the package is installed, else returns
+    None (no database; test-mode accounts only).
+    """
+    if backend == "auto":
+        backend = "supabase" if SUPABASE_AVAILABLE and SUPABASE_URL and SUPABASE_KEY else "none"
+    if backend == "none":
+        return None
+    if backend == "supabase":
+        return SupabaseUserRepository()
+    if backend == "sqlite":
+        return SQLiteUserRepository()
+    if backend == "memory":
+        return MemoryUserRepository()
+    raise RuntimeError(f"Unknown USER_STORE_BACKEND: {backend}")
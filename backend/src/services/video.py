@@ -1,170 +1,293 @@
 import os
 import json
-from typing import List, Dict, Any
+import threading
+import contextlib
+from typing import List, Dict, Any, Callable, Optional
 
 # Import our modules
 import src.services.lecture as lecture
-import src.services.visualization as visualization
-import src.services.voice as voice
+from src.services.pipeline import SlidePipeline
+from src.services.artifacts import artifact_store, copy_artifact, normalize_topic
+from src.services.assembly import (
+    ASSEMBLERS,
+    SEGMENT_ASSEMBLERS,
+    MOVIEPY_AVAILABLE,
+    SegmentRenderer,
+    assemble_video,
+    segment_dir_for,
+)
+from src.services.hls import OUTPUT_FORMATS, package_hls
+from src.services.live import LIVE_PLAYLIST, LivePlaylist, live_dir_for
+from src.services.workspace import Workspace
+from src.config import (
+    SLIDE_CONTENT_STREAMING,
+    ARTIFACT_CACHE_ENABLED,
+    VIDEO_ASSEMBLER,
+    INCREMENTAL_RENDER,
+    VIDEO_OUTPUT_FORMAT,
+    LIVE_PLAYBACK,
+)
 
-try:
-    # In MoviePy v2, everything is exposed at the top level
-    from moviepy import *
-    
-    # However, sometimes explicit imports help if the star import misses something
-    if "ImageClip" not in globals():
-        from moviepy.video.VideoClip import ImageClip
-    if "AudioFileClip" not in globals():
-        from moviepy.audio.io.AudioFileClip import AudioFileClip
-    if "concatenate_videoclips" not in globals():
-        from moviepy.video.compositing.concatenate import concatenate_videoclips
-        
-    MOVIEPY_AVAILABLE = True
-    print(f"[Video] MoviePy v2.2.1 loaded successfully.")
-
-except ImportError as e:
-    print(f"⚠️ MoviePy Import Error: {e}")
-    MOVIEPY_AVAILABLE = False
-
-
-def generate_lecture_video(topic: str, output_filename: str = "lecture_video.mp4"):
+
+def _report(progress_callback: Optional[Callable[[str, float], None]], stage: str, progress: float) -> None:
+    """Forward a (stage, progress) update to the caller, never failing the pipeline."""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(stage, progress)
+    except Exception as e:
+        print(f"⚠️ Progress callback failed: {e}")
+
+
+def _emit(event_callback: Optional[Callable[..., None]], event_type: str, **data: Any) -> None:
+    """Forward a structured progress event (see src/services/events.py), never failing the pipeline."""
+    if event_callback is None:
+        return
+    try:
+        event_callback(event_type, **data)
+    except Exception as e:
+        print(f"⚠️ Event callback failed: {e}")
+
+
+def _package_output(output_filename: str, output_format: str) -> None:
+    """Build any extra delivery formats. The MP4 itself is already faststart."""
+    if output_format != "hls":
+        return
+    try:
+        package_hls(output_filename)
+    except Exception as e:
+        # The MP4 is still playable; HLS is an optimization for players
+        print(f"⚠️ HLS packaging failed: {e}")
+
+
+def generate_lecture_video(
+    topic: str,
+    output_filename: str = "lecture_video.mp4",
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    stream_content: bool = SLIDE_CONTENT_STREAMING,
+    use_artifact_cache: bool = ARTIFACT_CACHE_ENABLED,
+    assembler: str = VIDEO_ASSEMBLER,
+    incremental: bool = INCREMENTAL_RENDER,
+    output_format: str = VIDEO_OUTPUT_FORMAT,
+    live_playback: bool = LIVE_PLAYBACK,
+    event_callback: Optional[Callable[..., None]] = None,
+    workspace: Optional[Workspace] = None
+) -> Optional[str]:
     """
     Full pipeline to generate a video lecture from a topic string.
     Targeting MoviePy 2.2.1 syntax (.with_duration, .with_audio).
+
+    `progress_callback(stage, progress)` is called as each phase finishes.
+    `stream_content` streams slide content so slides enter the pipeline
+    as soon as the model finishes each one.
+    `use_artifact_cache` looks the normalized topic up in the artifact store:
+    a stored video is returned as-is, otherwise stored stages are reused.
+    `assembler` picks the per-slide segment encoder ("moviepy" or "ffmpeg"),
+    whose segments are encoded in the render pool and joined by stream copy,
+    or "moviepy-timeline", which composites every slide once they are all
+    ready (no segments, so no incremental render or live playback).
+    `incremental` keeps segments plus a per-slide manifest next to the
+    output, so re-rendering to the same path only re-encodes changed slides;
+    otherwise segments live in a temp dir removed after the concat.
+    `output_format` "hls" also packages the faststart MP4 as a multi-resolution
+    HLS ladder in <output>.hls/ (see src/services/hls.py).
+    `live_playback` publishes finished slides to a growing HLS EVENT playlist
+    in <output>.live/ so playback can start before the whole video is done;
+    a "live_started" event is sent once that playlist exists.
+    `event_callback(event_type, **data)` receives structured per-phase events
+    (objectives, plan, per-slide image/audio/segment, encode percent).
+    Slide images and voiceovers are written to `workspace` (a fresh
+    per-run Workspace by default), cleaned up per its retention policy.
+    Returns the output path, or None if the video could not be assembled.
     """
     
     print(f"\n==================================================")
     print(f"🚀 STARTING VIDEO GENERATION FOR TOPIC: '{topic}'")
     print(f"==================================================\n")
 
+    # Reject bad settings before any paid model call
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format} (expected one of {OUTPUT_FORMATS})")
+
+    if assembler not in ASSEMBLERS:
+        raise ValueError(f"Unknown assembler: {assembler} (expected one of {ASSEMBLERS})")
+
+    if assembler != "ffmpeg" and not MOVIEPY_AVAILABLE:
+        print("❌ MoviePy not installed or import failed. Skipping video generation.")
+        return None
+
+    # ============================================================
+    # PHASE 0: TOPIC ARTIFACT CACHE
+    # ============================================================
+    store = artifact_store if use_artifact_cache else None
+    cached = store.load(topic) if store else None
+
+    if cached and cached.video:
+        print(f"♻️  Artifact cache hit for '{normalize_topic(topic)}'. Reusing rendered video.")
+        copy_artifact(cached.video, output_filename)
+        _emit(event_callback, "artifact_hit", topic=normalize_topic(topic))
+        _package_output(output_filename, output_format)
+        _report(progress_callback, "done", 1.0)
+        return output_filename
+
     # ============================================================
     # PHASE 1: CONTENT GENERATION (LLM)
     # ============================================================
     print("--- [Phase 1] Generating Lecture Content ---")
     
     # 1.1 Objectives
-    objectives = lecture.generate_learning_objectives(topic)
-    print(f"✅ Generated {len(objectives)} learning objectives.")
+    if cached and cached.objectives:
+        objectives = cached.objectives
+        print(f"♻️  Reusing {len(objectives)} cached learning objectives.")
+    else:
+        objectives = lecture.generate_learning_objectives(topic)
+        print(f"✅ Generated {len(objectives)} learning objectives.")
+        if store:
+            store.save_stage(topic, "objectives", objectives)
+            cached = store.load(topic)
+    _emit(event_callback, "objectives", count=len(objectives))
+    _report(progress_callback, "objectives", 0.05)
     
     # 1.2 Slide Plan
-    plan = lecture.generate_slide_plan(objectives)
-    print(f"✅ Generated plan with {len(plan)} slides.")
+    if cached and cached.plan:
+        plan = cached.plan
+        print(f"♻️  Reusing cached plan with {len(plan)} slides.")
+    else:
+        plan = lecture.generate_slide_plan(objectives)
+        print(f"✅ Generated plan with {len(plan)} slides.")
+        if store:
+            store.save_stage(topic, "plan", plan)
+            cached = store.load(topic)
+    _emit(event_callback, "plan", slides=len(plan))
+    _report(progress_callback, "plan", 0.10)
     
-    # 1.3 Full Slide Content (Script + Visual descriptions)
-    slides_content = lecture.generate_slide_content(plan)
-    print(f"✅ Generated full content for {len(slides_content)} slides.")
-
-
     # ============================================================
-    # PHASE 2: VISUALIZATION (IMAGE GEN)
+    # PHASE 1.3 + 2 + 3: SLIDE CONTENT -> PER-SLIDE PIPELINE
     # ============================================================
-    print("\n--- [Phase 2] Generating Slide Images ---")
-    
-    # Prepare data for visualization module
-    slides_for_viz = []
-    for s in slides_content:
-        slides_for_viz.append({
-            "title": s.get("title", "Untitled"),
-            "bulletpoints": s.get("bulletpoints", []),
-            "visual_step_description": s.get("visualization", "")
-        })
-
-    # Generate images
-    image_paths = visualization.generate_visualizations_with_gemini(
-        slide_steps=slides_for_viz,
-        output_dir="output_visuals",
-        model="gemini-3-pro-image-preview" 
-    )
-    
-    if len(image_paths) != len(slides_content):
-        print(f"⚠️ Warning: Requested {len(slides_content)} images but got {len(image_paths)}.")
+    # Each slide runs its own image -> voiceover -> segment chain, so a slide
+    # is ready for assembly as soon as *its* inputs exist instead of
+    # waiting for every image and then every audio file. When streaming,
+    # slide 1 enters the pipeline while the model is still writing slide N.
+    print("\n--- [Phase 1.3 + 2 + 3] Generating Slide Content, Images & Voiceovers (per slide) ---")
 
+    total = len(plan)
+    finished = []
+    encoded = []
+    lock = threading.Lock()
 
-    # ============================================================
-    # PHASE 3: VOICEOVER (TTS)
-    # ============================================================
-    print("\n--- [Phase 3] Generating Voiceovers ---")
-    
-    scripts = lecture.get_scripts(slides_content)
-    
-    audio_paths = voice.generate_audio_from_scripts(
-        scripts=scripts,
-        output_dir="output_audio"
-    )
+    def on_part_done(idx: int, part: str, path: Optional[str]) -> None:
+        _emit(event_callback, f"slide_{part}", slide=idx, ok=path is not None)
 
-    # ============================================================
-    # PHASE 4: VIDEO ASSEMBLY (MOVIEPY 2.2.1)
-    # ============================================================
-    print("\n--- [Phase 4] Assembling Video ---")
+    def on_segment(idx: int, segment_path: Optional[str]) -> None:
+        if live:
+            live.add(idx, segment_path)
+        with lock:
+            encoded.append(idx)
+            done = len(encoded)
+        _emit(
+            event_callback, "slide_encoded",
+            slide=idx, ok=segment_path is not None,
+            encoded=done, total=total, percent=round(100 * done / max(total, 1), 1)
+        )
 
-    if not MOVIEPY_AVAILABLE:
-        print("❌ MoviePy not installed or import failed. Skipping video assembly.")
-        return
+    def on_slide_ready(idx: int, img_path: Optional[str], audio_path: Optional[str]) -> None:
+        # Start encoding this slide's segment right away, in the render pool
+        if renderer and not renderer.submit(idx, img_path, audio_path):
+            on_segment(idx, None)  # nothing to encode; don't hold later slides back
+        with lock:
+            finished.append(idx)
+            done = len(finished)
+        _report(progress_callback, "slides", 0.25 + 0.55 * done / max(total, 1))
 
-    # Ensure we match images to audio
-    num_slides = min(len(image_paths), len(audio_paths))
-    
-    if num_slides == 0:
-        print("❌ Error: Missing images or audio. Cannot create video.")
-        return
+    # Slide segments are encoded in a process pool while later slides are
+    # still generating, then joined by stream copy in Phase 4
+    segmented = assembler in SEGMENT_ASSEMBLERS
+    segment_dir = segment_dir_for(output_filename) if incremental and segmented else None
+    live = LivePlaylist(live_dir_for(output_filename)) if live_playback and segmented else None
+    renderer = SegmentRenderer(assembler, segment_dir=segment_dir, on_segment=on_segment) if segmented else None
+    workspace = workspace or Workspace()
+    with workspace, live or contextlib.nullcontext(), renderer or contextlib.nullcontext():
+        if live:
+            # Only now is there a playlist to point players at
+            _emit(event_callback, "live_started", playlist=LIVE_PLAYLIST)
+        with SlidePipeline(
+            image_dir=workspace.image_dir,
+            audio_dir=workspace.audio_dir,
+            model="gemini-3-pro-image-preview",
+            on_slide_ready=on_slide_ready,
+            on_part_done=on_part_done
+        ) as slide_pipeline:
+            # 1.3 Full Slide Content (Script + Visual descriptions)
+            reuse_slides = bool(cached and cached.slides)
+            if reuse_slides:
+                slides_content = cached.slides
+                print(f"♻️  Reusing cached content for {len(slides_content)} slides.")
+            elif stream_content:
+                slides_content = lecture.stream_slide_content(plan)
+            else:
+                slides_content = lecture.generate_slide_content(plan)
 
-    clips = []
-    
-    print(f"Processing {num_slides} clips...")
-    
-    for i in range(num_slides):
-        img_path = image_paths[i]
-        audio_path = audio_paths[i]
-        
-        # Verify files exist
-        if not os.path.exists(img_path) or not os.path.exists(audio_path):
-            print(f"   Skipping Slide {i+1}: File missing.")
-            continue
-            
-        try:
-            # 1. Create Audio Clip
-            audio_clip = AudioFileClip(audio_path)
-            
-            # 2. Create Image Clip (MoviePy 2.2.1 Syntax)
-            # Use .with_duration() instead of .set_duration()
-            # Use .with_audio() instead of .set_audio()
-            
-            slide_duration = audio_clip.duration + 0.25 # Add small pause
-            
-            image_clip = (
-                ImageClip(img_path)
-                .with_duration(slide_duration)
-                .with_audio(audio_clip)
-            )
-            
-            clips.append(image_clip)
-            print(f"   + Added Slide {i+1} (Duration: {slide_duration:.2f}s)")
-            
-        except Exception as e:
-            print(f"   ❌ Error assembling Slide {i+1}: {e}")
+            generated_slides = []
+            for idx, slide in enumerate(slides_content, start=1):
+                generated_slides.append(slide)
+                _emit(event_callback, "slide_content", slide=idx)
+                if reuse_slides:
+                    # Images/audio in the store were made from exactly this content
+                    slide_pipeline.submit(idx, slide, image_path=cached.image(idx), audio_path=cached.audio(idx))
+                else:
+                    slide_pipeline.submit(idx, slide)
+            total = len(generated_slides)
+            print(f"✅ Generated full content for {total} slides.")
+            _emit(event_callback, "content", slides=total)
+            _report(progress_callback, "content", 0.25)
+
+            if store and not reuse_slides:
+                store.save_stage(topic, "slides", generated_slides)
+
+            slide_results = slide_pipeline.results()
+
+        if store:
+            for idx, img_path, audio_path in slide_results:
+                if img_path and os.path.exists(img_path) and not (reuse_slides and img_path == cached.image(idx)):
+                    store.save_slide_file(topic, "images", idx, img_path)
+                if audio_path and os.path.exists(audio_path) and not (reuse_slides and audio_path == cached.audio(idx)):
+                    store.save_slide_file(topic, "audio", idx, audio_path)
+
+        # ============================================================
+        # PHASE 4: VIDEO ASSEMBLY
+        # ============================================================
+        print(f"\n--- [Phase 4] Assembling Video ({assembler}) ---")
 
-    if clips:
         print(f"\nRendering final video: {output_filename}...")
-        
+        _report(progress_callback, "assembly", 0.80)
+
         try:
-            # Concatenate
-            final_video = concatenate_videoclips(clips, method="compose")
-            
-            # Write File
-            # Note: MoviePy 2.x still requires 'fps' for Image-based videos
-            final_video.write_videofile(
-                output_filename, 
-                fps=24, 
-                codec="libx264", 
-                audio_codec="aac"
-            )
-            print(f"\n✅ DONE! Video saved to: {os.path.abspath(output_filename)}")
+            if renderer:
+                # Segments were encoded as slides finished; only the stitch is left
+                included = renderer.render(output_filename)
+            else:
+                included = assemble_video(slide_results, output_filename, assembler)
         except Exception as e:
             print(f"❌ Error during rendering: {e}")
             if "ffmpeg" in str(e).lower():
                 print("   (This might be an FFMPEG path issue. Ensure FFMPEG is installed.)")
-    else:
-        print("❌ No valid clips created.")
+            workspace.succeeded = False
+            return None
+
+        if not included:
+            print("❌ No valid clips created.")
+            workspace.succeeded = False
+            return None
+
+        if included != total:
+            print(f"⚠️ Warning: Requested {total} slides but only {included} are complete.")
+
+        print(f"\n✅ DONE! Video saved to: {os.path.abspath(output_filename)}")
+        if store and included == total:
+            store.save_video(topic, output_filename)
+        _package_output(output_filename, output_format)
+        _report(progress_callback, "done", 1.0)
+        return output_filename
 
 
 if __name__ == "__main__":
@@ -1,8 +1,28 @@
 import os
 import json
+import asyncio
+import threading
 import concurrent.futures
-from typing import List, Union, Tuple
-from src.LLM.Gemini import GeminiClient
+from typing import List, Optional, Union, Tuple
+from src.LLM.Gemini import GeminiClient, AsyncGeminiClient
+from src.services.blob_cache import BlobCache, write_atomic
+from src.LLM.budget import bind_job, current_job
+from src.config import IMAGE_CACHE_ENABLED, IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, IMAGE_CONCURRENCY_MAX
+
+_image_cache: Optional[BlobCache] = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> Optional[BlobCache]:
+    """Slide images keyed by hash(model, prompt), created on first use; None when disabled."""
+    global _image_cache
+    if not IMAGE_CACHE_ENABLED:
+        return None
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = BlobCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, name="ImageCache")
+        return _image_cache
+
 
 # ============================================================
 # BUILD THE GEMINI PROMPT FOR ONE SLIDE
@@ -87,6 +107,37 @@ def build_gemini_slide_prompt(slide: dict) -> str:
 # HELPER: PROCESS A SINGLE SLIDE (THREADED)
 # ============================================================
 
+def _reuse_cached_image(idx: int, model: str, prompt: str, output_path: str) -> bool:
+    """
+    Link a previously generated image for the same (model, prompt) into
+    place. Returns False on a miss or when the cache is disabled.
+    """
+    image_cache = get_image_cache()
+    if image_cache is None:
+        return False
+    cached = image_cache.get(BlobCache.make_key(model, prompt), ".png")
+    if cached is None:
+        return False
+    try:
+        image_cache.materialize(cached, output_path)
+    except OSError as e:
+        print(f"   ⚠️ Image cache hit for slide {idx} unusable: {e}")
+        return False
+    print(f"   [Cached] Slide {idx} reused from image cache.")
+    return True
+
+
+def _store_image(model: str, prompt: str, output_path: str, image_bytes: bytes) -> None:
+    # Atomic write: output_path may be a hard link into the cache
+    write_atomic(output_path, image_bytes)
+    image_cache = get_image_cache()
+    if image_cache is not None:
+        try:
+            image_cache.put_bytes(BlobCache.make_key(model, prompt), image_bytes, ".png")
+        except OSError as e:
+            print(f"   ⚠️ Image cache write failed: {e}")
+
+
 def _generate_single_slide(
     idx: int, 
     slide: dict, 
@@ -100,12 +151,14 @@ def _generate_single_slide(
     prompt = build_gemini_slide_prompt(slide)
     output_path = os.path.abspath(os.path.join(output_dir, f"slide_{idx:02d}.png"))
     
+    if _reuse_cached_image(idx, client.model, prompt, output_path):
+        return output_path
+
     print(f"   [Started] Slide {idx}: '{slide.get('title', 'Untitled')}'")
     
     try:
         image_bytes = client.generate_image(prompt)
-        with open(output_path, "wb") as f:
-            f.write(image_bytes)
+        _store_image(client.model, prompt, output_path, image_bytes)
         print(f"   [Done] Slide {idx} saved.")
         return output_path
     except Exception as e:
@@ -121,10 +174,12 @@ def generate_visualizations_with_gemini(
     slide_steps: List[dict],
     output_dir: Union[str, os.PathLike] = "generated_visuals",
     model: str = "gemini-3-pro-image-preview",
-    max_workers: int = 5  # Adjust based on rate limits (5 is usually safe)
+    max_workers: int = IMAGE_CONCURRENCY_MAX  # Upper bound; the shared limiter adapts below it
 ) -> List[str]:
     """
     Generates slide images in parallel using ThreadPoolExecutor.
+    Actual concurrency is set by the client's shared rate limiter
+    (src/LLM/ratelimit.py), which also retries throttled calls.
     """
     os.makedirs(output_dir, exist_ok=True)
 
@@ -135,7 +190,9 @@ def generate_visualizations_with_gemini(
     
     print(f"Starting PARALLEL generation of {len(slide_steps)} slides (Workers: {max_workers})...")
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers, initializer=bind_job, initargs=(current_job(),)
+    ) as executor:
         # Dictionary to map futures back to their index
         future_to_index = {
             executor.submit(_generate_single_slide, idx, slide, output_dir, client): idx
@@ -159,6 +216,69 @@ def generate_visualizations_with_gemini(
     return valid_paths
 
 
+# ============================================================
+# ASYNC VARIANTS (single event loop, no thread per call)
+# ============================================================
+
+async def _generate_single_slide_async(
+    idx: int,
+    slide: dict,
+    output_dir: str,
+    client: AsyncGeminiClient
+) -> Union[str, None]:
+    """
+    Async counterpart of _generate_single_slide.
+    """
+    prompt = build_gemini_slide_prompt(slide)
+    output_path = os.path.abspath(os.path.join(output_dir, f"slide_{idx:02d}.png"))
+
+    if await asyncio.to_thread(_reuse_cached_image, idx, client.model, prompt, output_path):
+        return output_path
+
+    print(f"   [Started] Slide {idx}: '{slide.get('title', 'Untitled')}'")
+
+    try:
+        image_bytes = await client.generate_image(prompt)
+        await asyncio.to_thread(_store_image, client.model, prompt, output_path, image_bytes)
+        print(f"   [Done] Slide {idx} saved.")
+        return output_path
+    except Exception as e:
+        print(f"   [ERROR] Slide {idx} failed: {e}")
+        return None
+
+
+async def generate_visualizations_with_gemini_async(
+    slide_steps: List[dict],
+    output_dir: Union[str, os.PathLike] = "generated_visuals",
+    model: str = "gemini-3-pro-image-preview",
+    max_concurrency: int = IMAGE_CONCURRENCY_MAX
+) -> List[str]:
+    """
+    Async counterpart of generate_visualizations_with_gemini.
+    Concurrency is bounded by a semaphore instead of a thread pool.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    client = AsyncGeminiClient(model=model)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    print(f"Starting ASYNC generation of {len(slide_steps)} slides (Concurrency: {max_concurrency})...")
+
+    async def run(idx: int, slide: dict) -> Union[str, None]:
+        async with semaphore:
+            return await _generate_single_slide_async(idx, slide, output_dir, client)
+
+    output_paths = await asyncio.gather(
+        *(run(idx, slide) for idx, slide in enumerate(slide_steps, start=1))
+    )
+
+    # Filter out any failed (None) paths
+    valid_paths = [p for p in output_paths if p is not None]
+
+    print(f"Generation complete. {len(valid_paths)}/{len(slide_steps)} slides successful.")
+    return valid_paths
+
+
 # ============================================================
 # DEMO MAIN
 # ============================================================
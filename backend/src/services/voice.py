@@ -1,11 +1,16 @@
 import os
 import time
+import asyncio
+import threading
 import concurrent.futures
 from typing import List, Tuple, Optional
+from src.services.blob_cache import BlobCache, write_atomic
+from src.LLM.budget import get_budget, bind_job, current_job
+from src.config import AUDIO_CACHE_ENABLED, AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES
 
 # Try imports for TTS engines
 try:
-    from openai import OpenAI
+    from openai import OpenAI, AsyncOpenAI
     from src.config import OPENAI_API_KEY
     OPENAI_AVAILABLE = True
 except ImportError:
@@ -18,6 +23,20 @@ try:
 except ImportError:
     PYTTSX3_AVAILABLE = False
 
+_audio_cache: Optional[BlobCache] = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> Optional[BlobCache]:
+    """Synthesized audio keyed by hash(engine, voice, model, script), created on first use; None when disabled."""
+    global _audio_cache
+    if not AUDIO_CACHE_ENABLED:
+        return None
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = BlobCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES, name="AudioCache")
+        return _audio_cache
+
 
 class VoiceGenerator:
     """
@@ -29,6 +48,7 @@ class VoiceGenerator:
         if use_openai and OPENAI_AVAILABLE and OPENAI_API_KEY:
             self.use_openai = True
             self.client = OpenAI(api_key=OPENAI_API_KEY)
+            self.async_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
             self.voice = "alloy"  
             self.model = "tts-1" 
         elif PYTTSX3_AVAILABLE:
@@ -42,12 +62,14 @@ class VoiceGenerator:
     def generate_audio_openai(self, text: str, output_path: str) -> None:
         """Generate audio using OpenAI TTS API."""
         try:
-            response = self.client.audio.speech.create(
-                model=self.model,
-                voice=self.voice,
-                input=text
-            )
-            response.stream_to_file(output_path)
+            # TTS shares the process-wide OpenAI budget with chat calls
+            with get_budget("openai").slot():
+                response = self.client.audio.speech.create(
+                    model=self.model,
+                    voice=self.voice,
+                    input=text
+                )
+                response.stream_to_file(output_path)
         except Exception as e:
             raise RuntimeError(f"OpenAI TTS failed: {e}")
 
@@ -60,21 +82,120 @@ class VoiceGenerator:
         except Exception as e:
             raise RuntimeError(f"Local TTS failed: {e}")
 
-    def generate_single_slide_audio(self, script: str, slide_index: int, output_dir: str) -> str:
-        if not script or not script.strip():
-            return ""
+    async def generate_audio_openai_async(self, text: str, output_path: str) -> None:
+        """Generate audio using the async OpenAI TTS API."""
+        try:
+            async with get_budget("openai").aslot():
+                response = await self.async_client.audio.speech.create(
+                    model=self.model,
+                    voice=self.voice,
+                    input=text
+                )
+                audio_bytes = await response.aread()
+            await asyncio.to_thread(write_atomic, output_path, audio_bytes)
+        except Exception as e:
+            raise RuntimeError(f"OpenAI TTS failed: {e}")
 
+    def _slide_audio_path(self, slide_index: int, output_dir: str) -> str:
         ext = "mp3" if self.use_openai else "wav"
         filename = f"slide_{slide_index:02d}.{ext}"
-        output_path = os.path.join(output_dir, filename)
+        return os.path.join(output_dir, filename)
 
+    # -------------------------------------------------------
+    # AUDIO CACHE
+    # -------------------------------------------------------
+
+    def _audio_cache_key(self, text: str) -> str:
         if self.use_openai:
-            self.generate_audio_openai(script, output_path)
-        else:
-            self.generate_audio_local(script, output_path)
+            return BlobCache.make_key("openai", self.voice, self.model, text)
+        return BlobCache.make_key(
+            "pyttsx3", self.engine.getProperty('voice'), f"rate={self.engine.getProperty('rate')}", text
+        )
+
+    def _reuse_cached_audio(self, key: str, output_path: str) -> bool:
+        audio_cache = get_audio_cache()
+        if audio_cache is None:
+            return False
+        cached = audio_cache.get(key, os.path.splitext(output_path)[1])
+        if cached is None:
+            return False
+        try:
+            audio_cache.materialize(cached, output_path)
+        except OSError as e:
+            print(f"   ⚠️ Audio cache hit unusable: {e}")
+            return False
+        return True
+
+    def _store_audio(self, key: str, output_path: str) -> None:
+        audio_cache = get_audio_cache()
+        if audio_cache is None:
+            return
+        try:
+            audio_cache.put_file(key, output_path, os.path.splitext(output_path)[1])
+        except OSError as e:
+            print(f"   ⚠️ Audio cache write failed: {e}")
+
+    # -------------------------------------------------------
+    # PER-SLIDE ENTRY POINTS
+    # -------------------------------------------------------
+
+    def generate_single_slide_audio(self, script: str, slide_index: int, output_dir: str) -> str:
+        if not script or not script.strip():
+            return ""
+
+        output_path = self._slide_audio_path(slide_index, output_dir)
+        key = self._audio_cache_key(script)
+        if self._reuse_cached_audio(key, output_path):
+            print(f"   [Cached] Audio {slide_index} reused from audio cache.")
+            return output_path
 
+        # Synthesize into a temp file and rename: output_path may be a hard
+        # link into the cache, which must never be rewritten in place
+        tmp_path = _temp_path(output_path)
+        try:
+            if self.use_openai:
+                self.generate_audio_openai(script, tmp_path)
+            else:
+                self.generate_audio_local(script, tmp_path)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._store_audio(key, output_path)
         return output_path
 
+    async def generate_single_slide_audio_async(self, script: str, slide_index: int, output_dir: str) -> str:
+        if not script or not script.strip():
+            return ""
+
+        output_path = self._slide_audio_path(slide_index, output_dir)
+        key = self._audio_cache_key(script)
+        if await asyncio.to_thread(self._reuse_cached_audio, key, output_path):
+            print(f"   [Cached] Audio {slide_index} reused from audio cache.")
+            return output_path
+
+        tmp_path = _temp_path(output_path)
+        try:
+            if self.use_openai:
+                await self.generate_audio_openai_async(script, tmp_path)
+            else:
+                # pyttsx3 has no async API; keep it off the event loop
+                await asyncio.to_thread(self.generate_audio_local, script, tmp_path)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        await asyncio.to_thread(self._store_audio, key, output_path)
+        return output_path
+
+
+def _temp_path(output_path: str) -> str:
+    # Keep the real extension last; engines pick the container from it
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+
 # -----------------------------------------------------------
 # HELPER FOR PARALLEL EXECUTION
 # -----------------------------------------------------------
@@ -119,7 +240,9 @@ def generate_audio_from_scripts(
     generated_files = [None] * len(scripts)
     print(f"\n🎙️  Starting PARALLEL Voiceover (Workers: {max_workers})...")
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers, initializer=bind_job, initargs=(current_job(),)
+    ) as executor:
         # Submit all tasks
         futures = {
             executor.submit(_process_single_audio_task, generator, script, i, output_dir): i
@@ -138,6 +261,52 @@ def generate_audio_from_scripts(
     print(f"✅ Audio generation complete. {len(valid_files)}/{len(scripts)} success.\n")
     return valid_files
 
+# -----------------------------------------------------------
+# ASYNC VARIANT
+# -----------------------------------------------------------
+
+async def generate_audio_from_scripts_async(
+    scripts: List[str],
+    output_dir: str = "generated_audio",
+    max_concurrency: int = 5
+) -> List[str]:
+    """
+    Async counterpart of generate_audio_from_scripts.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    generator = VoiceGenerator(use_openai=True)
+
+    if not generator.use_openai:
+        print("⚠️ Local TTS detected. Forcing sequential execution (not thread-safe).")
+        max_concurrency = 1
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    print(f"\n🎙️  Starting ASYNC Voiceover (Concurrency: {max_concurrency})...")
+
+    async def run(idx: int, script: str) -> Optional[str]:
+        async with semaphore:
+            try:
+                path = await generator.generate_single_slide_audio_async(script, idx, output_dir)
+                if path:
+                    print(f"   [Done] Audio {idx} saved.")
+                else:
+                    print(f"   [Skip] Audio {idx} empty.")
+                return path
+            except Exception as e:
+                print(f"   [ERROR] Audio {idx} failed: {e}")
+                return None
+
+    generated_files = await asyncio.gather(
+        *(run(i, script) for i, script in enumerate(scripts, start=1))
+    )
+
+    # Filter out failures
+    valid_files = [f for f in generated_files if f]
+
+    print(f"✅ Audio generation complete. {len(valid_files)}/{len(scripts)} success.\n")
+    return valid_files
+
 if __name__ == "__main__":
     # Test script
     mock_scripts = ["Hello world"] * 5
@@ -0,0 +1,123 @@
+import os
+import time
+import uuid
+import shutil
+from typing import Optional
+
+from src.config import WORKSPACE_ROOT, WORKSPACE_CLEANUP, WORKSPACE_RETENTION_SECONDS
+
+CLEANUP_POLICIES = ("always", "on_success", "never")
+
+# Marks a workspace as in use (holds the owner's pid) so sweeps skip it
+ACTIVE_MARKER = ".active"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _in_use(path: str) -> bool:
+    try:
+        with open(os.path.join(path, ACTIVE_MARKER), "r", encoding="utf-8") as f:
+            pid = int(f.read().strip() or 0)
+        return pid > 0 and _pid_alive(pid)
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+# ============================================================
+# WORKSPACE
+# ============================================================
+
+class Workspace:
+    """
+    Private working directory for one generation, so concurrent jobs never
+    share slide_NN.png / slide_NN.mp3 paths:
+
+        <root>/<job_id>/visuals/
+        <root>/<job_id>/audio/
+
+    Used as a context manager. On exit the directory is removed according
+    to `cleanup`: "always", "on_success" (failed runs are kept for
+    debugging) or "never". A run counts as failed if it raised or set
+    `succeeded = False`. Kept workspaces are removed by `sweep_workspaces`
+    once they are older than the retention period.
+    """
+
+    def __init__(self, job_id: Optional[str] = None, root: str = WORKSPACE_ROOT, cleanup: str = WORKSPACE_CLEANUP):
+        if cleanup not in CLEANUP_POLICIES:
+            raise ValueError(f"Unknown workspace cleanup policy: {cleanup} (expected one of {CLEANUP_POLICIES})")
+        self.job_id = job_id or uuid.uuid4().hex
+        self.root = root
+        self.path = os.path.join(root, self.job_id)
+        self.cleanup = cleanup
+        self.succeeded: Optional[bool] = None
+
+    @property
+    def image_dir(self) -> str:
+        return os.path.join(self.path, "visuals")
+
+    @property
+    def audio_dir(self) -> str:
+        return os.path.join(self.path, "audio")
+
+    def open(self) -> "Workspace":
+        sweep_workspaces(self.root)
+        os.makedirs(self.image_dir, exist_ok=True)
+        os.makedirs(self.audio_dir, exist_ok=True)
+        with open(os.path.join(self.path, ACTIVE_MARKER), "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        return self
+
+    def close(self, succeeded: bool = True) -> None:
+        if self.cleanup == "always" or (self.cleanup == "on_success" and succeeded):
+            shutil.rmtree(self.path, ignore_errors=True)
+            return
+        try:
+            os.remove(os.path.join(self.path, ACTIVE_MARKER))
+        except FileNotFoundError:
+            pass
+        print(f"   [Workspace] Kept {self.path} ({'ok' if succeeded else 'failed'} run)")
+
+    def __enter__(self) -> "Workspace":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(succeeded=exc_type is None and self.succeeded is not False)
+        return False
+
+
+# ============================================================
+# RETENTION
+# ============================================================
+
+def sweep_workspaces(root: str = WORKSPACE_ROOT, retention_seconds: float = WORKSPACE_RETENTION_SECONDS) -> int:
+    """
+    Remove workspaces untouched for longer than `retention_seconds` whose
+    owner is no longer running. Returns how many were removed.
+    """
+    if not os.path.isdir(root):
+        return 0
+
+    cutoff = time.time() - retention_seconds
+    removed = 0
+    for entry in os.scandir(root):
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        try:
+            if entry.stat().st_mtime > cutoff or _in_use(entry.path):
+                continue
+        except FileNotFoundError:
+            continue  # removed concurrently
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed += 1
+
+    if removed:
+        print(f"[Workspace] Swept {removed} expired workspace(s) from {root}")
+    return removed
@@ -0,0 +1,56 @@
+import os
+import time
+
+import pytest
+
+from src.services.artifacts import ArtifactStore, normalize_topic, topic_key
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Bubble sort!", "  bubble   SORT "),
+    ("\"Dijkstra's algorithm\"", "dijkstra's algorithm."),
+    ("(Quick sort)", "quick sort"),
+    ("ＦＦＴ", "fft"),
+])
+def test_equivalent_topics_share_a_key(a, b):
+    assert topic_key(a) == topic_key(b)
+
+
+def test_symbols_inside_topics_are_significant():
+    topics = ["C", "C++", "C#", "F#", "F", ".NET", "NET", "Node.js", "Node js"]
+    keys = {topic_key(topic) for topic in topics}
+    assert len(keys) == len(topics)
+    assert normalize_topic("C++") == "c++"
+    assert normalize_topic("C#?") == "c#"
+
+
+def test_store_ignores_entries_from_another_topic(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    store.save_stage("C++", "objectives", ["pointers"])
+
+    # Simulate an entry written under a colliding normalization
+    directory = os.path.join(tmp_path, topic_key("C#"))
+    os.replace(os.path.join(tmp_path, topic_key("C++")), directory)
+
+    assert store.load("C#").objectives is None
+    store.save_stage("C#", "objectives", ["delegates"])
+    assert store.load("C#").objectives == ["delegates"]
+
+
+def test_prune_drops_expired_then_least_recently_used(tmp_path):
+    store = ArtifactStore(root=str(tmp_path), max_bytes=2500, max_age_seconds=3600)
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"x" * 1000)
+
+    def last_used(topic, seconds_ago):
+        stamp = time.time() - seconds_ago
+        os.utime(os.path.join(tmp_path, topic_key(topic), "manifest.json"), (stamp, stamp))
+
+    for topic, seconds_ago in (("a", 7200), ("old", 60), ("b", 30)):
+        store.save_video(topic, str(video))
+        last_used(topic, seconds_ago)
+    store.save_video("c", str(video))  # prunes: "a" is expired, then "old" is least recently used
+
+    assert store.load("a").video is None  # expired
+    assert store.load("old").video is None  # evicted for size
+    assert store.load("b").video and store.load("c").video
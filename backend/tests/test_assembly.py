@@ -0,0 +1,68 @@
+import threading
+import time
+import concurrent.futures
+
+import pytest
+
+import src.services.assembly as assembly
+from src.services.assembly import SegmentRenderer
+from src.services.live import LivePlaylist, live_dir_for
+
+
+class FakeRenderPool:
+    """Finishes each 'encode' on its own thread after a short delay."""
+
+    def submit(self, fn, assembler, img_path, audio_path, segment_path, *args):
+        future = concurrent.futures.Future()
+
+        def run():
+            time.sleep(0.02)
+            # Like a real executor: a cancelled job never starts, and waiters are told so
+            if future.set_running_or_notify_cancel():
+                future.set_result(segment_path)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+
+@pytest.fixture
+def slides(tmp_path, monkeypatch):
+    monkeypatch.setattr(assembly, "get_render_pool", FakeRenderPool)
+    media = []
+    for idx in (1, 2, 3):
+        img, audio = tmp_path / f"slide_{idx}.png", tmp_path / f"slide_{idx}.mp3"
+        img.write_bytes(b"png%d" % idx)
+        audio.write_bytes(b"mp3%d" % idx)
+        media.append((idx, str(img), str(audio)))
+    return media
+
+
+def test_segments_waits_for_every_callback(slides):
+    reported = []
+
+    def on_segment(idx, path):
+        time.sleep(0.1)  # slower than the waiter waking up
+        reported.append(idx)
+
+    with SegmentRenderer("ffmpeg", on_segment=on_segment) as renderer:
+        for slide in slides:
+            assert renderer.submit(*slide)
+        assert len(renderer.segments()) == 3
+        assert sorted(reported) == [1, 2, 3]
+
+
+def test_close_waits_for_callbacks_of_running_encodes(slides):
+    reported = []
+    renderer = SegmentRenderer("ffmpeg", on_segment=lambda idx, path: (time.sleep(0.05), reported.append(idx)))
+    for slide in slides:
+        renderer.submit(*slide)
+    time.sleep(0.05)  # encodes are running, so close() cannot cancel them
+    renderer.close()
+    assert sorted(reported) == [1, 2, 3]
+
+
+def test_live_playlist_rejects_late_slides(tmp_path):
+    live = LivePlaylist(live_dir_for(str(tmp_path / "lecture.mp4")))
+    live.finish()
+    with pytest.raises(RuntimeError):
+        live.add(1, None)
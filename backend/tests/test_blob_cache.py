@@ -0,0 +1,34 @@
+import os
+
+from src.services.blob_cache import BlobCache
+
+
+def _put(cache, name, size=1000):
+    return cache.put_bytes(BlobCache.make_key(name), b"x" * size, ".png")
+
+
+def test_construction_is_lazy(tmp_path):
+    root = tmp_path / "cache"
+    BlobCache(str(root), 1000)
+    assert not root.exists()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = BlobCache(str(tmp_path), max_bytes=2500)
+    _put(cache, "a")
+    _put(cache, "b")
+    assert cache.get(BlobCache.make_key("a"), ".png")  # "b" is now the oldest
+    _put(cache, "c")
+
+    assert cache.get(BlobCache.make_key("b"), ".png") is None
+    assert cache.get(BlobCache.make_key("a"), ".png")
+    assert cache.get(BlobCache.make_key("c"), ".png")
+    assert cache.stats()["bytes"] == 2000
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    path = _put(BlobCache(str(tmp_path), max_bytes=10_000), "a")
+    cache = BlobCache(str(tmp_path), max_bytes=10_000)
+    assert cache.stats()["entries"] == 1
+    assert cache.get(BlobCache.make_key("a"), ".png") == path
+    assert os.path.getsize(path) == 1000
@@ -0,0 +1,67 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+import src.LLM.Gemini as gemini
+from src.LLM.cache import CompletionCache, MemoryCacheBackend
+
+
+class BudgetProbe:
+    def __init__(self):
+        self.held = False
+        self.entered = 0
+
+    @contextlib.contextmanager
+    def slot(self):
+        self.held = True
+        self.entered += 1
+        try:
+            yield
+        finally:
+            self.held = False
+
+    @contextlib.asynccontextmanager
+    async def aslot(self):
+        with self.slot():
+            yield
+
+
+def _response():
+    return SimpleNamespace(text="reply")
+
+
+def _client(monkeypatch, cls, generate_content):
+    monkeypatch.setattr(gemini, "GEMINI_API_KEY", "test-key")
+    models = SimpleNamespace(generate_content=generate_content)
+    monkeypatch.setattr(gemini.genai, "Client", lambda api_key: SimpleNamespace(models=models, aio=SimpleNamespace(models=models)))
+    client = cls(model="gemini-test", cache=CompletionCache(MemoryCacheBackend()))
+    client.budget = BudgetProbe()
+    return client
+
+
+def test_chat_holds_a_budget_slot_for_the_provider_call_only(monkeypatch):
+    probe_seen = []
+
+    def generate_content(**kwargs):
+        probe_seen.append(client.budget.held)
+        return _response()
+
+    client = _client(monkeypatch, gemini.GeminiClient, generate_content)
+    assert client.chat("system", "user") == "reply"
+    assert client.chat("system", "user") == "reply"  # cache hit: no slot
+    assert probe_seen == [True]
+    assert client.budget.entered == 1
+
+
+def test_async_chat_holds_a_budget_slot(monkeypatch):
+    probe_seen = []
+
+    async def generate_content(**kwargs):
+        probe_seen.append(client.budget.held)
+        return _response()
+
+    client = _client(monkeypatch, gemini.AsyncGeminiClient, generate_content)
+    assert asyncio.run(client.chat("system", "user")) == "reply"
+    assert asyncio.run(client.chat("system", "user")) == "reply"
+    assert probe_seen == [True]
+    assert client.budget.entered == 1
@@ -0,0 +1,61 @@
+import threading
+
+from src.services.artifacts import normalize_topic
+from src.services.events import ProgressBus
+from src.services.jobs import JobManager
+
+
+def _manager(workers=1):
+    return JobManager(max_workers=workers, bus=ProgressBus())
+
+
+def test_live_url_is_unset_until_published():
+    manager = _manager()
+    release = threading.Event()
+    published = threading.Event()
+
+    def work(job):
+        release.wait(5)
+        job.publish_live("/api/videos/a.mp4/live/index.m3u8")
+        published.set()
+        return "/api/videos/a.mp4"
+
+    leader = manager.submit("alice", "Sorting", work, dedup_key="sorting")
+    follower = manager.submit("bob", "Sorting", lambda job: None, dedup_key="sorting")
+    assert leader.live_url is None
+    assert follower.to_dict()["live_url"] is None
+
+    release.set()
+    assert published.wait(5)
+    assert leader.live_url == follower.live_url == "/api/videos/a.mp4/live/index.m3u8"
+    manager.shutdown(wait=True)
+    assert follower.to_dict()["video_url"] == "/api/videos/a.mp4"
+
+
+def test_job_without_live_playlist_has_no_live_url():
+    manager = _manager()
+    job = manager.submit("alice", "Sorting", lambda job: "/api/videos/a.mp4")
+    manager.shutdown(wait=True)
+    assert job.to_dict()["live_url"] is None
+
+
+def test_single_flight_keys_keep_language_names_apart():
+    manager = _manager(workers=4)
+    release = threading.Event()
+
+    def work(job):
+        release.wait(5)
+        return job.topic
+
+    jobs = {
+        topic: manager.submit("alice", topic, work, dedup_key=normalize_topic(topic))
+        for topic in ("C++", "C#", "C", "  c++ ")
+    }
+    release.set()
+    manager.shutdown(wait=True)
+
+    assert jobs["C#"].leader_id is None
+    assert jobs["C"].leader_id is None
+    assert jobs["  c++ "].leader_id == jobs["C++"].id
+    assert jobs["C#"].result == "C#"
+    assert jobs["  c++ "].result == "C++"
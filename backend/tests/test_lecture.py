@@ -0,0 +1,93 @@
+import asyncio
+import contextlib
+import json
+
+import pytest
+
+import src.LLM.ChatGPT as chatgpt
+import src.services.lecture as lecture
+from src.LLM.cache import CompletionCache, MemoryCacheBackend
+from src.services.lecture import is_complete_json_array, iter_json_array_objects
+
+PLAN = [{"title": "One"}, {"title": "Two"}, {"title": "Three"}]
+
+
+def test_streamed_array_is_parsed_across_chunks():
+    chunks = ['```json\n[{"a": "x}', '"}, {"b": [1, ', '2]}]', "\n```"]
+    assert list(iter_json_array_objects(chunks)) == [{"a": "x}"}, {"b": [1, 2]}]
+
+
+@pytest.mark.parametrize("chunks", [
+    ['[{"a":1},', ' {"b":2},'],   # cut off between objects
+    ['[{"a":1}, {"b":'],          # cut off mid-object
+    ["Sorry, I can't help."],     # no array at all
+])
+def test_truncated_stream_raises(chunks):
+    with pytest.raises(ValueError):
+        list(iter_json_array_objects(chunks))
+
+
+def test_is_complete_json_array():
+    assert is_complete_json_array('[{"a": 1}]')
+    assert not is_complete_json_array('[{"a": 1},')
+    assert not is_complete_json_array("no array")
+
+
+class FakeStreamClient:
+    def __init__(self, text):
+        self.text = text
+
+    def chat_stream(self, system_prompt, user_prompt, complete=None):
+        yield from (self.text[i:i + 7] for i in range(0, len(self.text), 7))
+
+
+def test_stream_slide_content_rejects_short_lecture(monkeypatch):
+    text = json.dumps(PLAN[:2])
+    monkeypatch.setattr(lecture, "get_shared_client", lambda: FakeStreamClient(text))
+    with pytest.raises(ValueError, match="Planned 3 slides"):
+        list(lecture.stream_slide_content(PLAN))
+
+
+def test_async_stream_slide_content_rejects_short_lecture(monkeypatch):
+    class FakeAsyncStreamClient:
+        async def chat_stream(self, system_prompt, user_prompt, complete=None):
+            yield json.dumps(PLAN[:2])
+
+    async def collect():
+        return [slide async for slide in lecture.stream_slide_content_async(PLAN)]
+
+    monkeypatch.setattr(lecture, "get_shared_async_client", FakeAsyncStreamClient)
+    with pytest.raises(ValueError, match="Planned 3 slides"):
+        asyncio.run(collect())
+
+
+def test_stream_slide_content_yields_full_lecture(monkeypatch):
+    monkeypatch.setattr(lecture, "get_shared_client", lambda: FakeStreamClient(json.dumps(PLAN)))
+    assert list(lecture.stream_slide_content(PLAN)) == PLAN
+
+
+def _sse(text, done=True):
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': text[i:i + 5]}}]})}" for i in range(0, len(text), 5)]
+    return lines + (["data: [DONE]"] if done else [])
+
+
+@pytest.mark.parametrize("reply, cached", [(json.dumps(PLAN), True), (json.dumps(PLAN)[:-10], False)])
+def test_chat_stream_caches_only_closed_arrays(monkeypatch, reply, cached):
+    monkeypatch.setattr(chatgpt, "OPENAI_API_KEY", "test-key")
+    cache = CompletionCache(MemoryCacheBackend())
+    client = chatgpt.ChatGPTClient(model="test-model", session=object(), cache=cache)
+
+    @contextlib.contextmanager
+    def open_stream(url, payload, timeout=None):
+        yield iter(_sse(reply))
+
+    monkeypatch.setattr(client, "_open_stream", open_stream)
+    stream = client.chat_stream("system", "user", complete=is_complete_json_array)
+    if cached:
+        assert list(iter_json_array_objects(stream)) == PLAN
+    else:
+        with pytest.raises(ValueError):
+            list(iter_json_array_objects(stream))
+
+    stored = cache.get(client._cache_key("system", "user"))
+    assert (stored == reply) if cached else stored is None
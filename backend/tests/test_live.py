@@ -0,0 +1,45 @@
+import os
+
+from src.services.live import LIVE_PLAYLIST, LivePlaylist, live_dir_for, sweep_live_dirs
+
+
+def _age(path, seconds):
+    stamp = os.path.getmtime(path) - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_sweep_removes_expired_live_dirs_only(tmp_path):
+    expired = tmp_path / "old.live"
+    fresh = tmp_path / "new.live"
+    other = tmp_path / "old.hls"
+    for directory in (expired, fresh, other):
+        directory.mkdir()
+        (directory / LIVE_PLAYLIST).write_text("#EXTM3U\n")
+    _age(expired, 7200)
+    _age(other, 7200)
+
+    assert sweep_live_dirs(str(tmp_path), retention_seconds=3600) == 1
+    assert not expired.exists()
+    assert fresh.exists()
+    assert other.exists()
+
+
+def test_sweep_skips_open_playlists(tmp_path):
+    live = LivePlaylist(live_dir_for(str(tmp_path / "lecture.mp4")))
+    _age(live.live_dir, 7200)
+    assert sweep_live_dirs(str(tmp_path), retention_seconds=3600) == 0
+
+    live.finish()
+    with open(os.path.join(live.live_dir, LIVE_PLAYLIST), encoding="utf-8") as f:
+        assert f.read().rstrip().endswith("#EXT-X-ENDLIST")
+    _age(live.live_dir, 7200)
+    assert sweep_live_dirs(str(tmp_path), retention_seconds=3600) == 1
+
+
+def test_new_playlist_sweeps_expired_siblings(tmp_path):
+    expired = tmp_path / "old.live"
+    expired.mkdir()
+    _age(expired, 10 ** 6)
+
+    with LivePlaylist(live_dir_for(str(tmp_path / "lecture.mp4"))):
+        assert not expired.exists()
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+VIDEO_NAME = "lecture.mp4"
+VIDEO_SIZE = 8 * 1024 * 1024 + 123
+
+
+@pytest.fixture
+def video(tmp_path, monkeypatch):
+    # The route resolves "output/videos" against the working directory
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("output/videos")
+    data = os.urandom(VIDEO_SIZE)
+    with open(os.path.join("output/videos", VIDEO_NAME), "wb") as f:
+        f.write(data)
+    return data
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+URL = f"/api/videos/{VIDEO_NAME}"
+
+
+def test_full_get_has_validators(client, video):
+    response = client.get(URL)
+    assert response.status_code == 200
+    assert response.content == video
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"].startswith('"')
+    assert "last-modified" in response.headers
+
+
+def test_range_returns_206(client, video):
+    response = client.get(URL, headers={"Range": "bytes=1048576-2097151"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 1048576-2097151/{VIDEO_SIZE}"
+    assert response.headers["content-length"] == "1048576"
+    assert response.content == video[1048576:2097152]
+
+
+def test_suffix_range_returns_tail(client, video):
+    response = client.get(URL, headers={"Range": "bytes=-500"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes {VIDEO_SIZE - 500}-{VIDEO_SIZE - 1}/{VIDEO_SIZE}"
+    assert response.content == video[-500:]
+
+
+def test_if_none_match_returns_304(client, video):
+    etag = client.head(URL).headers["etag"]
+    response = client.get(URL, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_stale_if_none_match_returns_body(client, video):
+    response = client.get(URL, headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert len(response.content) == VIDEO_SIZE
+
+
+def test_unsatisfiable_range_returns_416(client, video):
+    response = client.get(URL, headers={"Range": f"bytes={VIDEO_SIZE}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{VIDEO_SIZE}"
+
+
+def test_if_range_match_returns_206(client, video):
+    etag = client.head(URL).headers["etag"]
+    response = client.get(URL, headers={"Range": "bytes=0-99", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.content == video[:100]
+
+
+def test_if_range_mismatch_returns_full_body(client, video):
+    response = client.get(URL, headers={"Range": "bytes=0-99", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert "content-range" not in response.headers
+    assert response.content == video
+
+
+def test_head_has_headers_and_no_body(client, video):
+    get_headers = client.get(URL).headers
+    response = client.head(URL)
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["content-length"] == str(VIDEO_SIZE)
+    assert response.headers["etag"] == get_headers["etag"]
+    assert response.headers["content-type"] == "video/mp4"
+
+
+def test_rewritten_file_changes_etag(client, video):
+    etag = client.head(URL).headers["etag"]
+    with open(os.path.join("output/videos", VIDEO_NAME), "wb") as f:
+        f.write(video[:-1])
+    assert client.head(URL).headers["etag"] != etag
+    assert client.get(URL, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_missing_video_returns_404(client, video):
+    assert client.get("/api/videos/missing.mp4").status_code == 404
@@ -0,0 +1,87 @@
+import asyncio
+import contextlib
+
+import pytest
+
+import src.LLM.ratelimit as ratelimit
+from src.LLM.ratelimit import AdaptiveLimiter
+
+
+class Throttled(Exception):
+    code = 429
+
+
+class SlotProbe:
+    """Budget stand-in that records when its slot is held."""
+
+    def __init__(self):
+        self.held = False
+        self.entered = 0
+
+    @contextlib.contextmanager
+    def slot(self):
+        self.held = True
+        self.entered += 1
+        try:
+            yield
+        finally:
+            self.held = False
+
+    @contextlib.asynccontextmanager
+    async def aslot(self):
+        with self.slot():
+            yield
+
+
+def _limiter():
+    return AdaptiveLimiter("test", rate_per_minute=0, retry_attempts=2, retry_base_delay=0.01, retry_max_delay=0.01)
+
+
+def _flaky(probe, failures):
+    calls = []
+
+    def fn():
+        assert probe.held
+        calls.append(1)
+        if len(calls) <= failures:
+            raise Throttled("RESOURCE_EXHAUSTED")
+        return "ok"
+    return fn
+
+
+def test_slot_is_released_before_backoff(monkeypatch):
+    probe = SlotProbe()
+    sleeps = []
+    monkeypatch.setattr(ratelimit.time, "sleep", lambda seconds: sleeps.append(probe.held))
+
+    assert _limiter().call(_flaky(probe, failures=2), slot=probe.slot) == "ok"
+    assert probe.entered == 3
+    assert sleeps == [False, False]
+
+
+def test_slot_is_released_when_retries_run_out():
+    probe = SlotProbe()
+    with pytest.raises(Throttled):
+        _limiter().call(_flaky(probe, failures=5), slot=probe.slot)
+    assert not probe.held
+
+
+def test_async_slot_is_released_before_backoff(monkeypatch):
+    probe = SlotProbe()
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        sleeps.append(probe.held)
+        await real_sleep(0)
+
+    monkeypatch.setattr(ratelimit.asyncio, "sleep", sleep)
+    flaky = _flaky(probe, failures=1)
+
+    async def fn():
+        return flaky()
+
+    assert asyncio.run(_limiter().acall(fn, slot=probe.aslot)) == "ok"
+    assert probe.entered == 2
+    # Backoff and cooldown polling both sleep; none of it inside the slot
+    assert sleeps and not any(sleeps)
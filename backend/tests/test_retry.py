@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+import src.LLM.retry as retry
+from src.LLM.retry import hedged_call
+
+
+def test_first_attempt_runs_on_the_callers_thread():
+    threads = []
+
+    def fn():
+        threads.append(threading.current_thread())
+        return "ok"
+
+    assert hedged_call(fn, hedge_after=5.0) == "ok"
+    assert threads == [threading.current_thread()]
+
+
+def test_fast_call_is_not_hedged():
+    calls = []
+    assert hedged_call(lambda: calls.append(1) or "ok", hedge_after=0.2) == "ok"
+    time.sleep(0.3)
+    assert calls == [1]
+
+
+def test_slow_call_sends_one_duplicate_on_the_pool():
+    threads = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            threads.append(threading.current_thread())
+            first = len(threads) == 1
+        time.sleep(0.3 if first else 0.05)
+        return "first" if first else "duplicate"
+
+    assert hedged_call(fn, hedge_after=0.05) == "first"
+    assert len(threads) == 2
+    assert threads[0] is threading.current_thread()
+    assert threads[1].name.startswith("llm-hedge")
+
+
+def test_duplicate_answers_when_the_first_attempt_fails():
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.2)
+            raise TimeoutError("slow")
+        return "duplicate"
+
+    assert hedged_call(fn, hedge_after=0.05) == "duplicate"
+
+
+def test_failure_without_duplicate_is_raised():
+    def fn():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        hedged_call(fn, hedge_after=5.0)
+
+
+def test_busy_hedge_pool_skips_the_duplicate(monkeypatch):
+    monkeypatch.setattr(retry, "_hedge_slots", threading.BoundedSemaphore(1))
+    retry._hedge_slots.acquire()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.15)
+        return "ok"
+
+    assert hedged_call(fn, hedge_after=0.05) == "ok"
+    assert calls == [1]
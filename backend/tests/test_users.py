@@ -0,0 +1,118 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import src.services.users as users
+from src.services.users import MemoryUserRepository, SQLiteUserRepository, UserExistsError, UserRepository
+
+
+def _user(name):
+    return {"username": name, "email": f"{name}@example.com", "password_hash": "x"}
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        UserRepository()
+
+    class Partial(UserRepository):
+        async def get_by_id(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repo(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteUserRepository(str(tmp_path / "users.sqlite3"))
+    return MemoryUserRepository()
+
+
+def test_create_find_and_update(repo):
+    async def scenario():
+        created = await repo.create(_user("ada"))
+        assert created["is_active"] is True
+        assert (await repo.get_by_username("ada"))["id"] == created["id"]
+        assert (await repo.get_by_email("ada@example.com"))["id"] == created["id"]
+
+        await repo.update(created["id"], {"is_active": False})
+        assert (await repo.get_by_id(created["id"]))["is_active"] is False
+
+        assert await repo.find_conflict("ada", "other@example.com") == "username"
+        assert await repo.find_conflict("other", "ada@example.com") == "email"
+        assert await repo.find_conflict("other", "other@example.com") is None
+
+        with pytest.raises(UserExistsError) as excinfo:
+            await repo.create({**_user("grace"), "email": "ada@example.com"})
+        assert excinfo.value.field == "email"
+        assert await repo.get_by_username("grace") is None
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_closes_every_connection(tmp_path, monkeypatch):
+    opened = []
+    real_connect = sqlite3.connect
+
+    class TrackedConnection(sqlite3.Connection):
+        closed = False
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    def connect(*args, **kwargs):
+        conn = real_connect(*args, factory=TrackedConnection, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(users.sqlite3, "connect", connect)
+    repo = SQLiteUserRepository(str(tmp_path / "users.sqlite3"))
+
+    async def scenario():
+        created = await repo.create(_user("ada"))
+        await repo.get_by_id(created["id"])
+        await repo.find_conflict("ada", "ada@example.com")
+        await repo.update(created["id"], {"is_active": False})
+        with pytest.raises(UserExistsError):
+            await repo.create(_user("ada"))
+
+    asyncio.run(scenario())
+    assert len(opened) == 6
+    assert all(conn.closed for conn in opened)
+
+
+class FakeSupabaseClient:
+    def table(self, name):
+        return name
+
+
+def test_supabase_client_creation_is_retried_after_a_failure(monkeypatch):
+    attempts = []
+
+    async def acreate_client(url, key):
+        attempts.append(url)
+        await asyncio.sleep(0)
+        if len(attempts) == 1:
+            raise ConnectionError("network down")
+        return FakeSupabaseClient()
+
+    monkeypatch.setattr(users, "SUPABASE_AVAILABLE", True)
+    monkeypatch.setattr(users, "acreate_client", acreate_client, raising=False)
+    repo = users.SupabaseUserRepository("https://example.supabase.co", "key")
+
+    async def scenario():
+        with pytest.raises(ConnectionError):
+            await repo._table()
+        # Concurrent first requests share one creation
+        tables = await asyncio.gather(repo._table(), repo._table())
+        assert tables == [users.USERS_TABLE, users.USERS_TABLE]
+        assert await repo._table() == users.USERS_TABLE
+        await asyncio.sleep(0)
+        assert isinstance(repo._clients[asyncio.get_running_loop()], FakeSupabaseClient)
+        assert not repo._pending
+
+    asyncio.run(scenario())
+    assert len(attempts) == 2
@@ -0,0 +1,33 @@
+import pytest
+
+import src.services.video as video
+
+
+@pytest.fixture
+def paid_calls(monkeypatch):
+    calls = []
+
+    def fail(*args, **kwargs):
+        calls.append(args)
+        raise AssertionError("model called before the settings were checked")
+
+    monkeypatch.setattr(video.lecture, "generate_learning_objectives", fail)
+    monkeypatch.setattr(video.lecture, "generate_slide_plan", fail)
+    return calls
+
+
+@pytest.mark.parametrize("settings", [{"assembler": "bogus"}, {"output_format": "bogus"}])
+def test_bad_settings_fail_before_model_calls(tmp_path, paid_calls, settings):
+    with pytest.raises(ValueError):
+        video.generate_lecture_video(
+            "Topic", str(tmp_path / "out.mp4"), use_artifact_cache=False, **settings
+        )
+    assert paid_calls == []
+
+
+def test_missing_moviepy_skips_before_model_calls(tmp_path, paid_calls, monkeypatch):
+    monkeypatch.setattr(video, "MOVIEPY_AVAILABLE", False)
+    assert video.generate_lecture_video(
+        "Topic", str(tmp_path / "out.mp4"), use_artifact_cache=False, assembler="moviepy"
+    ) is None
+    assert paid_calls == []
@@ -69,7 +69,7 @@ export const mockChatService = {
   /**
    * Send chat message (mock or real backend)
    */
-  async sendMessage(message, token = null) {
+  async sendMessage(message, token = null, onProgress = null) {
     if (this.useMockChat()) {
       // Mock response
       await simulateDelay(1500); // Simulate processing time
@@ -106,7 +106,103 @@ export const mockChatService = {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
       
-      return await response.json();
+      const result = await response.json();
+      
+      // Generation runs as a background job - follow its events until the video is ready
+      if (result.job_id && !result.video_url) {
+        const job = await this.waitForJob(API_BASE_URL, result.job_id, headers, onProgress);
+        return {
+          ...result,
+          response: `I've generated a video lecture about '${result.topic}'. The video is ready for download!`,
+          video_url: job.video_url
+        };
+      }
+      
+      return result;
+    }
+  },
+  
+  /**
+   * Wait for a generation job, following its progress event stream and
+   * falling back to polling if the stream is unavailable
+   */
+  async waitForJob(apiBaseUrl, jobId, headers, onProgress = null) {
+    try {
+      const job = await this.streamJobEvents(apiBaseUrl, jobId, headers, onProgress);
+      if (job) {
+        return job;
+      }
+    } catch (err) {
+      if (err.jobFailed) {
+        throw err;
+      }
+      console.warn('Job event stream unavailable, polling instead:', err);
+    }
+    return this.pollJob(apiBaseUrl, jobId, headers);
+  },
+  
+  /**
+   * Read the job's Server-Sent Events stream (fetch, so the auth header is sent).
+   * Resolves with the final job state, or null if the stream ended early.
+   */
+  async streamJobEvents(apiBaseUrl, jobId, headers, onProgress) {
+    const response = await fetch(`${apiBaseUrl}/api/jobs/${jobId}/events`, { headers });
+    if (!response.ok || !response.body) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) {
+        return null;
+      }
+      buffer += value;
+      
+      // Frames are separated by a blank line; keep any partial frame
+      const frames = buffer.split('\n\n');
+      buffer = frames.pop();
+      for (const frame of frames) {
+        const data = frame.split('\n').find(line => line.startsWith('data: '));
+        if (!data) {
+          continue; // keep-alive comment
+        }
+        const event = JSON.parse(data.slice('data: '.length));
+        if (onProgress) {
+          onProgress(event);
+        }
+        if (event.type === 'completed') {
+          return event;
+        }
+        if (event.type === 'failed') {
+          const error = new Error(`Video generation failed: ${event.error || 'unknown error'}`);
+          error.jobFailed = true;
+          throw error;
+        }
+      }
+    }
+  },
+  
+  /**
+   * Poll a generation job until it completes or fails
+   */
+  async pollJob(apiBaseUrl, jobId, headers, intervalMs = 3000) {
+    while (true) {
+      await simulateDelay(intervalMs);
+      
+      const response = await fetch(`${apiBaseUrl}/api/jobs/${jobId}`, { headers });
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      
+      const job = await response.json();
+      if (job.status === 'completed') {
+        return job;
+      }
+      if (job.status === 'failed') {
+        throw new Error(`Video generation failed: ${job.error || 'unknown error'}`);
+      }
     }
   }
 };